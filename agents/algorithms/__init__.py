@@ -1,11 +1,29 @@
 from .search import (
     astar_search_with_limit,
     weighted_astar_search,
-    greedy_best_first_search
+    greedy_best_first_search,
+    ida_star_search,
+    rbfs_search,
+    ara_star_search,
+    ARAStar,
+    SEARCH_ALGORITHMS
 )
+from .fingerprints import FingerprintTable, FingerprintCollision
+from .node_store import NodeStore
+from .stats import SearchStats, LatencyHistogram
 
 __all__ = [
     "astar_search_with_limit",
     "weighted_astar_search",
-    "greedy_best_first_search"
+    "greedy_best_first_search",
+    "ida_star_search",
+    "rbfs_search",
+    "ara_star_search",
+    "ARAStar",
+    "SEARCH_ALGORITHMS",
+    "FingerprintTable",
+    "FingerprintCollision",
+    "NodeStore",
+    "SearchStats",
+    "LatencyHistogram"
 ]
@@ -0,0 +1,100 @@
+from array import array
+
+
+class FingerprintCollision(Exception):
+    """Dois estados diferentes com a mesma impressão digital (só no modo verificado)."""
+
+
+class FingerprintTable:
+    """Conjunto fechado (ou mapa estado --> custo) indexado por impressões digitais de 64 bits.
+
+    Substitui o dict/set de estados das buscas: em vez do estado, guarda só a impressão
+    `fingerprint(state)` (`KitchenProblem.fingerprint`, Zobrist) e um float, em dois
+    `array`s com endereçamento aberto (sondagem linear, capacidade potência de 2, fator
+    de carga até 2/3). São 16 bytes por posição, sem a entrada do dict nem o estado
+    que ela manteria vivo. A impressão 0 marca posição vazia (e é guardada como 1).
+
+    Aceita a mesma interface usada nas buscas: `tabela[estado]`, `tabela[estado] = g`,
+    `estado in tabela`, `get` e `add` (conjunto; o valor fica 0). Com `verify=True`
+    também guarda o primeiro estado de cada impressão e levanta FingerprintCollision se
+    outro estado aparecer com a mesma impressão (para os testes).
+    """
+
+    __slots__ = ("fingerprint", "keys", "values", "mask", "count", "states")
+
+    def __init__(self, fingerprint, capacity=1024, verify=False):
+        size = 8
+        while size < capacity:
+            size *= 2
+        self.fingerprint = fingerprint
+        self.keys = array("Q", bytes(8 * size))
+        self.values = array("d", bytes(8 * size))
+        self.mask = size - 1
+        self.count = 0
+        self.states = {} if verify else None
+
+    def _slot(self, state):
+        """(posição, impressão): a posição da impressão do estado ou a vazia onde ela entraria."""
+        key = self.fingerprint(state) or 1
+        if self.states is not None:
+            seen = self.states.setdefault(key, state)
+            if seen is not state and seen != state:
+                raise FingerprintCollision(f"impressão {key:#018x} repetida para estados diferentes")
+        keys, mask = self.keys, self.mask
+        i = key & mask
+        while True:
+            slot_key = keys[i]
+            if slot_key == key or slot_key == 0:
+                return i, key
+            i = (i + 1) & mask
+
+    def get(self, state, default=None):
+        i, key = self._slot(state)
+        return self.values[i] if self.keys[i] == key else default
+
+    def __contains__(self, state):
+        i, key = self._slot(state)
+        return self.keys[i] == key
+
+    def __getitem__(self, state):
+        i, key = self._slot(state)
+        if self.keys[i] != key:
+            raise KeyError(state)
+        return self.values[i]
+
+    def __setitem__(self, state, value):
+        i, key = self._slot(state)
+        if self.keys[i] != key:
+            if 3 * (self.count + 1) > 2 * len(self.keys):
+                self._grow()
+                i, key = self._slot(state)
+            self.keys[i] = key
+            self.count += 1
+        self.values[i] = value
+
+    def add(self, state):
+        if state not in self:
+            self[state] = 0.0
+
+    def __len__(self):
+        return self.count
+
+    @property
+    def nbytes(self):
+        """Bytes dos dois arrays (sem os estados do modo verificado)."""
+        return self.keys.itemsize * len(self.keys) + self.values.itemsize * len(self.values)
+
+    def _grow(self):
+        old_keys, old_values = self.keys, self.values
+        size = 2 * len(old_keys)
+        keys = array("Q", bytes(8 * size))
+        values = array("d", bytes(8 * size))
+        mask = size - 1
+        for key, value in zip(old_keys, old_values):
+            if key:
+                i = key & mask
+                while keys[i]:
+                    i = (i + 1) & mask
+                keys[i] = key
+                values[i] = value
+        self.keys, self.values, self.mask = keys, values, mask
@@ -0,0 +1,119 @@
+from array import array
+
+from aima3.search import Node
+
+ROOT = -1   # pai (e código de ação) da raiz
+
+
+class NodeView:
+    """Nó provisório passado à heurística: `h(node)` só lê `state` (e, se quiser, `path_cost`).
+
+    A busca reaproveita uma única instância, então a heurística não deve guardá-la.
+    """
+
+    __slots__ = ("state", "path_cost")
+
+    def __init__(self):
+        self.state = None
+        self.path_cost = 0.0
+
+    def of(self, state, path_cost):
+        self.state = state
+        self.path_cost = path_cost
+        return self
+
+
+class NodeStore:
+    """Nós de uma busca em arrays paralelos, endereçados por inteiros (handles).
+
+    Cada nó é um índice em `parents`, `actions` (código da ação), `g`, `h` e `state_ids`,
+    em vez de um `aima3.search.Node`. Estados e ações são internados: `states[id]` é o
+    estado e `ids` mapeia estado --> id (um dict, ou a FingerprintTable das buscas com
+    `fingerprints`). Por estado ficam também o menor g já enfileirado (`best_g`) e se
+    ele já foi expandido (`closed`), no lugar do `explored`/`closed` das buscas.
+
+    `node(handle)` reconstrói a cadeia de `Node`s só do caminho até o nó, para quem
+    recebe o resultado da busca (`solution()`, `path()`, `path_cost`...).
+
+    Com `problem` (as buscas com `fingerprints`), o estado deixa de ser guardado assim
+    que é expandido (`close`): dele ficam só a impressão em `ids` e, nos nós, pai, ação
+    e g. Só os estados ainda na fronteira ficam vivos; `node()` refaz os estados do
+    caminho aplicando as ações a partir de `problem.initial`.
+    """
+
+    __slots__ = ("parents", "actions", "g", "h", "state_ids", "states", "best_g", "closed", "ids",
+                 "action_table", "action_codes", "problem")
+
+    def __init__(self, ids=None, problem=None):
+        self.parents = array("q")
+        self.actions = array("l")
+        self.g = array("d")
+        self.h = array("d")
+        self.state_ids = array("q")
+        self.states = []
+        self.best_g = array("d")
+        self.closed = bytearray()
+        self.ids = {} if ids is None else ids
+        self.action_table = []
+        self.action_codes = {}
+        self.problem = problem
+
+    def intern(self, state) -> int:
+        """Id do estado (novos estados entram com `best_g` infinito e abertos)."""
+        sid = self.ids.get(state)
+        if sid is None:
+            sid = len(self.states)
+            self.ids[state] = sid
+            self.states.append(state)
+            self.best_g.append(float("inf"))
+            self.closed.append(0)
+        return int(sid)
+
+    def close(self, sid):
+        """Marca o estado `sid` como expandido (e o descarta, se o store tem `problem`)."""
+        self.closed[sid] = 1
+        if self.problem is not None:
+            self.states[sid] = None
+
+    def add(self, sid, parent, action, g, h, state=None) -> int:
+        """Novo nó do estado `sid`; devolve o handle (crescente: serve de ordem de inserção).
+
+        `state` devolve ao store um estado já descartado que volta à fronteira.
+        """
+        if state is not None and self.states[sid] is None:
+            self.states[sid] = state
+        if action is None:
+            code = ROOT
+        else:
+            code = self.action_codes.get(action)
+            if code is None:
+                code = self.action_codes[action] = len(self.action_table)
+                self.action_table.append(action)
+        self.parents.append(parent)
+        self.actions.append(code)
+        self.g.append(g)
+        self.h.append(h)
+        self.state_ids.append(sid)
+        return len(self.parents) - 1
+
+    def __len__(self):
+        return len(self.parents)
+
+    def node(self, handle) -> Node:
+        """`Node` (com a cadeia de pais até a raiz) equivalente ao nó `handle`."""
+        chain = []
+        while handle != ROOT:
+            chain.append(handle)
+            handle = self.parents[handle]
+        node = None
+        for handle in reversed(chain):
+            code = self.actions[handle]
+            action = None if code == ROOT else self.action_table[code]
+            if self.problem is None:
+                state = self.states[self.state_ids[handle]]
+            elif node is None:
+                state = self.problem.initial
+            else:
+                state = self.problem.result(node.state, action)
+            node = Node(state, node, action, self.g[handle])
+        return node
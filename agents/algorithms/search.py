@@ -1,120 +1,609 @@
+import copy
+import functools
 import heapq
 import time
 from aima3.search import Node
 
-def astar_search_with_limit(problem, h, max_expansions=50000, max_time_s=5.0):
+from .fingerprints import FingerprintTable
+from .node_store import ROOT, NodeStore, NodeView
+from .stats import ProfiledProblem, SearchStats
+
+# O relógio só é consultado a cada TIME_CHECK_INTERVAL retiradas da fronteira
+TIME_CHECK_INTERVAL = 256
+
+# Tempo padrão do ARA* fora do modo anytime (sem `tick_budget_ms`)
+ARA_STAR_MAX_TIME_S = 5.0
+
+
+def _instrumented(search):
+    """Garante um SearchStats, aplica o perfil (se ligado) e mede o tempo da busca."""
+    @functools.wraps(search)
+    def wrapper(problem, h, *args, stats=None, **kwargs):
+        if stats is None:
+            stats = SearchStats()
+        problem, h = stats.instrument(problem, h)
+        start_t = time.monotonic()
+        try:
+            return search(problem, h, *args, stats=stats, **kwargs)
+        finally:
+            stats.elapsed_s = time.monotonic() - start_t
+    return wrapper
+
+
+def _node_store(problem, fingerprints):
+    """NodeStore da busca; com `fingerprints`, os estados são internados numa
+    FingerprintTable e os já expandidos são descartados (ver NodeStore).
+
+    `fingerprints="verify"` também confere colisões (ver FingerprintTable).
+    """
+    if not fingerprints:
+        return NodeStore()
+    return NodeStore(FingerprintTable(problem.fingerprint, verify=fingerprints == "verify"), _replay_problem(problem))
+
+
+def _replay_problem(problem):
+    """O problema para refazer o caminho da solução: sem o perfil (`ProfiledProblem`) e
+    sem o gancho `on_transition`, que já mediram e viram essas transições na busca."""
+    if isinstance(problem, ProfiledProblem):
+        problem = problem.problem
+    if getattr(problem, "on_transition", None) is not None:
+        problem = copy.copy(problem)
+        problem.on_transition = None
+    return problem
+
+
+def _progress(stats, start_t):
+    """Chama `stats.on_progress` a cada `progress_every` expansões."""
+    if stats.expanded % stats.progress_every == 0:
+        stats.elapsed_s = time.monotonic() - start_t
+        stats.on_progress(stats)
+
+
+def _expand(problem, store, handle, state):
+    """Filhos do nó `handle` como (estado, ação, g), como em `Node.expand`."""
+    g = store.g[handle]
+    children = []
+    for action in problem.actions(state):
+        child = problem.result(state, action)
+        children.append((child, action, problem.path_cost(g, state, action, child)))
+    return children
+
+
+@_instrumented
+def astar_search_with_limit(problem, h, max_expansions=50000, max_time_s=5.0, stats=None, fingerprints=False):
     """A* search com limites de expansão e tempo.
     
     Previne que o agente fique preso indefinidamente em sub-objetivos complexos/sem solução.
+    Se `stats` (SearchStats) for passado, recebe os contadores da busca.
+
+    O menor custo já enfileirado de cada estado fica em `store.best_g`; entradas da
+    fronteira com custo maior (obsoletas) são descartadas ao sair do heap, sem teste de
+    objetivo nem expansão. Como h depende só do estado, a entrada melhor sempre sai antes,
+    então a solução é a mesma de expandi-las. `max_expansions` limita as retiradas do
+    heap, incluindo as obsoletas, como antes.
+
+    Os nós ficam num NodeStore (arrays paralelos) e a fronteira guarda (f, h, handle); o
+    `Node` devolvido é reconstruído só para o caminho da solução.
+
+    Com `fingerprints=True`, os estados são internados pela impressão digital de 64 bits
+    (`problem.fingerprint`) numa tabela compacta, em vez de um dict de estados, e cada
+    estado é descartado ao ser expandido (só a fronteira guarda estados); a busca é a
+    mesma, salvo colisão de impressões.
     """
     start_t = time.monotonic()
-    node = Node(problem.initial)
-    if problem.goal_test(node.state):
-        return node
-    
-    frontier = []
-    push_count = 0
-    h_val = h(node)
-    heapq.heappush(frontier, (node.path_cost + h_val, h_val, push_count, node))
+    store = _node_store(problem, fingerprints)
+    states, state_ids, best_g, closed = store.states, store.state_ids, store.best_g, store.closed
+    view = NodeView()
+
+    sid = store.intern(problem.initial)
+    best_g[sid] = 0.0
+    h_val = h(view.of(problem.initial, 0.0))
+    frontier = [(h_val, h_val, store.add(sid, ROOT, None, 0.0, h_val))]
+    stats.pushes += 1
     
-    explored = {node.state: node.path_cost}
     expansions = 0
     
     while frontier:
-        elapsed = time.monotonic() - start_t
-        if elapsed > max_time_s:
+        if expansions % TIME_CHECK_INTERVAL == 0 and time.monotonic() - start_t > max_time_s:
             return None
 
-        f, hv, pc, node = heapq.heappop(frontier)
+        f, hv, handle = heapq.heappop(frontier)
+        sid = state_ids[handle]
+
+        if store.g[handle] > best_g[sid]:
+            # Entrada obsoleta: o estado já saiu (e foi expandido) com custo menor
+            stats.stale_pops += 1
+            expansions += 1
+            if expansions > max_expansions:
+                return None
+            continue
         
-        if problem.goal_test(node.state):
-            return node
+        state = states[sid]
+        if problem.goal_test(state):
+            return store.node(handle)
         
         expansions += 1
         if expansions > max_expansions:
             return None
-            
-        for child in node.expand(problem):
-            if child.state not in explored or child.path_cost < explored[child.state]:
-                explored[child.state] = child.path_cost
-                push_count += 1
-                ch_val = h(child)
-                heapq.heappush(frontier, (child.path_cost + ch_val, ch_val, push_count, child))
+
+        if closed[sid]:
+            stats.reexpansions += 1
+        store.close(sid)
+
+        children = _expand(problem, store, handle, state)
+        stats.expanded += 1
+        stats.generated += len(children)
+        for child, action, g in children:
+            child_sid = store.intern(child)
+            if g < best_g[child_sid]:
+                best_g[child_sid] = g
+                stats.pushes += 1
+                ch_val = h(view.of(child, g))
+                heapq.heappush(frontier, (g + ch_val, ch_val, store.add(child_sid, handle, action, g, ch_val, child)))
+        if len(frontier) > stats.peak_frontier:
+            stats.peak_frontier = len(frontier)
+        if stats.on_progress is not None:
+            _progress(stats, start_t)
                 
     return None
 
-def weighted_astar_search(problem, h, weight=1.5):
-    """Busca A* Ponderada (Weighted A*)"""
-
-    node = Node(problem.initial)
+@_instrumented
+def weighted_astar_search(problem, h, weight=1.5, max_expansions=None, max_time_s=None, stats=None,
+                          fingerprints=False):
+    """Busca A* Ponderada (Weighted A*)
 
-    if problem.goal_test(node.state):
-        return node
+    Sem limites por padrão; `max_expansions`/`max_time_s` permitem usá-la em benchmarks.
+    Nós e `fingerprints` como em astar_search_with_limit.
+    """
+    start_t = time.monotonic()
 
-    frontier = []
-    push_count = 0
+    store = _node_store(problem, fingerprints)
+    states, state_ids, best_g, closed = store.states, store.state_ids, store.best_g, store.closed
+    view = NodeView()
 
-    h_val = h(node)
-    f_val = node.path_cost + weight * h_val
+    sid = store.intern(problem.initial)
+    best_g[sid] = 0.0
+    h_val = h(view.of(problem.initial, 0.0))
+    f_val = weight * h_val
 
-    heapq.heappush(frontier, (f_val, h_val, push_count, node))
+    frontier = [(f_val, h_val, store.add(sid, ROOT, None, 0.0, h_val))]
+    stats.pushes += 1
 
-    explored = {node.state: node.path_cost}
+    pops = 0
 
     while frontier:
 
-        f, hv, _, node = heapq.heappop(frontier)
+        if (max_time_s is not None and pops % TIME_CHECK_INTERVAL == 0
+                and time.monotonic() - start_t > max_time_s):
+            return None
 
-        if problem.goal_test(node.state):
-            return node
+        f, hv, handle = heapq.heappop(frontier)
+        pops += 1
+        sid = state_ids[handle]
 
-        for child in node.expand(problem):
+        if store.g[handle] > best_g[sid]:
+            # Entrada obsoleta (ver astar_search_with_limit)
+            stats.stale_pops += 1
+            continue
 
-            if (child.state not in explored or
-                child.path_cost < explored[child.state]):
+        state = states[sid]
+        if problem.goal_test(state):
+            return store.node(handle)
 
-                explored[child.state] = child.path_cost
-                push_count += 1
+        if max_expansions is not None and stats.expanded >= max_expansions:
+            return None
+
+        if closed[sid]:
+            stats.reexpansions += 1
+        store.close(sid)
+
+        children = _expand(problem, store, handle, state)
+        stats.expanded += 1
+        stats.generated += len(children)
+        for child, action, g in children:
 
-                ch_val = h(child)
-                f_child = child.path_cost + weight * ch_val
+            child_sid = store.intern(child)
+            if g < best_g[child_sid]:
+
+                best_g[child_sid] = g
+                stats.pushes += 1
+
+                ch_val = h(view.of(child, g))
+                f_child = g + weight * ch_val
 
                 heapq.heappush(
                     frontier,
-                    (f_child, ch_val, push_count, child)
+                    (f_child, ch_val, store.add(child_sid, handle, action, g, ch_val, child))
                 )
 
-    return None
+        if len(frontier) > stats.peak_frontier:
+            stats.peak_frontier = len(frontier)
+        if stats.on_progress is not None:
+            _progress(stats, start_t)
 
-def greedy_best_first_search(problem, h):
-    """Greedy Best-First Search (sem limites)."""
-    
-    node = Node(problem.initial)
+    return None
 
-    if problem.goal_test(node.state):
-        return node
+@_instrumented
+def greedy_best_first_search(problem, h, max_expansions=None, max_time_s=None, stats=None, fingerprints=False):
+    """Greedy Best-First Search (sem limites por padrão).
 
-    frontier = []
-    push_count = 0
+    Nós e `fingerprints` como em astar_search_with_limit.
+    """
+    start_t = time.monotonic()
+    
+    store = _node_store(problem, fingerprints)
+    states, state_ids, closed = store.states, store.state_ids, store.closed
+    view = NodeView()
 
-    heapq.heappush(frontier, (h(node), push_count, node))
+    sid = store.intern(problem.initial)
+    h_val = h(view.of(problem.initial, 0.0))
+    frontier = [(h_val, store.add(sid, ROOT, None, 0.0, h_val))]
+    stats.pushes += 1
 
-    explored = set()
+    pops = 0
 
     while frontier:
-        hv, _, node = heapq.heappop(frontier)
+        if (max_time_s is not None and pops % TIME_CHECK_INTERVAL == 0
+                and time.monotonic() - start_t > max_time_s):
+            return None
 
-        if problem.goal_test(node.state):
-            return node
+        hv, handle = heapq.heappop(frontier)
+        pops += 1
+        sid = state_ids[handle]
 
-        if node.state in explored:
+        # Estado já expandido: já passou pelo teste de objetivo
+        if closed[sid]:
+            stats.stale_pops += 1
             continue
 
-        explored.add(node.state)
+        state = states[sid]
+        if problem.goal_test(state):
+            return store.node(handle)
+
+        if max_expansions is not None and stats.expanded >= max_expansions:
+            return None
+
+        store.close(sid)
 
-        for child in node.expand(problem):
-            if child.state not in explored:
-                push_count += 1
-                heapq.heappush(frontier, (h(child), push_count, child))
+        children = _expand(problem, store, handle, state)
+        stats.expanded += 1
+        stats.generated += len(children)
+        for child, action, g in children:
+            child_sid = store.intern(child)
+            if not closed[child_sid]:
+                stats.pushes += 1
+                ch_val = h(view.of(child, g))
+                heapq.heappush(frontier, (ch_val, store.add(child_sid, handle, action, g, ch_val)))
+        if len(frontier) > stats.peak_frontier:
+            stats.peak_frontier = len(frontier)
+        if stats.on_progress is not None:
+            _progress(stats, start_t)
 
     return None
+
+
+class _SearchLimitReached(Exception):
+    """Interrompe as buscas recursivas quando o limite de expansões ou de tempo estoura."""
+
+
+@_instrumented
+def ida_star_search(problem, h, max_expansions=50000, max_time_s=5.0, table_size=100000, stats=None):
+    """IDA* (A* por aprofundamento iterativo) com tabela de transposição limitada.
+
+    A memória fica em O(profundidade + table_size), em vez de guardar todos os nós
+    gerados como o A*. Cada iteração é uma busca em profundidade que corta nós com
+    f = g + h acima do limite; o próximo limite é o menor f cortado. A tabela de
+    transposição (estado -> menor g visto na iteração, até `table_size` entradas)
+    poda caminhos que chegam a um estado já visitado com custo igual ou maior.
+    Com h admissível a solução é ótima.
+    """
+    start_t = time.monotonic()
+    root = Node(problem.initial)
+    bound = h(root)
+    expansions = 0
+
+    while True:
+        table = {}
+        next_bound = float("inf")
+        stack = [(bound, root)]
+        stats.pushes += 1
+        path = []           # estados do caminho atual, indexados pela profundidade
+        on_path = set()
+
+        while stack:
+            f, node = stack.pop()
+            while len(path) > node.depth:
+                on_path.discard(path.pop())
+
+            if f > bound:
+                if f < next_bound:
+                    next_bound = f
+                continue
+
+            state = node.state
+            if state in on_path:
+                continue
+
+            if problem.goal_test(state):
+                return node
+
+            seen_g = table.get(state)
+            if seen_g is not None and seen_g <= node.path_cost:
+                stats.stale_pops += 1
+                continue
+            if seen_g is not None or len(table) < table_size:
+                table[state] = node.path_cost
+
+            expansions += 1
+            if expansions > max_expansions:
+                return None
+            if expansions % TIME_CHECK_INTERVAL == 0 and time.monotonic() - start_t > max_time_s:
+                return None
+
+            path.append(state)
+            on_path.add(state)
+
+            children = node.expand(problem)
+            stats.expanded += 1
+            stats.generated += len(children)
+            scored = []
+            for i, child in enumerate(children):
+                if child.state not in on_path:
+                    ch_val = h(child)
+                    scored.append((child.path_cost + ch_val, ch_val, i, child))
+            # Mesmo desempate do A* (menor f, depois menor h, depois ordem de geração):
+            # o melhor filho fica no topo da pilha
+            scored.sort(key=lambda entry: entry[:3], reverse=True)
+            stack.extend((entry[0], entry[3]) for entry in scored)
+            stats.pushes += len(scored)
+            if len(stack) > stats.peak_frontier:
+                stats.peak_frontier = len(stack)
+            if stats.on_progress is not None:
+                _progress(stats, start_t)
+
+        if next_bound == float("inf"):
+            return None
+        bound = next_bound
+
+
+@_instrumented
+def rbfs_search(problem, h, max_expansions=50000, max_time_s=5.0, stats=None):
+    """Recursive Best-First Search (AIMA, Fig. 3.26) com limites de expansão e tempo.
+
+    Usa memória linear na profundidade: guarda só o caminho atual e os irmãos de
+    cada nó, com o f "herdado" da melhor alternativa esquecida. Estados que já estão
+    no caminho atual não são regerados. Com h admissível a solução é ótima.
+    """
+    start_t = time.monotonic()
+    counter = [0]
+    held = [0]          # nós guardados nas listas de sucessores do caminho atual
+    on_path = set()
+
+    def rbfs(node, f_node, f_limit):
+        if problem.goal_test(node.state):
+            return node, f_node
+
+        counter[0] += 1
+        if counter[0] > max_expansions:
+            raise _SearchLimitReached
+        if counter[0] % TIME_CHECK_INTERVAL == 0 and time.monotonic() - start_t > max_time_s:
+            raise _SearchLimitReached
+
+        children = node.expand(problem)
+        stats.expanded += 1
+        stats.generated += len(children)
+        if stats.on_progress is not None:
+            _progress(stats, start_t)
+
+        on_path.add(node.state)
+        successors = []
+        try:
+            successors = [
+                [max(child.path_cost + h(child), f_node), i, child]
+                for i, child in enumerate(children)
+                if child.state not in on_path
+            ]
+            if not successors:
+                return None, float("inf")
+            stats.pushes += len(successors)
+            held[0] += len(successors)
+            if held[0] > stats.peak_frontier:
+                stats.peak_frontier = held[0]
+
+            while True:
+                successors.sort(key=lambda entry: (entry[0], entry[1]))
+                best = successors[0]
+                if best[0] > f_limit:
+                    return None, best[0]
+                alternative = successors[1][0] if len(successors) > 1 else float("inf")
+                result, best[0] = rbfs(best[2], best[0], min(f_limit, alternative))
+                if result is not None:
+                    return result, best[0]
+        finally:
+            on_path.discard(node.state)
+            held[0] -= len(successors)
+
+    root = Node(problem.initial)
+    try:
+        result, _ = rbfs(root, h(root), float("inf"))
+    except _SearchLimitReached:
+        return None
+    return result
+
+
+class ARAStar:
+    """Anytime Repairing A* (Likhachev, Gordon e Thrun, 2003).
+
+    Sequência de buscas A* ponderadas (f = g + w*h) com `w` decrescendo de
+    `initial_weight` até 1 em passos de `weight_step`. Cada iteração reaproveita o
+    trabalho da anterior: só os estados cujo `g` melhorou depois de fechados
+    (INCONS) voltam à fronteira. Ao fim de uma iteração com peso `w`, o custo do
+    melhor plano é no máximo `w` vezes o ótimo; com `w = 1` ele é ótimo.
+
+    A busca é retomável: `step(budget_s)` trabalha até o orçamento acabar e devolve o
+    melhor nó-objetivo encontrado até ali (ou None), guardando a fronteira (e a
+    repriorização dela entre iterações, se não terminou) para a próxima chamada; o
+    relógio é consultado a cada nó. Assim o agente executa um plano cedo e o melhora
+    nos passos seguintes. Estados com `g + h` maior ou igual ao custo do melhor plano
+    são podados.
+
+    `done` indica que a busca terminou (plano ótimo provado ou `max_expansions`
+    esgotado); `optimal`, só a primeira: o melhor plano é comprovadamente ótimo.
+    """
+
+    def __init__(self, problem, h, initial_weight=2.5, weight_step=0.5, max_expansions=None):
+        self.problem = problem
+        self.h = h
+        self.weight = max(1.0, initial_weight)
+        self.weight_step = weight_step
+        self.max_expansions = max_expansions
+        root = Node(problem.initial)
+        self.g = {root.state: root.path_cost}
+        self.h_values = {}
+        self.open = {root.state: root}   # estado --> nó atual na fronteira
+        self.closed = set()
+        self.incons = {}
+        self.heap = []
+        self.rebuild = True              # a fronteira precisa de novas prioridades (peso mudou)
+        self.pending = None              # (estado, nó) ainda por repriorizar na reconstrução
+        self.push_count = 0
+        self.expansions = 0
+        self.iterations = 0              # iterações concluídas (planos com limite `weight`)
+        self.best = root if problem.goal_test(root.state) else None
+        self.optimal = self.best is not None
+        self.done = self.optimal
+
+    def _h(self, node, h):
+        value = self.h_values.get(node.state)
+        if value is None:
+            value = self.h_values[node.state] = h(node)
+        return value
+
+    def step(self, budget_s, stats=None):
+        """Continua a busca por até `budget_s` segundos; devolve o melhor nó-objetivo."""
+        if stats is None:
+            stats = SearchStats()
+        problem, h = stats.instrument(self.problem, self.h)
+        start_t = time.monotonic()
+        deadline = start_t + budget_s
+        try:
+            while not self.done:
+                if not self._improve_path(problem, h, deadline, stats):
+                    break
+                self.iterations += 1
+                if self.weight <= 1.0 or not (self.open or self.incons):
+                    # Fronteira vazia: nenhum plano mais barato, o melhor já é ótimo
+                    self.weight = 1.0
+                    self.optimal = self.done = True
+                else:
+                    # Próxima iteração: peso menor, INCONS de volta à fronteira
+                    self.weight = max(1.0, self.weight - self.weight_step)
+                    self.open.update(self.incons)
+                    self.incons = {}
+                    self.closed = set()
+                    self.rebuild = True
+            return self.best
+        finally:
+            stats.elapsed_s += time.monotonic() - start_t
+
+    def _improve_path(self, problem, h, deadline, stats):
+        """Uma iteração do ARA*; False se o orçamento (tempo ou expansões) acabou antes."""
+        open_nodes, g, closed = self.open, self.g, self.closed
+        best_cost = self.best.path_cost if self.best else float("inf")
+        weight = self.weight
+
+        if self.rebuild:
+            # Reconstrução retomável: com OPEN grande ela sozinha passaria do orçamento
+            if self.pending is None:
+                self.pending = list(open_nodes.items())
+                self.pending.reverse()
+                self.heap = []
+            pending, heap = self.pending, self.heap
+            while pending:
+                if time.monotonic() > deadline:
+                    return False
+                state, node = pending.pop()
+                hv = self._h(node, h)
+                if node.path_cost + hv >= best_cost:
+                    del open_nodes[state]
+                    continue
+                self.push_count += 1
+                stats.pushes += 1
+                heapq.heappush(heap, (node.path_cost + weight * hv, hv, self.push_count, node))
+            self.pending = None
+            self.rebuild = False
+        heap = self.heap
+
+        while heap:
+            f, hv, _, node = heap[0]
+            if open_nodes.get(node.state) is not node:
+                # Entrada obsoleta: estado já expandido ou com caminho melhor
+                heapq.heappop(heap)
+                stats.stale_pops += 1
+                continue
+            if f >= best_cost:
+                return True
+            # Orçamentos de milissegundos: o relógio é consultado a cada retirada
+            if time.monotonic() > deadline:
+                return False
+            if self.max_expansions is not None and self.expansions >= self.max_expansions:
+                self.done = True
+                return False
+
+            heapq.heappop(heap)
+            del open_nodes[node.state]
+            closed.add(node.state)
+            self.expansions += 1
+
+            children = node.expand(problem)
+            stats.expanded += 1
+            stats.generated += len(children)
+            for child in children:
+                state = child.state
+                if child.path_cost >= g.get(state, float("inf")):
+                    continue
+                g[state] = child.path_cost
+                if problem.goal_test(state):
+                    if child.path_cost < best_cost:
+                        self.best = child
+                        best_cost = child.path_cost
+                    continue
+                ch_val = self._h(child, h)
+                if child.path_cost + ch_val >= best_cost:
+                    continue
+                if state in closed:
+                    self.incons[state] = child
+                else:
+                    open_nodes[state] = child
+                    self.push_count += 1
+                    stats.pushes += 1
+                    heapq.heappush(heap, (child.path_cost + weight * ch_val, ch_val, self.push_count, child))
+            if len(heap) > stats.peak_frontier:
+                stats.peak_frontier = len(heap)
+            if stats.on_progress is not None and stats.expanded % stats.progress_every == 0:
+                stats.on_progress(stats)
+        return True
+
+
+def ara_star_search(problem, h, initial_weight=2.5, weight_step=0.5, max_expansions=50000, max_time_s=ARA_STAR_MAX_TIME_S,
+                    stats=None):
+    """ARA* até provar o plano ótimo ou esgotar os limites.
+
+    Ao contrário das demais buscas, o limite não descarta o trabalho feito: devolve o
+    melhor plano encontrado até ali (com custo no máximo `initial_weight` vezes o ótimo).
+    Quem precisa saber se o plano foi provado ótimo usa `ARAStar` e olha `optimal`.
+    """
+    planner = ARAStar(problem, h, initial_weight, weight_step, max_expansions)
+    return planner.step(max_time_s, stats)
+
+
+# Algoritmos selecionáveis pelo nome (KitchenAgent, main.py, benchmarks). Todos aceitam
+# (problem, h, max_expansions=..., max_time_s=..., stats=...).
+SEARCH_ALGORITHMS = {
+    "astar": astar_search_with_limit,
+    "weighted_astar": weighted_astar_search,
+    "greedy": greedy_best_first_search,
+    "ida_star": ida_star_search,
+    "rbfs": rbfs_search,
+    "ara_star": ara_star_search,
+}
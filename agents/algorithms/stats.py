@@ -0,0 +1,208 @@
+import bisect
+import time
+
+
+# Operações do problema medidas quando o perfil está ligado
+PROFILED_OPS = ("actions", "result", "goal_test", "h")
+
+# Limites superiores (ms) das faixas do histograma de latência; a última faixa é aberta
+LATENCY_BOUNDS_MS = (0.1, 0.2, 0.5, 1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class SearchStats:
+    """Contadores de uma execução de busca (preenchidos pelas funções de `search.py`).
+
+    - expanded:      nós expandidos (filhos gerados a partir deles)
+    - generated:     filhos gerados por essas expansões
+    - pushes:        entradas colocadas na fronteira
+    - stale_pops:    entradas retiradas da fronteira que já tinham um caminho melhor
+    - reexpansions:  expansões de estados que já tinham sido expandidos
+    - peak_frontier: maior tamanho da fronteira durante a busca
+    - elapsed_s:     tempo de parede da busca
+
+    Os contadores acima custam só alguns incrementos por expansão e estão sempre ligados.
+    Com `profile=True`, as chamadas a `actions`, `result`, `goal_test` e `h` também são
+    contadas e cronometradas (`calls`/`times`), ao custo de um proxy em volta do problema.
+    `on_progress(stats)` é chamado a cada `progress_every` expansões.
+    """
+
+    __slots__ = (
+        "expanded",
+        "generated",
+        "pushes",
+        "stale_pops",
+        "reexpansions",
+        "peak_frontier",
+        "elapsed_s",
+        "calls",
+        "times",
+        "profile",
+        "on_progress",
+        "progress_every",
+    )
+
+    COUNTERS = ("expanded", "generated", "pushes", "stale_pops", "reexpansions", "peak_frontier", "elapsed_s")
+
+    def __init__(self, profile=False, on_progress=None, progress_every=1000):
+        self.expanded = 0
+        self.generated = 0
+        self.pushes = 0
+        self.stale_pops = 0
+        self.reexpansions = 0
+        self.peak_frontier = 0
+        self.elapsed_s = 0.0
+        self.calls = dict.fromkeys(PROFILED_OPS, 0)
+        self.times = dict.fromkeys(PROFILED_OPS, 0.0)
+        self.profile = profile
+        self.on_progress = on_progress
+        self.progress_every = progress_every
+
+    def instrument(self, problem, h):
+        """Devolve (problem, h) medidos se o perfil estiver ligado; senão os originais."""
+        if not self.profile:
+            return problem, h
+        return ProfiledProblem(problem, self), self.timed("h", h)
+
+    def timed(self, op, fn):
+        """Envolve `fn` contando e cronometrando suas chamadas como `op`."""
+        calls, times = self.calls, self.times
+        clock = time.perf_counter
+
+        def wrapper(*args):
+            start = clock()
+            try:
+                return fn(*args)
+            finally:
+                times[op] += clock() - start
+                calls[op] += 1
+        return wrapper
+
+    def merge(self, other: "SearchStats") -> "SearchStats":
+        """Acumula os contadores de outra busca (picos viram o máximo)."""
+        self.expanded += other.expanded
+        self.generated += other.generated
+        self.pushes += other.pushes
+        self.stale_pops += other.stale_pops
+        self.reexpansions += other.reexpansions
+        self.peak_frontier = max(self.peak_frontier, other.peak_frontier)
+        self.elapsed_s += other.elapsed_s
+        for op in PROFILED_OPS:
+            self.calls[op] += other.calls[op]
+            self.times[op] += other.times[op]
+        return self
+
+    def as_dict(self) -> dict:
+        data = {name: getattr(self, name) for name in self.COUNTERS}
+        if self.profile:
+            data["calls"] = dict(self.calls)
+            data["times"] = dict(self.times)
+        return data
+
+    def summary(self) -> str:
+        """Resumo em uma linha, para logs."""
+        text = (
+            f"expandidos={self.expanded} gerados={self.generated} pushes={self.pushes} "
+            f"obsoletos={self.stale_pops} reexpansões={self.reexpansions} "
+            f"pico_fronteira={self.peak_frontier} tempo={self.elapsed_s:.3f}s"
+        )
+        if self.profile:
+            ops = ", ".join(
+                f"{op}: {self.calls[op]}x/{self.times[op]:.3f}s" for op in PROFILED_OPS
+            )
+            text += f" | {ops}"
+        return text
+
+    def __repr__(self):
+        fields = ", ".join(f"{k}={v}" for k, v in self.as_dict().items())
+        return f"SearchStats({fields})"
+
+
+class ProfiledProblem:
+    """Proxy de um `Problem` que mede `actions`, `result` e `goal_test` em um SearchStats.
+
+    Os demais atributos (initial, path_cost, h, ...) são repassados ao problema original.
+    """
+
+    def __init__(self, problem, stats: SearchStats):
+        self.problem = problem
+        self.initial = problem.initial
+        self.actions = stats.timed("actions", problem.actions)
+        self.result = stats.timed("result", problem.result)
+        self.goal_test = stats.timed("goal_test", problem.goal_test)
+
+    def __getattr__(self, name):
+        return getattr(self.problem, name)
+
+
+class LatencyHistogram:
+    """Histograma das latências (ms) das decisões do agente em um episódio.
+
+    As faixas são fixas (`LATENCY_BOUNDS_MS`), então registrar um passo custa uma busca
+    binária; os percentis são interpolados dentro da faixa (nunca acima do máximo
+    observado).
+    """
+
+    __slots__ = ("bounds", "counts", "count", "total_ms", "max_ms")
+
+    def __init__(self, bounds=LATENCY_BOUNDS_MS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.count = 0
+        self.total_ms = 0.0
+        self.max_ms = 0.0
+
+    def record(self, latency_ms):
+        self.counts[bisect.bisect_left(self.bounds, latency_ms)] += 1
+        self.count += 1
+        self.total_ms += latency_ms
+        if latency_ms > self.max_ms:
+            self.max_ms = latency_ms
+
+    @property
+    def mean_ms(self) -> float:
+        return self.total_ms / self.count if self.count else 0.0
+
+    def percentile(self, q) -> float:
+        """Latência abaixo da qual estão `q` (0 a 1) dos passos (interpolada na faixa)."""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                upper = min(self.bounds[i], self.max_ms) if i < len(self.bounds) else self.max_ms
+                lower = min(self.bounds[i - 1], upper) if i > 0 else 0.0
+                return lower + (upper - lower) * (rank - seen) / n
+            seen += n
+        return self.max_ms
+
+    def as_dict(self) -> dict:
+        return {
+            "count": self.count,
+            "mean_ms": self.mean_ms,
+            "p50_ms": self.percentile(0.50),
+            "p95_ms": self.percentile(0.95),
+            "p99_ms": self.percentile(0.99),
+            "max_ms": self.max_ms,
+            "buckets": {self.label(i): n for i, n in enumerate(self.counts) if n},
+        }
+
+    def label(self, i) -> str:
+        if i < len(self.bounds):
+            return f"<={self.bounds[i]:g}ms"
+        return f">{self.bounds[-1]:g}ms"
+
+    def summary(self) -> str:
+        """Resumo em uma linha, para logs."""
+        return (
+            f"passos={self.count} média={self.mean_ms:.2f}ms p50={self.percentile(0.50):.2f}ms "
+            f"p95={self.percentile(0.95):.2f}ms p99={self.percentile(0.99):.2f}ms máx={self.max_ms:.2f}ms"
+        )
+
+    def lines(self, width=40):
+        """Histograma em texto, uma linha por faixa não vazia."""
+        peak = max(self.counts) or 1
+        return [
+            f"{self.label(i):>10} {n:>6} {'#' * max(1, round(width * n / peak))}"
+            for i, n in enumerate(self.counts) if n
+        ]
@@ -1,138 +1,260 @@
+import time
+
 from aima3.agents import Agent
 from aima3.search import Node
 
-from problems.kitchen_problem import KitchenProblem
-from utils.recipe_utils import pot_required_ingredients
+from problems.kitchen_problem import KitchenProblem, expand_macros
+from utils.recipe_utils import (
+    deliverable_order,
+    order_priority,
+    pot_assignments,
+    pot_needed_ingredients,
+    pot_required_ingredients,
+)
 from models.entities import Ingredient, Plate, Extinguisher, Pot
 
 
-from agents.algorithms.search import astar_search_with_limit
+from agents.algorithms.search import SEARCH_ALGORITHMS, ARAStar, ARA_STAR_MAX_TIME_S
+from agents.algorithms.stats import SearchStats, LatencyHistogram
+from agents import subgoals
+from agents.subgoals import Subgoal
+from agents.plan_cache import PlanCache, validate_plan
+from agents.replanning import DStarLite, next_interaction, repair_movement
 
 
 class KitchenAgent(Agent):
-    def __init__(self, heuristic):
+    def __init__(self, heuristic, algorithm="astar", search_options=None,
+                 profile=False, on_progress=None, on_transition=None, subgoal_heuristics=True,
+                 plan_cache_size=256, tick_budget_ms=None, macro_actions=False, time_skip=False):
+        """
+        algorithm:      nome do algoritmo de busca (chave de SEARCH_ALGORITHMS: astar,
+                        weighted_astar, greedy, ida_star, rbfs)
+        search_options: argumentos extras do algoritmo (ex.: {"table_size": 50000} no IDA*)
+        subgoal_heuristics: usa a heurística de cada sub-objetivo; com False, os
+                        sub-objetivos são resolvidos com `zero_heuristic` (para comparação)
+        plan_cache_size: entradas do cache LRU de planos por sub-objetivo (0 desliga o cache)
+        tick_budget_ms: só com algorithm="ara_star": limita o planejamento de cada passo a
+                        este orçamento. O agente executa o melhor plano encontrado até ali
+                        e o ARA* continua melhorando-o nos passos seguintes
+        macro_actions: busca no modo hierárquico (`GoTo` até as estações em vez de `Move`s
+                        de um tile); o plano é expandido em `Move`s antes de ser executado
+        time_skip:     busca com `WaitUntil` (salto até o próximo evento de relógio) em vez de
+                        `Wait`s de um tick; o plano é expandido em `Wait`s antes de ser executado
+        profile:       mede actions/result/goal_test/h em cada busca (SearchStats.profile)
+        on_progress:   callback(stats) chamado periodicamente durante as buscas
+        on_transition: callback(estado, ação, novo_estado) repassado aos KitchenProblem
+        """
         super().__init__(program=self)
+        if algorithm not in SEARCH_ALGORITHMS:
+            raise ValueError(f"Algoritmo de busca desconhecido: {algorithm}")
+        if tick_budget_ms is not None and algorithm != "ara_star":
+            raise ValueError("tick_budget_ms exige algorithm='ara_star'")
+        if tick_budget_ms is not None and (macro_actions or time_skip):
+            raise ValueError("tick_budget_ms não se aplica a macro_actions nem a time_skip")
         self.heuristic = heuristic
+        self.algorithm = algorithm
+        self.search_options = dict(search_options or {})
         self.plan = []
         self.debug_info = {}
+        self.profile = profile
+        self.on_progress = on_progress
+        self.on_transition = on_transition
+        self.subgoal_heuristics = subgoal_heuristics
+        self.plan_cache = PlanCache(plan_cache_size) if plan_cache_size > 0 else None
+        self.tick_budget_ms = tick_budget_ms
+        self.macro_actions = macro_actions
+        self.time_skip = time_skip
+        self.planner = None       # ARA* em andamento (modo anytime)
+        self._planner_key = None
+        self._plan_goal = None    # nó-objetivo do plano atual (modo anytime)
+        # Latência de cada decisão do episódio
+        self.latency = LatencyHistogram()
+        # Acompanhamento do plano: estado previsto após a última ação e o problema do plano
+        self._expected = None
+        self._plan_problem = None
+        self._movement = {}       # (layout_index, tile) --> DStarLite até o tile
+        self.repairs = {"still_valid": 0, "movement": 0, "replan": 0}
+        # Contadores acumulados de todas as buscas do episódio
+        self.total_stats = SearchStats(profile=profile)
 
     def get_subgoal_test(self, state):
-        """Identifica um sub-objetivo alcançável com base no estado atual."""
+        """Identifica um sub-objetivo alcançável com base no estado atual.
+
+        Retorna um `Subgoal` (nome, teste de objetivo e heurística admissível) ou None.
+        """
+        index = state.layout_index
 
         # 1. Incêndio — prioridade máxima
         if any(s.is_on_fire for _, s in state.stations_state):
             if isinstance(state.held_item, Extinguisher):
-                return lambda s: not any(st.is_on_fire for _, st in s.stations_state)
+                return Subgoal(
+                    "extinguish",
+                    lambda s: not any(st.is_on_fire for _, st in s.stations_state),
+                    subgoals.extinguish_h,
+                )
             else:
-                return lambda s: isinstance(s.held_item, Extinguisher)
+                return Subgoal(
+                    "fetch_extinguisher",
+                    lambda s: isinstance(s.held_item, Extinguisher),
+                    subgoals.fetch_h(subgoals.is_extinguisher),
+                )
 
         # 1.5. Lixeira: Descartar itens queimados (BURNT)
         if isinstance(state.held_item, Ingredient) and state.held_item.state == 'BURNT':
-            return lambda s: s.held_item is None
+            return Subgoal("discard", lambda s: s.held_item is None, subgoals.discard_h)
 
         for pos, s_state in state.stations_state:
             if isinstance(s_state.content, Ingredient) and s_state.content.state == 'BURNT':
                 if state.held_item is None:
-                    return lambda s: isinstance(s.held_item, Ingredient) and s.held_item.state == 'BURNT'
+                    return Subgoal(
+                        "fetch_burnt",
+                        lambda s: isinstance(s.held_item, Ingredient) and s.held_item.state == 'BURNT',
+                        subgoals.fetch_h(subgoals.is_burnt),
+                    )
 
         # 2. Estações com progresso (Chop, Cook, Wash)
+        # Só o corte precisa do agente; fogão, pia e panela avançam sozinhos, então esperar
+        # por eles fica para o fim (`waiting`) e o agente adianta outro pedido enquanto isso
+        waiting = []
         for pos, s_state in state.stations_state:
             if s_state.content:
                 tile = state.get_layout_at(pos[0], pos[1])
 
                 # RAW na tábua --> CHOPPED
                 if tile in ('T', 'B') and isinstance(s_state.content, Ingredient) and s_state.content.state == 'RAW':
-                    return lambda s: any(
+                    return Subgoal("chop", lambda s: any(
                         st_pos == pos and st.content and st.content.state == 'CHOPPED'
                         for st_pos, st in s.stations_state
-                    )
+                    ), subgoals.chop_at_h(pos), subgoals.projection("chop", state, pos, s_state))
 
                 # CHOPPED no fogão --> COOKED
                 if tile == 'S' and isinstance(s_state.content, Ingredient) and s_state.content.state == 'CHOPPED':
-                    return lambda s: any(
+                    waiting.append(Subgoal("cook", lambda s, pos=pos: any(
                         st_pos == pos and st.content and st.content.state == 'COOKED'
                         for st_pos, st in s.stations_state
-                    )
+                    ), subgoals.cook_at_h(pos), subgoals.projection("cook", state, pos, s_state)))
 
                 # DIRTY plate na pia --> CLEAN
                 if tile == 'W' and isinstance(s_state.content, Plate) and s_state.content.state == 'DIRTY':
-                    return lambda s: any(
+                    waiting.append(Subgoal("wash", lambda s, pos=pos: any(
                         st_pos == pos and st.content and isinstance(st.content, Plate) and st.content.state == 'CLEAN'
                         for st_pos, st in s.stations_state
-                    )
+                    ), subgoals.wash_at_h(pos), subgoals.projection("wash", state, pos, s_state)))
 
                 # Panela cozinhando --> READY
                 if tile == 'K' and isinstance(s_state.content, Pot) and s_state.content.state == 'COOKING':
-                    return lambda s: any(
+                    waiting.append(Subgoal("pot_cook", lambda s, pos=pos: any(
                         st_pos == pos and isinstance(st.content, Pot) and st.content.state == 'READY'
                         for st_pos, st in s.stations_state
+                    ), subgoals.pot_cook_at_h(pos), subgoals.projection("pot_cook", state, pos, s_state)))
+
+        # 3. Panelas, cada uma no pedido que o escalonador lhe atribuiu (por prazo e pontuação)
+        pots = self._scheduled_pots(state)
+        held = state.held_item
+
+        # Sopa pronta primeiro: é o prato mais perto de virar pontos
+        for pos, pot, order in pots:
+            if pot.state == 'READY':
+                if isinstance(held, Plate) and held.state == 'CLEAN':
+                    return self._serve_subgoal(state)
+                if held is None:
+                    plate = self._plate_subgoal(state)
+                    if plate:
+                        return plate
+
+        # Prato limpo na mão sem nada para servir tão cedo: deixar num balcão e voltar às panelas
+        if subgoals.is_clean_plate(held) and not any(pot.state == 'COOKING' for _, pot, _ in pots) and not any(
+            isinstance(st.content, Ingredient) and st.content.state == 'COOKED' for _, st in state.stations_state
+        ) and any(pot_needed_ingredients(pot, order) for _, pot, order in pots):
+            return Subgoal(
+                "stash_plate", lambda s: s.held_item is None, subgoals.discard_h,
+                subgoals.projection("stash_plate", state, state.grid_objects),
+            )
+
+        # Depois, preencher as panelas: o item na mão vai para a primeira panela que precisa dele
+        for pos, pot, order in pots:
+            if pot.state not in ('EMPTY', 'FILLING'):
+                continue
+            needed = pot_needed_ingredients(pot, order)
+            if not needed:
+                continue
+
+            # Se já está segurando um ingrediente dela (chopped)
+            if isinstance(held, Ingredient) and held.state == 'CHOPPED' and held.name in needed:
+                target_count = len(pot.ingredients) + 1
+                return Subgoal(
+                    "fill_pot",
+                    lambda s, p=pos, tc=target_count: any(
+                        st_pos == p and isinstance(st.content, Pot)
+                        and len(st.content.ingredients) >= tc
+                        for st_pos, st in s.stations_state
+                    ),
+                    subgoals.fill_pot_h(pos, target_count),
+                    subgoals.projection("fill_pot", state, pos, pot.state),
+                )
+
+            # Se está segurando RAW de um ingrediente dela
+            if isinstance(held, Ingredient) and held.state == 'RAW' and held.name in needed:
+                name = held.name
+                # O objetivo é ter o CHOPPED na mão: um que já esteja numa tábua também serve
+                return Subgoal("chop_held", lambda s: (
+                    isinstance(s.held_item, Ingredient)
+                    and s.held_item.state == 'CHOPPED'
+                    and s.held_item.name == name
+                ), subgoals.chop_ingredient_h(name), subgoals.projection(
+                    "chop_held", state, subgoals.stations_at(state, index.boards)
+                ))
+
+            # Nada na mão: buscar o próximo ingrediente da panela de maior prioridade,
+            # de preferência um que já foi cortado e ficou numa estação ou balcão
+            if held is None:
+                for ing in needed:
+                    if any(subgoals.matching_items(state, self._chopped(ing))):
+                        return self._fetch_ingredient_subgoal(state, ing, chopped=True)
+                return self._fetch_ingredient_subgoal(state, needed[0])
+
+        # Panela com ingredientes de um pedido que expirou: esvaziar com um prato para liberá-la
+        for pos in index.pots:
+            pot = state.stations_state.get(pos).content
+            if isinstance(pot, Pot) and pot.ingredients and all(pos != p for p, _, _ in pots):
+                if isinstance(held, Plate) and held.state == 'CLEAN':
+                    return Subgoal(
+                        "empty_pot",
+                        lambda s, p=pos: not s.stations_state.get(p).content.ingredients,
+                        subgoals.empty_pot_h(pos),
+                        subgoals.projection("empty_pot", state, pos, pot),
                     )
+                if held is None:
+                    plate = self._plate_subgoal(state)
+                    if plate:
+                        return plate
 
-        # 3. Verificar se há panela que precisa de ingredientes
-        if state.active_orders:
-            order = state.active_orders[0]
-            for pos, s_state in state.stations_state:
-                tile = state.get_layout_at(pos[0], pos[1])
-                if tile == 'K' and isinstance(s_state.content, Pot):
-                    pot = s_state.content
-                    if pot.state in ('EMPTY', 'FILLING'):
-                        needed = list(pot_required_ingredients(order))
-                        for ing in pot.ingredients:
-                            if ing in needed:
-                                needed.remove(ing)
-
-                        if needed:
-                            first_needed = needed[0]
-
-                            # Se já está segurando esse ingrediente (chopped)
-                            if (isinstance(state.held_item, Ingredient)
-                                    and state.held_item.state == 'CHOPPED'
-                                    and state.held_item.name == first_needed):
-                                return lambda s, p=pos, tc=(len(pot.ingredients) + 1): any(
-                                    st_pos == p and isinstance(st.content, Pot)
-                                    and len(st.content.ingredients) >= tc
-                                    for st_pos, st in s.stations_state
-                                )
-
-                            # Se está segurando RAW do ingrediente certo
-                            if (isinstance(state.held_item, Ingredient)
-                                    and state.held_item.state == 'RAW'
-                                    and state.held_item.name == first_needed):
-                                return lambda s: any(
-                                    isinstance(st.content, Ingredient) and st.content.state == 'CHOPPED'
-                                    and st.content.name == first_needed
-                                    for _, st in s.stations_state
-                                ) or (
-                                    isinstance(s.held_item, Ingredient)
-                                    and s.held_item.state == 'CHOPPED'
-                                    and s.held_item.name == first_needed
-                                )
-
-                            # Nada na mão: buscar ingrediente
-                            if state.held_item is None:
-                                return lambda s, ing=first_needed: (
-                                    isinstance(s.held_item, Ingredient)
-                                    and s.held_item.name == ing
-                                )
-
-                    # Panela pronta --> precisa de prato para servir
-                    if pot.state == 'READY':
-                        if isinstance(state.held_item, Plate) and state.held_item.state == 'CLEAN':
-                            return lambda s: isinstance(s.held_item, Plate) and s.held_item.state == 'WITH_FOOD'
-                        if state.held_item is None:
-                            return lambda s: isinstance(s.held_item, Plate) and s.held_item.state == 'CLEAN'
+        # Prato sujo na mão --> pia
+        if subgoals.is_dirty_plate(held) and index.sinks:
+            return Subgoal("place_dirty", lambda s: s.held_item is None, subgoals.place_h(held, ('W',)),
+                           subgoals.projection("place_dirty", state, subgoals.stations_at(state, index.sinks)))
 
         # 4. Se segurando RAW --> levar para tábua de corte
         if isinstance(state.held_item, Ingredient) and state.held_item.state == 'RAW':
-            return lambda s: any(
+            return Subgoal("place_raw", lambda s: any(
                 st.content == state.held_item for _, st in s.stations_state
-            )
+            ), subgoals.place_h(state.held_item, ('T', 'B')), subgoals.projection(
+                "place_raw", state, subgoals.stations_at(state, index.positions('T', 'B'))
+            ))
 
         # 5. Se segurando CHOPPED --> levar para fogão (ou panela coberta acima)
         if isinstance(state.held_item, Ingredient) and state.held_item.state == 'CHOPPED':
-            return lambda s: any(
+            if index.pots:
+                # Receitas de panela: nenhuma panela precisa dele agora, então só libera as mãos
+                # (num balcão livre: largado sobre um prato limpo, estragaria o prato)
+                plated = self._plated_count(state)
+                return Subgoal("stash_item", lambda s: s.held_item is None and self._plated_count(s) == plated,
+                               subgoals.discard_h, subgoals.projection("stash_item", state, state.grid_objects))
+            return Subgoal("place_chopped", lambda s: any(
                 st.content == state.held_item for _, st in s.stations_state
-            )
+            ), subgoals.place_h(state.held_item, ('S', 'T', 'B')), subgoals.projection(
+                "place_chopped", state, subgoals.stations_at(state, index.positions('S', 'T', 'B'))
+            ))
 
         # 6. Prato limpo na mão + comida pronta --> pegar comida
         if isinstance(state.held_item, Plate) and state.held_item.state == 'CLEAN':
@@ -140,11 +262,25 @@ class KitchenAgent(Agent):
                 s.content and isinstance(s.content, Ingredient) and s.content.state == 'COOKED'
                 for _, s in state.stations_state
             ):
-                return lambda s: isinstance(s.held_item, Plate) and s.held_item.state == 'WITH_FOOD'
+                return self._serve_subgoal(state)
 
-        # 7. Prato WITH_FOOD --> entregar
+        # 7. Prato WITH_FOOD --> entregar (ou jogar fora, se o pedido dele expirou)
         if isinstance(state.held_item, Plate) and state.held_item.state == 'WITH_FOOD':
-            return lambda s: len(s.active_orders) < len(state.active_orders)
+            if deliverable_order(state.held_item, state.active_orders) is None:
+                return Subgoal(
+                    "scrape_plate",
+                    lambda s: not (isinstance(s.held_item, Plate) and s.held_item.state == 'WITH_FOOD'),
+                    subgoals.scrape_h,
+                )
+            return Subgoal(
+                "deliver",
+                lambda s: len(s.active_orders) < len(state.active_orders),
+                subgoals.deliver_h(len(state.active_orders)),
+                # Sem os pedidos na chave: o caminho até a entrega não depende deles, e o prato
+                # (na chave) só chega aqui se algum pedido ativo o aceita (`deliverable_order`),
+                # o que basta para o Deliver; a validação do plano no cache confere o resto
+                subgoals.projection("deliver", state),
+            )
 
         # 8. Sem nada na mão
         if state.held_item is None:
@@ -158,46 +294,341 @@ class KitchenAgent(Agent):
                     isinstance(obj, Plate) and obj.state == 'CLEAN' for _, obj in state.grid_objects
                 )
                 if plate_exists:
-                    return lambda s: isinstance(s.held_item, Plate) and s.held_item.state == 'CLEAN'
+                    return self._fetch_plate_subgoal(state)
 
-            # Nada em processamento --> pegar primeiro ingrediente da receita
+            # Nada em processamento --> pegar primeiro ingrediente da receita (receitas de fogão;
+            # as de panela são tratadas acima)
             nothing_in_progress = not any(
                 s.content for pos, s in state.stations_state
                 if state.get_layout_at(pos[0], pos[1]) not in ('K',)
             )
-            if nothing_in_progress and state.active_orders:
-                order = state.active_orders[0]
+            if nothing_in_progress and state.active_orders and not index.pots:
+                order = order_priority(state.active_orders)[0]
                 needed = pot_required_ingredients(order)
                 if needed:
                     first_ing = needed[0]
-                    return lambda s, ing=first_ing: (
-                        isinstance(s.held_item, Ingredient) and s.held_item.name == ing
-                    )
+                    return self._fetch_ingredient_subgoal(state, first_ing)
+
+            # Panela cozinhando e nada mais a adiantar --> já buscar o prato para servir
+            if any(pot.state == 'COOKING' for _, pot, _ in pots):
+                plate = self._plate_subgoal(state)
+                if plate:
+                    return plate
 
+        # 9. Só resta esperar uma estação (fogão, pia ou panela)
+        if waiting:
+            return waiting[0]
+
+        return None
+
+    @staticmethod
+    def _scheduled_pots(state):
+        """(posição, panela, pedido) das panelas com pedido atribuído, por prioridade do pedido."""
+        assignments = pot_assignments(state)
+        priority = {id(order): i for i, order in enumerate(order_priority(state.active_orders))}
+        pots = [
+            (pos, state.stations_state.get(pos).content, order) for pos, order in assignments.items()
+        ]
+        pots.sort(key=lambda entry: priority[id(entry[2])])
+        return pots
+
+    @staticmethod
+    def _plate_available(state):
+        """Há prato limpo num balcão ou prato numa pia (limpo ou lavando)?"""
+        if any(subgoals.is_clean_plate(obj) for _, obj in state.grid_objects):
+            return True
+        return any(
+            isinstance(state.stations_state.get(pos).content, Plate) for pos in state.layout_index.sinks
+        )
+
+    @staticmethod
+    def _plate_subgoal(state):
+        """Pegar um prato limpo ou, sem nenhum disponível, um sujo para lavar (None se não houver)."""
+        if KitchenAgent._plate_available(state):
+            return KitchenAgent._fetch_plate_subgoal(state)
+        if KitchenAgent._plated_count(state):
+            # Prato com comida num balcão: entregar ou raspar na lixeira (passo 7)
+            return Subgoal(
+                "fetch_plated",
+                lambda s: subgoals.is_plated(s.held_item),
+                subgoals.fetch_h(subgoals.is_plated),
+                subgoals.projection("fetch_plated", state, subgoals.matching_items(state, subgoals.is_plated)),
+            )
+        if state.layout_index.sinks and any(subgoals.is_dirty_plate(obj) for _, obj in state.grid_objects):
+            return Subgoal(
+                "fetch_dirty_plate",
+                lambda s: subgoals.is_dirty_plate(s.held_item),
+                subgoals.fetch_h(subgoals.is_dirty_plate),
+                subgoals.projection(
+                    "fetch_dirty_plate", state, subgoals.matching_items(state, subgoals.is_dirty_plate)
+                ),
+            )
         return None
 
+    @staticmethod
+    def _plated_count(state):
+        return sum(1 for _, obj in state.grid_objects if subgoals.is_plated(obj))
+
+    @staticmethod
+    def _chopped(ing):
+        return lambda item: isinstance(item, Ingredient) and item.state == 'CHOPPED' and item.name == ing
+
+    @staticmethod
+    def _fetch_ingredient_subgoal(state, ing, chopped=False):
+        """Pegar um ingrediente `ing` (de uma fonte, balcão ou estação); com `chopped`, só um já cortado."""
+        if chopped:
+            wanted, sources = KitchenAgent._chopped(ing), ()
+        else:
+            def wanted(item):
+                return isinstance(item, Ingredient) and item.name == ing
+            sources = state.layout_index.sources.get(ing, ())
+        return Subgoal(
+            "fetch_chopped" if chopped else "fetch_ingredient",
+            lambda s: s.held_item is not None and wanted(s.held_item),
+            subgoals.fetch_h(wanted, sources),
+            subgoals.projection(
+                "fetch_chopped" if chopped else "fetch_ingredient", state, ing, subgoals.matching_items(state, wanted)
+            ),
+        )
+
+    @staticmethod
+    def _fetch_plate_subgoal(state):
+        """Pegar um prato limpo (de um balcão ou de uma pia)."""
+        sinks = state.layout_index.sinks
+        return Subgoal(
+            "fetch_plate",
+            lambda s: isinstance(s.held_item, Plate) and s.held_item.state == 'CLEAN',
+            subgoals.fetch_h(subgoals.is_clean_plate, sinks),
+            subgoals.projection(
+                "fetch_plate", state,
+                subgoals.matching_items(state, subgoals.is_clean_plate), subgoals.stations_at(state, sinks),
+            ),
+        )
+
+    @staticmethod
+    def _serve_subgoal(state):
+        """Colocar comida no prato limpo que está na mão."""
+        return Subgoal(
+            "serve",
+            # O prato tem de virar um prato entregável: comida que nenhum pedido aceita não conta
+            lambda s: isinstance(s.held_item, Plate) and s.held_item.state == 'WITH_FOOD'
+            and deliverable_order(s.held_item, s.active_orders) is not None,
+            subgoals.plate_food_h,
+            # Qualquer fonte de comida serve: a chave inclui todos os balcões e estações
+            subgoals.projection("serve", state, state.grid_objects, state.stations_state),
+        )
+
+    def _cached_plan(self, subgoal, problem):
+        """Plano guardado para o sub-objetivo, se houver um válido no estado atual."""
+        if subgoal.key is None or self.plan_cache is None:
+            return None
+        if problem.macro_actions or problem.time_skip:
+            # Os planos guardados já estão expandidos em ações primitivas
+            problem = KitchenProblem(problem.initial, goal_test_fn=problem.goal_test_fn)
+        return self.plan_cache.lookup(subgoal.key, problem, subgoal.test)
+
+    def _solution(self, node):
+        """Ações primitivas do nó-objetivo (`GoTo` viram `Move`s e `WaitUntil` viram `Wait`s)."""
+        if not (self.macro_actions or self.time_skip):
+            return node.solution()
+        return expand_macros(node.solution(), node.path()[0].state)
+
+    def _store_plan(self, key, node):
+        if node is not None and key is not None and self.plan_cache is not None:
+            self.plan_cache.store(key, self._solution(node))
+
+    def _search(self, problem, h, max_expansions, stats, key=None):
+        """Busca um plano para `problem` e devolve o nó-objetivo (ou None).
+
+        Com `tick_budget_ms`, roda o ARA* só dentro do orçamento do passo; se ele ainda
+        não provou o plano ótimo, fica em `self.planner` e continua nos passos seguintes.
+        Do ARA* só vão para o cache planos provados ótimos (`planner.optimal`): parado
+        por `max_expansions`, ele devolve o melhor plano até ali, que pode não ser.
+        """
+        if self.tick_budget_ms is None and self.algorithm != "ara_star":
+            search = SEARCH_ALGORITHMS[self.algorithm]
+            node = search(problem, h, max_expansions=max_expansions, stats=stats, **self.search_options)
+            self._store_plan(key, node)
+            return node
+
+        if self.tick_budget_ms is None:
+            options = dict(self.search_options)
+            max_time_s = options.pop("max_time_s", ARA_STAR_MAX_TIME_S)
+            planner = ARAStar(problem, h, max_expansions=max_expansions, **options)
+            node = planner.step(max_time_s, stats)
+            if planner.optimal:
+                self._store_plan(key, node)
+            return node
+
+        planner = ARAStar(problem, h, max_expansions=max_expansions, **self.search_options)
+        node = planner.step(self.tick_budget_ms / 1000, stats)
+        self._plan_goal = node
+        if planner.done:
+            if planner.optimal:
+                self._store_plan(key, node)
+        else:
+            self.planner = planner
+            self._planner_key = key
+        return node
+
+    def _improve_plan(self, state):
+        """Continua o ARA* em andamento e troca o plano se o novo for mais barato a partir de `state`.
+
+        O plano novo parte do estado inicial da busca; ele só é adotado se passar pelo
+        estado atual (o ambiente é determinístico, então o plano antigo chegou nele). Sem
+        plano antigo, o estado inicial da busca é o atual (`_decide` recomeça a busca se o
+        ambiente mudou enquanto ela não tinha plano).
+        """
+        planner = self.planner
+        stats = SearchStats(profile=self.profile, on_progress=self.on_progress)
+        node = planner.step(self.tick_budget_ms / 1000, stats)
+        self.total_stats.merge(stats)
+        self.debug_info["search_stats"] = stats
+        self.debug_info["plan_bound"] = planner.weight
+        if planner.done:
+            self.planner = None
+            if planner.optimal:
+                self._store_plan(self._planner_key, node)
+        if node is None or node is self._plan_goal:
+            return
+
+        if self._plan_goal is None:
+            # Primeiro plano: o agente continua no estado inicial da busca (conferido em `_decide`)
+            self.plan = node.solution()
+            self._plan_goal = node
+            self._track_plan(state, planner.problem.goal_test_fn)
+            self.debug_info["plan_found"] = True
+            self.debug_info["plan_length"] = len(self.plan)
+            return
+
+        old_path = self._plan_goal.path()
+        current = old_path[len(old_path) - 1 - len(self.plan)]
+        remaining = self._plan_goal.path_cost - current.path_cost
+        new_path = node.path()
+        for i, step_node in enumerate(new_path):
+            if step_node.state == state:
+                if node.path_cost - step_node.path_cost < remaining - 1e-9:
+                    self.plan = [n.action for n in new_path[i + 1:]]
+                    self._plan_goal = node
+                    self.debug_info["plan_improved"] = True
+                    print(f"[Agente] Plano melhorado: {len(self.plan)} ações restantes (w={planner.weight:g}).")
+                break
+
+    def _track_plan(self, state, goal_test_fn):
+        """Passa a acompanhar um plano novo, que parte de `state`."""
+        self._plan_problem = KitchenProblem(state, goal_test_fn=goal_test_fn)
+        self._expected = state
+
+    def _movement_planner(self, index, anchor):
+        planner = self._movement.get((index, anchor))
+        if planner is None:
+            planner = self._movement[(index, anchor)] = DStarLite(index, anchor)
+        return planner
+
+    def _repair_plan(self, state):
+        """O estado observado divergiu do previsto pelo plano.
+
+        Se o resto do plano continua aplicável e atinge o objetivo, segue como está.
+        Senão, refaz com D* Lite só os `Move`s até a próxima interação, a partir da
+        posição atual; se nem assim o plano for válido, ele é descartado e o
+        sub-objetivo é buscado de novo.
+        """
+        problem = KitchenProblem(state, goal_test_fn=self._plan_problem.goal_test_fn)
+        # Um ARA* em andamento parte de um estado que não é mais o do agente
+        self.planner = None
+        self._plan_goal = None
+
+        if validate_plan(problem, self.plan, problem.goal_test):
+            outcome = "still_valid"
+        else:
+            anchor_index, anchor = next_interaction(self.plan, self._expected.agent_pos)
+            movement = self._movement_planner(state.layout_index, anchor)
+            repaired = repair_movement(self.plan, state.agent_pos, anchor_index, movement)
+            if repaired is not None and validate_plan(problem, repaired, problem.goal_test):
+                self.plan = repaired
+                outcome = "movement"
+            else:
+                self.plan = []
+                outcome = "replan"
+        print(f"[Agente] Estado divergiu do plano (passo={state.time}): {outcome}.")
+        self._plan_problem = problem
+        self._expected = state
+        self.repairs[outcome] += 1
+        self.debug_info["plan_repair"] = outcome
+
     def __call__(self, percept):
-        """Decide a próxima ação com base na percepção (estado atual)."""
-        state = percept
+        """Decide a próxima ação com base na percepção (estado atual) e registra a latência."""
+        start = time.perf_counter()
+        try:
+            return self._decide(percept)
+        finally:
+            latency_ms = (time.perf_counter() - start) * 1000
+            self.latency.record(latency_ms)
+            self.debug_info["latency_ms"] = latency_ms
+
+    def _decide(self, state):
         self.debug_info = {"step": state.time, "plan_found": False}
 
-        if not self.plan:
-            subgoal_fn = self.get_subgoal_test(state)
+        # Validação após cada execute_action: o ambiente chegou onde o plano previa?
+        if self.plan and self._expected is not None and state != self._expected:
+            self._repair_plan(state)
+
+        if self.planner is not None and self._plan_goal is None and self.planner.problem.initial != state:
+            # Ainda sem plano e o ambiente mudou desde a raiz do ARA* (relógios, pedidos que
+            # chegaram ou expiraram): a busca e o seu objetivo podem estar velhos; recomeça de `state`
+            self.planner = None
+            self.debug_info["planner_restarted"] = True
+
+        if self.planner is not None:
+            self._improve_plan(state)
+            if not self.plan:
+                # ARA* ainda sem plano (continua no próximo passo) ou esgotado sem solução
+                self.debug_info["planning"] = self.planner is not None
+                return None
 
-            if subgoal_fn:
-                print(f"[Agente] Buscando plano para sub-objetivo (passo={state.time})...")
-                problem = KitchenProblem(state, goal_test_fn=subgoal_fn)
-                solution_node = astar_search_with_limit(problem, lambda n: 0, max_expansions=100000)
+        if not self.plan:
+            stats = SearchStats(profile=self.profile, on_progress=self.on_progress)
+            self.debug_info["search_stats"] = stats
+            subgoal = self.get_subgoal_test(state)
+            plan = None
+
+            if subgoal:
+                self.debug_info["subgoal"] = subgoal.name
+                problem = KitchenProblem(state, goal_test_fn=subgoal.test, on_transition=self.on_transition,
+                                         macro_actions=self.macro_actions, time_skip=self.time_skip)
+                plan = self._cached_plan(subgoal, problem)
+                if plan is not None:
+                    self.debug_info["plan_cache_hit"] = True
+                    print(f"[Agente] Plano do cache para sub-objetivo '{subgoal.name}' (passo={state.time}).")
+                else:
+                    print(f"[Agente] Buscando plano para sub-objetivo '{subgoal.name}' (passo={state.time})...")
+                    h = subgoal.h if self.subgoal_heuristics else subgoals.zero_heuristic
+                    solution_node = self._search(problem, h, 100000, stats, subgoal.key)
+                    if solution_node:
+                        plan = self._solution(solution_node)
             else:
                 print(f"[Agente] Buscando plano para objetivo completo (passo={state.time})...")
-                problem = KitchenProblem(state)
-                solution_node = astar_search_with_limit(problem, self.heuristic, max_expansions=200000)
-
-            if solution_node:
-                self.plan = solution_node.solution()
+                problem = KitchenProblem(state, on_transition=self.on_transition,
+                                         macro_actions=self.macro_actions, time_skip=self.time_skip)
+                solution_node = self._search(problem, self.heuristic, 200000, stats)
+                if solution_node:
+                    plan = self._solution(solution_node)
+            self.total_stats.merge(stats)
+            if self.profile:
+                print(f"[Agente] Busca: {stats.summary()}")
+            if self.plan_cache is not None:
+                self.debug_info["plan_cache"] = self.plan_cache.as_dict()
+
+            if plan is not None:
+                self.plan = list(plan)
+                self._track_plan(state, problem.goal_test_fn)
                 self.debug_info["plan_found"] = True
                 self.debug_info["plan_length"] = len(self.plan)
                 print(f"[Agente] Plano encontrado com {len(self.plan)} ações.")
+            elif self.planner is not None:
+                self.debug_info["planning"] = True
+                print(f"[Agente] Plano ainda em busca (orçamento de {self.tick_budget_ms:g}ms por passo).")
+                return None
             else:
                 self.debug_info["plan_found"] = False
                 print(f"[Agente] Nenhum plano encontrado.")
@@ -206,6 +637,11 @@ class KitchenAgent(Agent):
         if self.plan:
             action = self.plan.pop(0)
             self.debug_info["action"] = action
+            self._expected = self._plan_problem.result(state, action)
+            if not self.plan:
+                # Plano concluído: o ARA* que o melhorava não tem mais utilidade
+                self.planner = None
+                self._plan_goal = None
             return action
 
         return None
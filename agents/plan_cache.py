@@ -0,0 +1,85 @@
+"""
+Cache de planos dos sub-objetivos.
+
+A cozinha repete as mesmas situações ao longo do episódio (buscar cebola para a
+panela, levar o prato sujo à pia...), e cada uma delas é resolvida do zero pela
+busca. O `PlanCache` guarda o plano de cada sub-objetivo sob a chave do `Subgoal`
+(`Subgoal.key`): uma projeção canônica do estado que contém só o que determina o
+plano daquele sub-objetivo (posição do agente, item na mão, estações-alvo...).
+
+Como a projeção ignora o resto do estado, um plano guardado só é reaproveitado
+depois de validado no estado atual (`validate_plan`): cada ação precisa estar entre
+as ações aplicáveis e o estado final precisa satisfazer o teste do sub-objetivo.
+"""
+
+from collections import OrderedDict
+
+from models.actions import to_action
+
+
+def validate_plan(problem, plan, goal_test) -> bool:
+    """True se `plan` é aplicável a partir de `problem.initial` e termina em `goal_test`."""
+    state = problem.initial
+    for action in plan:
+        action = to_action(action)
+        if action not in problem.actions(state):
+            return False
+        state = problem.result(state, action)
+    return goal_test(state)
+
+
+class PlanCache:
+    """Dicionário LRU chave --> plano (tupla de ações), limitado a `max_size` entradas.
+
+    - hits:          planos reaproveitados
+    - misses:        chaves sem plano guardado
+    - invalidations: planos encontrados pela chave mas inválidos no estado atual
+                     (contados também como miss)
+    """
+
+    def __init__(self, max_size=256):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def lookup(self, key, problem, goal_test):
+        """Plano guardado para `key` e válido em `problem`, ou None."""
+        plan = self.entries.get(key)
+        if plan is None:
+            self.misses += 1
+            return None
+        if not validate_plan(problem, plan, goal_test):
+            self.invalidations += 1
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return plan
+
+    def store(self, key, plan):
+        """Guarda `plan` sob `key`, descartando a entrada usada há mais tempo se necessário."""
+        if self.max_size <= 0:
+            return
+        self.entries[key] = tuple(plan)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def as_dict(self) -> dict:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "invalidations": self.invalidations,
+            "hit_rate": self.hit_rate,
+            "size": len(self.entries),
+        }
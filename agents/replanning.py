@@ -0,0 +1,164 @@
+"""
+Reparo incremental de planos.
+
+O ambiente tem dinâmica própria (fogões queimam, pias terminam de lavar, pedidos
+mudam), então o estado observado pode divergir do previsto pelo plano. Quando isso
+acontece e o resto do plano deixa de ser aplicável, o agente tenta primeiro reparar
+só a parte de movimento: os `Move`s até a próxima interação são refeitos a partir
+da posição atual com D* Lite, e as interações seguintes são mantidas. Só se o plano
+reparado também falhar é que o sub-objetivo é buscado de novo do zero.
+"""
+
+import heapq
+
+from models.actions import KitchenAction, MOVE
+
+INFINITY = float("inf")
+
+
+def _chebyshev(a, b):
+    """Distância na vizinhança-8 sem paredes (admissível e consistente para o D* Lite)."""
+    return max(abs(a[0] - b[0]), abs(a[1] - b[1]))
+
+
+class DStarLite:
+    """D* Lite (Koenig e Likhachev, 2002) no grafo de movimento de um layout.
+
+    Mantém os caminhos mínimos (em número de `Move`s) de cada tile caminhável até
+    `goal`, buscando do objetivo para o agente. Quando o agente se move, só a
+    constante `km` muda e a busca anterior é reaproveitada; quando tiles são
+    bloqueados ou liberados (`set_blocked`), só os vértices afetados são refeitos.
+    """
+
+    def __init__(self, index, goal, blocked=()):
+        self.index = index
+        self.goal = goal
+        self.blocked = frozenset(blocked)
+        self.g = {}
+        self.rhs = {goal: 0}
+        self.km = 0
+        self.start = None
+        self.last = None
+        self.heap = []
+        self.queued = {}     # vértice --> chave atual na fila (entradas diferentes são obsoletas)
+        self.expansions = 0
+
+    def _neighbors(self, pos):
+        return [(a.x, a.y) for a in self.index.move_actions(pos)]
+
+    def _cost(self, u, v):
+        return INFINITY if u in self.blocked or v in self.blocked else 1
+
+    def _key(self, s):
+        m = min(self.g.get(s, INFINITY), self.rhs.get(s, INFINITY))
+        return (m + _chebyshev(self.start, s) + self.km, m)
+
+    def _push(self, s):
+        key = self._key(s)
+        self.queued[s] = key
+        heapq.heappush(self.heap, (key, s))
+
+    def _top_key(self):
+        heap, queued = self.heap, self.queued
+        while heap and queued.get(heap[0][1]) != heap[0][0]:
+            heapq.heappop(heap)
+        return heap[0][0] if heap else (INFINITY, INFINITY)
+
+    def _update_vertex(self, u):
+        g, rhs = self.g, self.rhs
+        if u != self.goal:
+            rhs[u] = min((self._cost(u, v) + g.get(v, INFINITY) for v in self._neighbors(u)), default=INFINITY)
+        self.queued.pop(u, None)
+        if g.get(u, INFINITY) != rhs.get(u, INFINITY):
+            self._push(u)
+
+    def _compute_shortest_path(self):
+        g, rhs, start = self.g, self.rhs, self.start
+        while (self._top_key() < self._key(start)
+               or rhs.get(start, INFINITY) != g.get(start, INFINITY)):
+            k_old, u = heapq.heappop(self.heap)
+            del self.queued[u]
+            k_new = self._key(u)
+            if k_old < k_new:
+                self._push(u)
+                continue
+            self.expansions += 1
+            if g.get(u, INFINITY) > rhs.get(u, INFINITY):
+                g[u] = rhs[u]
+                for s in self._neighbors(u):
+                    self._update_vertex(s)
+            else:
+                g[u] = INFINITY
+                self._update_vertex(u)
+                for s in self._neighbors(u):
+                    self._update_vertex(s)
+
+    def _move_start(self, start):
+        if self.start is None:
+            self.start = self.last = start
+            self._push(self.goal)
+            return
+        # O agente andou: as chaves já na fila continuam limites inferiores graças a km
+        self.km += _chebyshev(self.last, start)
+        self.start = self.last = start
+
+    def set_blocked(self, blocked):
+        """Atualiza os tiles bloqueados; só os vértices vizinhos das mudanças são refeitos."""
+        blocked = frozenset(blocked)
+        changed = blocked ^ self.blocked
+        self.blocked = blocked
+        if self.start is None:
+            return
+        for cell in changed:
+            self._update_vertex(cell)
+            for s in self._neighbors(cell):
+                self._update_vertex(s)
+
+    def path(self, start):
+        """Posições de `start` até `goal` (inclusive), ou None se não houver caminho."""
+        self._move_start(start)
+        self._compute_shortest_path()
+        g = self.g
+        if g.get(start, INFINITY) == INFINITY:
+            return None
+        path = [start]
+        pos = start
+        while pos != self.goal:
+            best, best_cost = None, INFINITY
+            # Vizinhos na ordem de MOVE_OFFSETS: mesmo desempate de `KitchenProblem.actions()`
+            for v in self._neighbors(pos):
+                cost = self._cost(pos, v) + g.get(v, INFINITY)
+                if cost < best_cost:
+                    best, best_cost = v, cost
+            if best is None or best_cost == INFINITY:
+                return None
+            path.append(best)
+            pos = best
+        return path
+
+
+def next_interaction(plan, origin):
+    """(índice da primeira ação que não é `Move`, posição de onde ela é feita).
+
+    `origin` é a posição prevista do agente no início do plano; se o plano só tem
+    `Move`s, o índice é `len(plan)` e a posição é o destino do último.
+    """
+    pos = origin
+    for i, action in enumerate(plan):
+        if action.op != MOVE:
+            return i, pos
+        pos = (action.x, action.y)
+    return len(plan), pos
+
+
+def repair_movement(plan, agent_pos, anchor_index, planner):
+    """Troca os `Move`s antes de `plan[anchor_index]` por um caminho de `agent_pos` até
+    `planner.goal` (a posição de onde a próxima interação é feita).
+
+    Devolve o plano reparado (sem validá-lo) ou None se o objetivo não for alcançável.
+    """
+    path = planner.path(agent_pos)
+    if path is None:
+        return None
+    moves = [KitchenAction(MOVE, x, y) for x, y in path[1:]]
+    return moves + list(plan[anchor_index:])
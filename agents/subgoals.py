@@ -0,0 +1,280 @@
+"""
+Sub-objetivos do `KitchenAgent` e suas heurísticas.
+
+Cada sub-objetivo é um `Subgoal`: o teste de objetivo local usado pela busca, uma
+heurística admissível para ele, um nome curto (útil para depuração e comparação) e a
+chave do plano no `PlanCache` (`agents/plan_cache.py`), montada com `projection`.
+As heurísticas usam a distância real de caminhada do `LayoutIndex` até o tile de onde
+se interage com o alvo, somada aos ticks de processamento que ainda faltam
+(corte, cozimento, lavagem). Todas valem 0 nos estados que satisfazem o teste.
+"""
+
+from typing import Callable, Hashable, NamedTuple
+
+from models.entities import Ingredient, Plate, Extinguisher, Pot
+from models.states import KitchenState
+from problems.kitchen_problem import (
+    CHOP_DURATION,
+    COOK_DURATION,
+    WASH_DURATION,
+    POT_COOK_DURATION,
+)
+
+
+class Subgoal(NamedTuple):
+    name: str
+    test: Callable[[KitchenState], bool]
+    h: Callable   # h(node) -> float, admissível para `test`
+    key: Hashable = None   # projeção do estado que determina o plano (None = não cachear)
+
+
+def zero_heuristic(node) -> float:
+    """Heurística nula (A* vira Busca de Custo Uniforme)."""
+    return 0
+
+
+def projection(name, state, *relevant):
+    """Chave de cache: sub-objetivo, posição do agente, item na mão e as partes relevantes.
+
+    Inclui o layout, para que o mesmo agente possa ser usado em mapas diferentes.
+    """
+    return (name, state.layout, state.agent_pos, state.held_item) + relevant
+
+
+def stations_at(state, positions):
+    """Estados (conteúdo e progresso) das estações em `positions`."""
+    get = state.stations_state.get
+    return tuple(get(pos) for pos in positions)
+
+
+def matching_items(state, wanted):
+    """(posição, item) dos balcões e (posição, estação) das estações com item que satisfaz `wanted`."""
+    items = tuple(sorted((pos, obj) for pos, obj in state.grid_objects if wanted(obj)))
+    stations = tuple(sorted(
+        (pos, st) for pos, st in state.stations_state if st.content is not None and wanted(st.content)
+    ))
+    return items, stations
+
+
+def _reach(state, targets, extra=1):
+    """Distância até o alvo mais próximo + `extra` ações de interação."""
+    dist = state.layout_index.distance
+    agent = state.agent_pos
+    best = min((dist(agent, t) for t in targets), default=0)
+    return best + extra
+
+
+def _hands_busy(state, wanted) -> int:
+    """1 se é preciso largar o que está na mão antes de pegar outro item."""
+    return 0 if state.held_item is None or wanted(state.held_item) else 1
+
+
+def _item_positions(state, wanted):
+    """Posições (balcões e estações) cujo item satisfaz `wanted`."""
+    positions = [pos for pos, obj in state.grid_objects if wanted(obj)]
+    positions.extend(pos for pos, st in state.stations_state if st.content is not None and wanted(st.content))
+    return positions
+
+
+# Fogo
+
+def extinguish_h(node):
+    state = node.state
+    fires = [pos for pos, st in state.stations_state if st.is_on_fire]
+    if not fires:
+        return 0
+    # Cada foco exige uma ação Extinguish
+    return _reach(state, fires, extra=len(fires))
+
+
+# Buscar um item
+
+def fetch_h(wanted, static_targets=()):
+    """Heurística para "segurar um item que satisfaça `wanted`".
+
+    `static_targets` são posições fixas de onde o item também pode sair
+    (fontes infinitas, pias etc.).
+    """
+    def h(node):
+        state = node.state
+        if state.held_item is not None and wanted(state.held_item):
+            return 0
+        targets = _item_positions(state, wanted)
+        targets.extend(static_targets)
+        return _hands_busy(state, wanted) + _reach(state, targets)
+    return h
+
+
+def discard_h(node):
+    return 0 if node.state.held_item is None else 1
+
+
+def scrape_h(node):
+    """Jogar fora a comida do prato na mão (o prato volta limpo)."""
+    held = node.state.held_item
+    return 1 if isinstance(held, Plate) and held.state == 'WITH_FOOD' else 0
+
+
+# Progresso de estações
+
+def chop_at_h(pos):
+    """RAW na tábua `pos` --> CHOPPED: ir até a tábua + cortes restantes."""
+    def h(node):
+        state = node.state
+        st = state.stations_state.get(pos)
+        if st and isinstance(st.content, Ingredient) and st.content.state == 'RAW':
+            remaining = max(0, CHOP_DURATION - st.progress)
+            return state.layout_index.distance(state.agent_pos, pos) + remaining
+        return 0
+    return h
+
+
+def ticks_at_h(pos, duration, in_progress):
+    """Estações que avançam sozinhas: cada tick restante custa ao menos 1."""
+    def h(node):
+        st = node.state.stations_state.get(pos)
+        if st and in_progress(st.content):
+            return max(0, duration - st.progress)
+        return 0
+    return h
+
+
+def cook_at_h(pos):
+    return ticks_at_h(
+        pos, COOK_DURATION,
+        lambda c: isinstance(c, Ingredient) and c.state == 'CHOPPED',
+    )
+
+
+def wash_at_h(pos):
+    return ticks_at_h(
+        pos, WASH_DURATION,
+        lambda c: isinstance(c, Plate) and c.state == 'DIRTY',
+    )
+
+
+def pot_cook_at_h(pos):
+    return ticks_at_h(
+        pos, POT_COOK_DURATION,
+        lambda c: isinstance(c, Pot) and c.state == 'COOKING',
+    )
+
+
+# Panela
+
+def fill_pot_h(pos, target_count):
+    """Colocar ingrediente na panela `pos`: ir até ela + PutInPot."""
+    def h(node):
+        state = node.state
+        st = state.stations_state.get(pos)
+        if st and isinstance(st.content, Pot) and len(st.content.ingredients) >= target_count:
+            return 0
+        return _reach(state, (pos,))
+    return h
+
+
+def empty_pot_h(pos):
+    """Esvaziar a panela `pos` com o prato na mão: ir até ela + ServeFromPot."""
+    def h(node):
+        state = node.state
+        st = state.stations_state.get(pos)
+        if st and isinstance(st.content, Pot) and not st.content.ingredients:
+            return 0
+        return _reach(state, (pos,))
+    return h
+
+
+def chop_ingredient_h(name):
+    """Obter `name` CHOPPED: cortá-lo numa tábua (T/B) ou pegar um já cortado.
+
+    Um CHOPPED que já está num balcão ou estação custa largar o que está na mão (se
+    for o caso), ir até ele e pegá-lo; o mínimo com o corte mantém a admissibilidade.
+    """
+    def is_chopped(item):
+        return isinstance(item, Ingredient) and item.state == 'CHOPPED' and item.name == name
+
+    def h(node):
+        state = node.state
+        if is_chopped(state.held_item):
+            return 0
+        dist = state.layout_index.distance
+        costs = []
+        chopped = _item_positions(state, is_chopped)
+        if chopped:
+            costs.append(_hands_busy(state, is_chopped) + _reach(state, chopped))
+        for board in state.layout_index.boards:
+            st = state.stations_state.get(board)
+            content = st.content if st else None
+            if isinstance(content, Ingredient) and content.state == 'RAW' and content.name == name:
+                remaining = max(0, CHOP_DURATION - st.progress)
+            else:
+                # Largar o RAW na tábua + todos os cortes
+                remaining = 1 + CHOP_DURATION
+            costs.append(dist(state.agent_pos, board) + remaining)
+        return min(costs, default=1)
+    return h
+
+
+# Prato
+
+def plate_food_h(node):
+    """Prato WITH_FOOD na mão.
+
+    Toda forma de pôr comida no prato termina numa panela, fogão, tábua, fonte
+    ou num ingrediente/prato já sobre um balcão, seguido de ao menos uma ação.
+    """
+    state = node.state
+    held = state.held_item
+    if isinstance(held, Plate) and held.state == 'WITH_FOOD':
+        return 0
+    index = state.layout_index
+    targets = list(index.pots) + list(index.stoves) + list(index.boards)
+    for positions in index.sources.values():
+        targets.extend(positions)
+    targets.extend(
+        pos for pos, obj in state.grid_objects
+        if isinstance(obj, Ingredient) or (isinstance(obj, Plate) and obj.state == 'WITH_FOOD')
+    )
+    return _reach(state, targets)
+
+
+# Levar o item segurado até uma estação
+
+def place_h(item, tiles):
+    """Alguma estação passar a conter `item` (largado em uma de `tiles`)."""
+    def h(node):
+        state = node.state
+        if any(st.content == item for _, st in state.stations_state):
+            return 0
+        return _reach(state, state.layout_index.positions(*tiles))
+    return h
+
+
+def deliver_h(order_count):
+    """Entregar o prato: ir até uma entrega (D) + Deliver."""
+    def h(node):
+        state = node.state
+        if len(state.active_orders) < order_count:
+            return 0
+        return _reach(state, state.layout_index.deliveries)
+    return h
+
+
+def is_extinguisher(item) -> bool:
+    return isinstance(item, Extinguisher)
+
+
+def is_burnt(item) -> bool:
+    return isinstance(item, Ingredient) and item.state == 'BURNT'
+
+
+def is_clean_plate(item) -> bool:
+    return isinstance(item, Plate) and item.state == 'CLEAN'
+
+
+def is_dirty_plate(item) -> bool:
+    return isinstance(item, Plate) and item.state == 'DIRTY'
+
+
+def is_plated(item) -> bool:
+    return isinstance(item, Plate) and item.state == 'WITH_FOOD'
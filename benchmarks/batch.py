@@ -0,0 +1,214 @@
+"""
+Execução em lote de episódios em paralelo.
+
+Roda o episódio do agente (como no `main.py --auto`, sem renderização) para cada
+combinação de layout x algoritmo x heurística x limite de passos, distribuindo os
+casos por um pool de processos. Cada caso devolve um registro compacto (pontuação,
+estrelas, passos, tempo de planejamento, expansões, latência por passo), gravado em JSONL assim que
+termina — o arquivo pode ser acompanhado (`tail -f`) e um lote interrompido mantém
+os casos já concluídos.
+
+Os casos são independentes e o processo principal só grava registros, então o lote
+escala com o número de núcleos. Cada worker carrega um layout uma única vez
+(`load_kitchen_data` + estado inicial ficam em cache no processo) e o reaproveita
+em todos os casos daquele layout que receber.
+
+Heurísticas:
+    - subgoal: heurística de cada sub-objetivo + `KitchenProblem.h` no objetivo completo
+    - zero:    `zero_heuristic` em todas as buscas (Busca de Custo Uniforme)
+
+Uso:
+    python -m benchmarks.batch                                  # todos os layouts, astar, max_steps
+    python -m benchmarks.batch --algorithms astar,ida_star --heuristics subgoal,zero \\
+        --steps 100,max --jobs 8 --output out/batch.jsonl
+"""
+
+import argparse
+import functools
+import glob
+import itertools
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import NamedTuple, Optional
+
+from agents.algorithms.search import SEARCH_ALGORITHMS
+from agents.kitchen_agent import KitchenAgent
+from agents.subgoals import zero_heuristic
+from benchmarks.bench import search_options
+from benchmarks.episode import play_episode
+from problems.kitchen_problem import KitchenProblem
+from utils import load_kitchen_data, create_initial_state
+
+
+HEURISTICS = ("subgoal", "zero")
+
+FIELDS = (
+    "layout",
+    "algorithm",
+    "heuristic",
+    "step_budget",
+    "score",
+    "max_score",
+    "stars",
+    "steps",
+    "orders_delivered",
+    "stalled",
+    "planning_time_s",
+    "expansions",
+    "wall_time_s",
+    "latency_p95_ms",
+    "latency_max_ms",
+)
+
+
+class BatchCase(NamedTuple):
+    layout_path: str
+    algorithm: str
+    heuristic: str
+    step_budget: Optional[int] = None   # None = max_steps do layout
+
+
+@functools.lru_cache(maxsize=None)
+def _load_layout(layout_path):
+    """Estado inicial e max_steps do layout (uma leitura por layout em cada worker)."""
+    layout, orders, max_steps = load_kitchen_data(layout_path)
+    return create_initial_state(layout, orders), max_steps
+
+
+def run_case(case: BatchCase, options=None) -> dict:
+    """Executa um episódio e devolve o registro compacto do caso."""
+    state, layout_max_steps = _load_layout(case.layout_path)
+    if case.heuristic == "zero":
+        agent = KitchenAgent(
+            heuristic=zero_heuristic, algorithm=case.algorithm, search_options=options, subgoal_heuristics=False
+        )
+    else:
+        agent = KitchenAgent(heuristic=KitchenProblem(state).h, algorithm=case.algorithm, search_options=options)
+
+    budget = case.step_budget or layout_max_steps
+    episode = play_episode(state, agent, budget)
+    env = episode.env
+    return {
+        "layout": os.path.basename(case.layout_path),
+        "algorithm": case.algorithm,
+        "heuristic": case.heuristic,
+        "step_budget": budget,
+        "score": env.score(),
+        "max_score": env.max_score,
+        "stars": env.stars(),
+        "steps": episode.steps,
+        "orders_delivered": len(env.state.delivered_orders),
+        "stalled": episode.stalled,
+        "planning_time_s": round(agent.total_stats.elapsed_s, 4),
+        "expansions": agent.total_stats.expanded,
+        "wall_time_s": round(episode.wall_time_s, 4),
+        "latency_p95_ms": round(agent.latency.percentile(0.95), 3),
+        "latency_max_ms": round(agent.latency.max_ms, 3),
+    }
+
+
+def build_cases(layouts, algorithms, heuristics=("subgoal",), step_budgets=(None,)):
+    """Produto cartesiano dos parâmetros, agrupado por layout."""
+    return [
+        BatchCase(*combo) for combo in itertools.product(layouts, algorithms, heuristics, step_budgets)
+    ]
+
+
+def run_batch(cases, output, jobs=None, options_for=search_options, on_record=None):
+    """Roda `cases` em `jobs` processos, gravando cada registro em `output` (JSONL).
+
+    `options_for(algorithm)` dá os argumentos extras da busca de cada algoritmo.
+    `on_record(record)` é chamado a cada caso concluído (na ordem de término).
+    Retorna a lista de registros, também na ordem de término.
+    """
+    directory = os.path.dirname(output)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    records = []
+    with open(output, "w", encoding="utf-8") as f, ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(run_case, case, options_for(case.algorithm)) for case in cases]
+        for future in as_completed(futures):
+            record = future.result()
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            f.flush()
+            records.append(record)
+            if on_record:
+                on_record(record)
+    return records
+
+
+def read_records(path):
+    """Lê um arquivo JSONL gerado por `run_batch`."""
+    with open(path, "r", encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _parse_steps(text):
+    budgets = []
+    for item in text.split(","):
+        item = item.strip()
+        if item:
+            budgets.append(None if item == "max" else int(item))
+    return budgets
+
+
+def _format_row(row):
+    return (
+        f"{row['layout']:<18} {row['algorithm']:<15} {row['heuristic']:<8} {row['step_budget']:>5} "
+        f"{row['score']:>4}/{row['max_score']:<4} {'*' * row['stars']:<3} {row['steps']:>5} "
+        f"{row['expansions']:>9} {row['planning_time_s']:>8.2f}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Episódios em lote, em paralelo")
+    parser.add_argument("layouts", nargs="*", help="Arquivos de layout (padrão: layouts/overcooked*.json)")
+    parser.add_argument(
+        "--algorithms", default="astar", help=f"Lista separada por vírgulas ({','.join(SEARCH_ALGORITHMS)})"
+    )
+    parser.add_argument(
+        "--heuristics", default="subgoal", help=f"Lista separada por vírgulas ({','.join(HEURISTICS)})"
+    )
+    parser.add_argument(
+        "--steps", default="max", help="Limites de passos separados por vírgulas; `max` = max_steps do layout"
+    )
+    parser.add_argument("--jobs", type=int, default=None, help="Processos do pool (padrão: número de núcleos)")
+    parser.add_argument("--weight", type=float, default=1.5, help="Peso do Weighted A*")
+    parser.add_argument("--table-size", type=int, default=100000, help="Tabela de transposição do IDA*")
+    parser.add_argument("--output", default="out/batch.jsonl", help="Registros JSONL (padrão: out/batch.jsonl)")
+    args = parser.parse_args(argv)
+
+    layouts = args.layouts or sorted(glob.glob("layouts/overcooked*.json"))
+    algorithms = [a.strip() for a in args.algorithms.split(",") if a.strip()]
+    heuristics = [h.strip() for h in args.heuristics.split(",") if h.strip()]
+    for algorithm in algorithms:
+        if algorithm not in SEARCH_ALGORITHMS:
+            parser.error(f"algoritmo desconhecido: {algorithm}")
+    for heuristic in heuristics:
+        if heuristic not in HEURISTICS:
+            parser.error(f"heurística desconhecida: {heuristic}")
+    try:
+        budgets = _parse_steps(args.steps)
+    except ValueError:
+        parser.error(f"--steps inválido: {args.steps}")
+
+    cases = build_cases(layouts, algorithms, heuristics, budgets)
+    options_for = functools.partial(search_options, weight=args.weight, table_size=args.table_size)
+
+    print(
+        f"{'layout':<18} {'algoritmo':<15} {'heur.':<8} {'limite':>5} {'pontos':>9} {'est':<3} "
+        f"{'passo':>5} {'expand.':>9} {'plan(s)':>8}"
+    )
+    start = time.perf_counter()
+    records = run_batch(
+        cases, args.output, args.jobs, options_for, lambda row: print(_format_row(row), flush=True)
+    )
+    elapsed = time.perf_counter() - start
+    print(f"\n[Lote] {len(records)} casos em {elapsed:.1f}s; registros em {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""
+Benchmark dos algoritmos de busca e do episódio completo do agente.
+
+Para cada layout roda, em um processo novo por caso (para isolar o pico de memória):
+    - astar:          astar_search_with_limit no objetivo completo com `KitchenProblem.h`
+    - weighted_astar: weighted_astar_search com o mesmo problema e limites
+    - greedy:         greedy_best_first_search com o mesmo problema e limites
+    - ida_star:       ida_star_search (memória limitada, tabela de transposição de `--table-size`)
+    - rbfs:           rbfs_search (memória linear na profundidade)
+    - ara_star:       ara_star_search (anytime; devolve o melhor plano dentro dos limites)
+    - episode:        o laço KitchenEnvironment + KitchenAgent, como no `main.py --auto`
+                      (com o algoritmo de `--episode-algorithm`)
+
+Cada caso gera um registro com nós expandidos/gerados, pico da fronteira, pico de RSS,
+tempo de parede, tamanho do plano e pedidos entregues. O relatório é salvo em JSON
+(e opcionalmente CSV). Com `--macro-actions`, as buscas e o agente usam o modo
+hierárquico do `KitchenProblem` (`GoTo` até as estações; `plano` conta as macro-ações
+nas buscas); com `--time-skip`, as esperas viram `WaitUntil` (salto até o próximo evento
+de relógio). Com `--baseline`, os resultados são comparados a um relatório
+salvo anteriormente e as regressões são listadas (código de saída 1).
+
+Uso:
+    python -m benchmarks.bench                          # todos os layouts/algoritmos
+    python -m benchmarks.bench layouts/overcooked1.json --algorithms astar,episode
+    python -m benchmarks.bench --baseline out/bench_baseline.json
+"""
+
+import argparse
+import csv
+import glob
+import json
+import os
+import platform
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+import multiprocessing
+
+from agents.algorithms.search import SEARCH_ALGORITHMS
+from agents.algorithms.stats import SearchStats
+from agents.kitchen_agent import KitchenAgent
+from benchmarks.episode import play_episode
+from problems.kitchen_problem import KitchenProblem
+from utils import load_kitchen_data, create_initial_state
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+ALGORITHMS = ("astar", "weighted_astar", "greedy", "ida_star", "rbfs", "ara_star", "episode")
+
+FIELDS = (
+    "layout",
+    "algorithm",
+    "solved",
+    "nodes_expanded",
+    "nodes_generated",
+    "frontier_pushes",
+    "stale_pops",
+    "reexpansions",
+    "peak_frontier",
+    "peak_rss_kb",
+    "wall_time_s",
+    "plan_length",
+    "plan_cost",
+    "orders_delivered",
+    "steps",
+    "stalled",
+)
+
+# Métricas em que "menor é melhor" e que entram na comparação com o baseline
+LOWER_IS_BETTER = (
+    "nodes_expanded",
+    "nodes_generated",
+    "frontier_pushes",
+    "reexpansions",
+    "peak_frontier",
+    "peak_rss_kb",
+    "plan_length",
+)
+MIN_TIME_DELTA_S = 0.05   # diferenças de tempo menores que isto são ruído
+
+
+def peak_rss_kb():
+    """Pico de memória residente do processo atual, em KiB (None se indisponível)."""
+    if resource is None:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss // 1024 if sys.platform == "darwin" else rss
+
+
+def search_options(algorithm, weight=1.5, table_size=100000):
+    """Argumentos específicos de cada algoritmo (além dos limites e do SearchStats)."""
+    if algorithm == "weighted_astar":
+        return {"weight": weight}
+    if algorithm == "ida_star":
+        return {"table_size": table_size}
+    return {}
+
+
+def _stats_fields(stats):
+    return {
+        "nodes_expanded": stats.expanded,
+        "nodes_generated": stats.generated,
+        "frontier_pushes": stats.pushes,
+        "stale_pops": stats.stale_pops,
+        "reexpansions": stats.reexpansions,
+        "peak_frontier": stats.peak_frontier,
+    }
+
+
+def run_search(layout_path, algorithm, max_expansions=50000, max_time_s=60.0, options=None, macro_actions=False,
+               time_skip=False):
+    """Resolve o objetivo completo do layout com um dos algoritmos de busca."""
+    layout, orders, _ = load_kitchen_data(layout_path)
+    state = create_initial_state(layout, orders)
+    problem = KitchenProblem(state, macro_actions=macro_actions, time_skip=time_skip)
+    stats = SearchStats()
+    search = SEARCH_ALGORITHMS[algorithm]
+
+    start = time.perf_counter()
+    node = search(
+        problem, problem.h, max_expansions=max_expansions, max_time_s=max_time_s, stats=stats, **(options or {})
+    )
+    elapsed = time.perf_counter() - start
+
+    return {
+        "solved": node is not None,
+        **_stats_fields(stats),
+        "wall_time_s": elapsed,
+        "plan_length": len(node.solution()) if node else None,
+        "plan_cost": node.path_cost if node else None,
+        "orders_delivered": len(node.state.delivered_orders) if node else 0,
+        "steps": None,
+        "stalled": None,
+    }
+
+
+def run_episode(layout_path, max_steps=None, algorithm="astar", options=None, macro_actions=False, time_skip=False):
+    """Executa o episódio do agente (sem renderização) e acumula as buscas feitas."""
+    layout, orders, layout_max_steps = load_kitchen_data(layout_path)
+    state = create_initial_state(layout, orders)
+    agent = KitchenAgent(
+        heuristic=KitchenProblem(state).h, algorithm=algorithm, search_options=options,
+        macro_actions=macro_actions, time_skip=time_skip,
+    )
+    episode = play_episode(state, agent, max_steps or layout_max_steps)
+    final = episode.env.state
+
+    return {
+        "solved": not final.active_orders,
+        **_stats_fields(agent.total_stats),
+        "wall_time_s": episode.wall_time_s,
+        "plan_length": episode.actions,
+        "plan_cost": None,
+        "orders_delivered": len(final.delivered_orders),
+        "steps": episode.steps,
+        "stalled": episode.stalled,
+    }
+
+
+def run_case(layout_path, algorithm, max_expansions=50000, max_time_s=60.0, weight=1.5,
+             episode_steps=None, table_size=100000, episode_algorithm="astar", macro_actions=False, time_skip=False):
+    """Executa um caso e devolve o registro completo (uma linha do relatório)."""
+    if algorithm == "episode":
+        options = search_options(episode_algorithm, weight, table_size)
+        result = run_episode(layout_path, episode_steps, episode_algorithm, options, macro_actions, time_skip)
+    else:
+        options = search_options(algorithm, weight, table_size)
+        result = run_search(layout_path, algorithm, max_expansions, max_time_s, options, macro_actions, time_skip)
+    record = {"layout": os.path.basename(layout_path), "algorithm": algorithm}
+    record.update(result)
+    record["wall_time_s"] = round(record["wall_time_s"], 4)
+    record["peak_rss_kb"] = peak_rss_kb()
+    return {field: record[field] for field in FIELDS}
+
+
+def run_isolated(*args):
+    """Roda `run_case` em um processo novo, para que o pico de RSS seja só deste caso."""
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=1, mp_context=context) as pool:
+        return pool.submit(run_case, *args).result()
+
+
+def compare_reports(baseline, current, tolerance=0.10, time_tolerance=0.50):
+    """Lista as regressões de `current` em relação a `baseline` (relatórios em dict)."""
+    base_rows = {(r["layout"], r["algorithm"]): r for r in baseline["results"]}
+    regressions = []
+
+    for row in current["results"]:
+        key = (row["layout"], row["algorithm"])
+        base = base_rows.get(key)
+        if base is None:
+            continue
+        label = f"{row['layout']} [{row['algorithm']}]"
+
+        if base["solved"] and not row["solved"]:
+            regressions.append(f"{label}: deixou de encontrar solução")
+        if row["orders_delivered"] < base["orders_delivered"]:
+            regressions.append(
+                f"{label}: orders_delivered {base['orders_delivered']} -> {row['orders_delivered']}"
+            )
+
+        for metric in LOWER_IS_BETTER:
+            old, new = base.get(metric), row.get(metric)
+            if old is None or new is None:
+                continue
+            if new > old * (1 + tolerance) and new > old:
+                regressions.append(f"{label}: {metric} {old} -> {new} (+{_pct(old, new)})")
+
+        old, new = base["wall_time_s"], row["wall_time_s"]
+        if new > old * (1 + time_tolerance) and new - old > MIN_TIME_DELTA_S:
+            regressions.append(f"{label}: wall_time_s {old} -> {new} (+{_pct(old, new)})")
+
+    return regressions
+
+
+def _pct(old, new):
+    return f"{(new - old) / old * 100:.0f}%" if old else "inf"
+
+
+def write_json(report, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+
+def write_csv(report, path):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.DictWriter(f, fieldnames=FIELDS)
+        writer.writeheader()
+        writer.writerows(report["results"])
+
+
+def _format_row(row):
+    def show(value):
+        return "-" if value is None else value
+    return (
+        f"{row['layout']:<18} {row['algorithm']:<15} {str(row['solved']):<6} "
+        f"{row['nodes_expanded']:>9} {row['nodes_generated']:>10} {row['peak_frontier']:>9} "
+        f"{show(row['peak_rss_kb']):>9} {row['wall_time_s']:>8.2f} "
+        f"{show(row['plan_length']):>6} {row['orders_delivered']:>4}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das buscas e do episódio do agente")
+    parser.add_argument("layouts", nargs="*", help="Arquivos de layout (padrão: layouts/overcooked*.json)")
+    parser.add_argument(
+        "--algorithms",
+        default=",".join(ALGORITHMS),
+        help=f"Lista separada por vírgulas (padrão: {','.join(ALGORITHMS)})",
+    )
+    parser.add_argument("--max-expansions", type=int, default=50000, help="Limite de expansões das buscas")
+    parser.add_argument("--max-time", type=float, default=60.0, help="Limite de tempo das buscas (s)")
+    parser.add_argument("--weight", type=float, default=1.5, help="Peso do Weighted A*")
+    parser.add_argument(
+        "--table-size", type=int, default=100000, help="Tabela de transposição do IDA* (padrão: 100000)"
+    )
+    parser.add_argument(
+        "--episode-algorithm",
+        choices=sorted(SEARCH_ALGORITHMS),
+        default="astar",
+        help="Algoritmo de busca do agente no caso `episode` (padrão: astar)",
+    )
+    parser.add_argument("--episode-steps", type=int, default=None, help="Passos do episódio (padrão: max_steps)")
+    parser.add_argument(
+        "--macro-actions", action="store_true", help="Modo hierárquico: macro-ações GoTo no lugar dos Moves"
+    )
+    parser.add_argument(
+        "--time-skip", action="store_true", help="WaitUntil (salto até o próximo evento) no lugar dos Waits"
+    )
+    parser.add_argument("--output", default="out/bench.json", help="Relatório JSON (padrão: out/bench.json)")
+    parser.add_argument("--csv", default=None, help="Também salva o relatório em CSV neste caminho")
+    parser.add_argument("--baseline", default=None, help="Relatório JSON salvo para comparação")
+    parser.add_argument("--tolerance", type=float, default=0.10, help="Piora relativa tolerada (padrão: 10%%)")
+    parser.add_argument(
+        "--time-tolerance", type=float, default=0.50, help="Piora relativa tolerada no tempo (padrão: 50%%)"
+    )
+    args = parser.parse_args(argv)
+
+    layouts = args.layouts or sorted(glob.glob("layouts/overcooked*.json"))
+    algorithms = [a.strip() for a in args.algorithms.split(",") if a.strip()]
+    for algorithm in algorithms:
+        if algorithm not in ALGORITHMS:
+            parser.error(f"algoritmo desconhecido: {algorithm}")
+
+    print(
+        f"{'layout':<18} {'algoritmo':<15} {'ok':<6} {'expand.':>9} {'gerados':>10} {'fronteira':>9} "
+        f"{'rss(KiB)':>9} {'tempo':>8} {'plano':>6} {'ped.':>4}"
+    )
+    results = []
+    for layout_path in layouts:
+        for algorithm in algorithms:
+            row = run_isolated(
+                layout_path, algorithm, args.max_expansions, args.max_time, args.weight,
+                args.episode_steps, args.table_size, args.episode_algorithm, args.macro_actions,
+                args.time_skip,
+            )
+            results.append(row)
+            print(_format_row(row), flush=True)
+
+    report = {
+        "meta": {
+            "created": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "max_expansions": args.max_expansions,
+            "max_time_s": args.max_time,
+            "weight": args.weight,
+            "table_size": args.table_size,
+            "episode_algorithm": args.episode_algorithm,
+            "episode_steps": args.episode_steps,
+            "macro_actions": args.macro_actions,
+            "time_skip": args.time_skip,
+        },
+        "results": results,
+    }
+    write_json(report, args.output)
+    print(f"\n[Bench] Relatório salvo em {args.output}.")
+    if args.csv:
+        write_csv(report, args.csv)
+        print(f"[Bench] CSV salvo em {args.csv}.")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, args.tolerance, args.time_tolerance)
+        if regressions:
+            print(f"\n[Bench] {len(regressions)} regressão(ões) em relação a {args.baseline}:")
+            for line in regressions:
+                print(f"  - {line}")
+            return 1
+        print(f"\n[Bench] Nenhuma regressão em relação a {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
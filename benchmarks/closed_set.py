@@ -0,0 +1,96 @@
+"""
+Memória por estado explorado das buscas, com o conjunto fechado de estados e com o de
+impressões digitais (`fingerprints=True`, ver `agents.algorithms.fingerprints`).
+
+Para cada layout e algoritmo (A*, Weighted A* e Greedy, os que aceitam `fingerprints`),
+roda a busca no objetivo completo duas vezes com os mesmos limites, medindo com
+`tracemalloc` o pico de memória alocada durante a busca. O relatório traz, por modo, os
+estados expandidos e o pico dividido por eles (bytes por estado explorado), e a razão
+entre os dois modos. As duas buscas expandem os mesmos nós (salvo colisão de impressões),
+o que também é conferido.
+
+Uso:
+    python -m benchmarks.closed_set                                   # todos os layouts
+    python -m benchmarks.closed_set layouts/overcooked1.json --max-expansions 20000
+"""
+
+import argparse
+import glob
+import json
+import os
+import tracemalloc
+
+from agents.algorithms.search import SEARCH_ALGORITHMS
+from agents.algorithms.stats import SearchStats
+from problems.kitchen_problem import KitchenProblem
+from utils import load_kitchen_data, create_initial_state
+
+ALGORITHMS = ("astar", "weighted_astar", "greedy")
+
+
+def measure(layout_path, algorithm, fingerprints, max_expansions=20000, max_time_s=120.0):
+    """(expandidos, pico de bytes alocados) de uma busca no objetivo completo."""
+    layout, orders, _ = load_kitchen_data(layout_path)
+    problem = KitchenProblem(create_initial_state(layout, orders))
+    stats = SearchStats()
+    tracemalloc.start()
+    try:
+        SEARCH_ALGORITHMS[algorithm](problem, problem.h, max_expansions=max_expansions, max_time_s=max_time_s,
+                                     stats=stats, fingerprints=fingerprints)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return stats.expanded, peak
+
+
+def run_closed_set(layouts, algorithms, max_expansions=20000, max_time_s=120.0):
+    rows = []
+    for layout_path in layouts:
+        for algorithm in algorithms:
+            expanded, states_peak = measure(layout_path, algorithm, False, max_expansions, max_time_s)
+            fp_expanded, fp_peak = measure(layout_path, algorithm, True, max_expansions, max_time_s)
+            rows.append({
+                "layout": os.path.basename(layout_path),
+                "algorithm": algorithm,
+                "nodes_expanded": expanded,
+                "same_search": fp_expanded == expanded,
+                "bytes_per_state": states_peak / max(expanded, 1),
+                "fingerprint_bytes_per_state": fp_peak / max(fp_expanded, 1),
+                "ratio": fp_peak / states_peak if states_peak else None,
+            })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Bytes por estado explorado: estados vs impressões digitais")
+    parser.add_argument("layouts", nargs="*", help="Arquivos de layout (padrão: layouts/overcooked*.json)")
+    parser.add_argument("--algorithms", default=",".join(ALGORITHMS),
+                        help=f"Lista separada por vírgulas (padrão: {','.join(ALGORITHMS)})")
+    parser.add_argument("--max-expansions", type=int, default=20000, help="Limite de expansões das buscas")
+    parser.add_argument("--max-time", type=float, default=120.0, help="Limite de tempo das buscas (s)")
+    parser.add_argument("--output", default=None, help="Também salva o relatório JSON neste caminho")
+    args = parser.parse_args(argv)
+
+    layouts = args.layouts or sorted(glob.glob("layouts/overcooked*.json"))
+    algorithms = [a.strip() for a in args.algorithms.split(",") if a.strip()]
+    for algorithm in algorithms:
+        if algorithm not in ALGORITHMS:
+            parser.error(f"algoritmo sem suporte a impressões digitais: {algorithm}")
+
+    print(f"{'layout':<18} {'algoritmo':<15} {'expand.':>8} {'bytes/estado':>13} {'impressões':>11} {'razão':>6}")
+    rows = run_closed_set(layouts, algorithms, args.max_expansions, args.max_time)
+    for row in rows:
+        note = "" if row["same_search"] else "  (buscas diferentes!)"
+        print(f"{row['layout']:<18} {row['algorithm']:<15} {row['nodes_expanded']:>8} "
+              f"{row['bytes_per_state']:>13.0f} {row['fingerprint_bytes_per_state']:>11.0f} "
+              f"{row['ratio']:>6.2f}{note}", flush=True)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"max_expansions": args.max_expansions, "results": rows}, f, indent=2)
+        print(f"\n[Conjunto fechado] Relatório salvo em {args.output}.")
+
+
+if __name__ == "__main__":
+    main()
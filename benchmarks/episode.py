@@ -0,0 +1,59 @@
+"""
+Laço de episódio compartilhado pelos benchmarks (sem renderização e sem saída no terminal).
+"""
+
+import contextlib
+import io
+import time
+from typing import NamedTuple
+
+from env.kitchen_env import KitchenEnvironment
+
+
+class EpisodeResult(NamedTuple):
+    env: KitchenEnvironment
+    steps: int          # passos do ambiente executados
+    actions: int        # passos em que o agente devolveu uma ação
+    stalled: bool       # o agente não encontrou plano e o episódio foi encerrado
+                        # (um ARA* ainda em busca no modo anytime não conta, nem a
+                        # espera por pedidos que ainda vão chegar ou expirar)
+    wall_time_s: float
+
+
+def play_episode(state, agent, max_steps, trace=None, orders=None) -> EpisodeResult:
+    """Executa `agent` a partir de `state` por até `max_steps` passos.
+
+    Como o agente é determinístico, uma busca que falha num estado falharia de novo a
+    cada passo seguinte; o episódio é encerrado ali e marcado como `stalled`.
+    `trace` (um `env.trace.TraceWriter`) grava as ações do episódio; `orders` (um
+    `env.orders.OrderStream`) faz os pedidos chegarem e expirarem no tempo. Com ele, o
+    estado ainda muda sem ações enquanto houver pedidos por chegar ou por expirar, então
+    o agente espera (o tempo avança) em vez de o episódio acabar.
+    """
+    env = KitchenEnvironment(state, trace=trace, orders=orders)
+    env.add_thing(agent)
+
+    steps = 0
+    actions = 0
+    stalled = False
+
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(max_steps):
+            env.step()
+            steps += 1
+            info = agent.debug_info
+            if info.get("action") is not None:
+                actions += 1
+            elif not info.get("plan_found") and not info.get("planning"):
+                if orders is None or not _orders_may_change(env.state, orders):
+                    stalled = True
+                    break
+            if env.is_done():
+                break
+    return EpisodeResult(env, steps, actions, stalled, time.perf_counter() - start)
+
+
+def _orders_may_change(state, orders) -> bool:
+    """Algum pedido ainda chega ou expira (o que muda o estado mesmo sem ações)."""
+    return bool(orders.pending(state)) or (orders.expire and bool(state.active_orders))
@@ -0,0 +1,109 @@
+"""
+Custo por passo do laço da simulação com e sem renderização.
+
+O agente é tirado da medida: o episódio é jogado uma vez pelo `KitchenAgent` e as ações
+são reexecutadas por um agente roteirizado, então o tempo medido é só o do laço do
+`main.py --auto` (`env.step()` + rastro + render) em cada modo:
+
+    - headless:   só `env.step()` (sem rastro e sem render)
+    - quiet:      `env.step()` + rastro JSONL (`main.py --auto --quiet`)
+    - every_10:   rastro + render a cada 10 passos (`--render-every 10`)
+    - render:     rastro + render em todo passo (`main.py --auto`)
+
+Uso:
+    python -m benchmarks.render                         # todos os layouts
+    python -m benchmarks.render layouts/overcooked2.json --repeat 20
+"""
+
+import argparse
+import glob
+import os
+import tempfile
+import time
+
+from aima3.agents import Agent
+
+from agents.kitchen_agent import KitchenAgent
+from benchmarks.episode import play_episode
+from env.kitchen_env import KitchenEnvironment
+from env.trace import Trace, TraceWriter
+from problems.kitchen_problem import KitchenProblem
+from utils import load_kitchen_data, create_initial_state
+
+# modo --> (renderiza a cada N passos, 0 = nunca; grava o rastro)
+MODES = {
+    "headless": (0, False),
+    "quiet": (0, True),
+    "every_10": (10, True),
+    "render": (1, True),
+}
+
+
+def record_actions(state, max_steps, directory):
+    """Ações do episódio do `KitchenAgent` a partir de `state` (lidas do rastro)."""
+    path = os.path.join(directory, "episode.jsonl")
+    agent = KitchenAgent(heuristic=KitchenProblem(state).h)
+    with TraceWriter(path, state) as trace:
+        env = play_episode(state, agent, max_steps, trace=trace).env
+    return Trace.load(path).actions, env.state
+
+
+def run_loop(state, actions, render_every, with_trace, directory) -> float:
+    """Segundos do laço da simulação reexecutando `actions` no modo dado."""
+    script = iter(actions)
+    trace = TraceWriter(os.path.join(directory, "trace.jsonl"), state) if with_trace else None
+    render_file = open(os.path.join(directory, "render.txt"), "w", encoding="utf-8") if render_every else None
+    env = KitchenEnvironment(state, trace=trace)
+    env.add_thing(Agent(lambda percept: next(script, None)))
+
+    start = time.perf_counter()
+    if render_file is not None:
+        env.render(out=render_file, quiet=True)
+    for step in range(1, len(actions) + 1):
+        env.step()
+        if render_file is not None and (step % render_every == 0 or step == len(actions)):
+            render_file.write(f"\n--- Passo {step} ---\n")
+            env.render(out=render_file, quiet=True)
+            render_file.flush()
+    elapsed = time.perf_counter() - start
+
+    if trace is not None:
+        trace.close()
+    if render_file is not None:
+        render_file.close()
+    return elapsed
+
+
+def bench_layout(layout_path, repeat=10):
+    """{modo: microssegundos por passo} (melhor de `repeat` execuções) e o número de passos."""
+    layout, orders, max_steps = load_kitchen_data(layout_path)
+    state = create_initial_state(layout, orders)
+    with tempfile.TemporaryDirectory() as directory:
+        actions, _ = record_actions(state, max_steps, directory)
+        results = {}
+        for mode, (render_every, with_trace) in MODES.items():
+            best = min(run_loop(state, actions, render_every, with_trace, directory) for _ in range(repeat))
+            results[mode] = best / max(len(actions), 1) * 1e6
+    return results, len(actions)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Custo por passo do laço da simulação com e sem render")
+    parser.add_argument("layouts", nargs="*", help="Arquivos de layout (padrão: layouts/overcooked*.json)")
+    parser.add_argument("--repeat", type=int, default=10, help="Execuções por modo (vale a melhor)")
+    args = parser.parse_args(argv)
+
+    layouts = args.layouts or sorted(glob.glob("layouts/overcooked*.json"))
+    print(f"{'layout':<18} {'passos':>6} " + " ".join(f"{mode + ' µs':>14}" for mode in MODES) + f" {'render/headless':>16}")
+    for layout_path in layouts:
+        results, steps = bench_layout(layout_path, args.repeat)
+        ratio = results["render"] / results["headless"] if results["headless"] else 0.0
+        print(
+            f"{os.path.basename(layout_path):<18} {steps:>6} "
+            + " ".join(f"{results[mode]:>14.1f}" for mode in MODES)
+            + f" {ratio:>15.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,183 @@
+"""
+Curvas de escala das buscas com o tamanho da cozinha.
+
+Gera layouts procedurais (`utils.layout_generator`) para cada tamanho, com as mesmas
+estações e pedidos e `--samples` sementes por tamanho, e roda em cada um o episódio do
+agente com cada algoritmo de busca (os casos `episode` do `benchmarks.bench`, um processo
+novo por caso). Com `--full-search`, roda em vez disso a busca no objetivo completo, que
+costuma esbarrar em `--max-expansions` já nos layouts pequenos.
+
+O relatório traz, por caso, a área do grid, nós expandidos/gerados, pico da fronteira e
+tempo; ao final, para cada algoritmo, o expoente `k` do ajuste `expansões ~ área^k` (e o
+mesmo para o tempo) nos casos resolvidos.
+
+Uso:
+    python -m benchmarks.scaling                                        # tamanhos padrão
+    python -m benchmarks.scaling --sizes 12x8,24x14,48x26 --algorithms astar,greedy --pots 2
+"""
+
+import argparse
+import csv
+import json
+import math
+import os
+import tempfile
+
+from agents.algorithms.search import SEARCH_ALGORITHMS
+from benchmarks.bench import run_case, run_isolated
+from models.states import LayoutIndex
+from utils.layout_generator import RECIPES, LayoutSpec, generate_layout, write_layout
+
+DEFAULT_SIZES = ((12, 8), (16, 10), (24, 14), (32, 18), (40, 22))
+DEFAULT_ALGORITHMS = ("astar", "weighted_astar", "greedy", "ida_star", "ara_star")
+
+FIELDS = (
+    "width",
+    "height",
+    "area",
+    "seed",
+    "algorithm",
+    "solved",
+    "nodes_expanded",
+    "nodes_generated",
+    "peak_frontier",
+    "wall_time_s",
+    "plan_length",
+    "orders_delivered",
+)
+
+
+def parse_sizes(text):
+    """"12x8,24x14" --> ((12, 8), (24, 14))."""
+    sizes = []
+    for item in text.split(","):
+        if item.strip():
+            width, height = item.lower().split("x")
+            sizes.append((int(width), int(height)))
+    return tuple(sizes)
+
+
+def scaling_layouts(sizes, spec: LayoutSpec, directory, samples=1):
+    """Gera e grava `samples` layouts por tamanho; devolve [(caminho, largura, altura, semente)]."""
+    layouts = []
+    for width, height in sizes:
+        for seed in range(spec.seed, spec.seed + samples):
+            data = generate_layout(spec._replace(width=width, height=height, seed=seed))
+            path = os.path.join(directory, f"generated_{width}x{height}_s{seed}.json")
+            write_layout(data, path)
+            layouts.append((path, width, height, seed))
+    return layouts
+
+
+def run_scaling(sizes, algorithms, spec: LayoutSpec, directory, samples=1, full_search=False,
+                max_expansions=50000, max_time_s=60.0, isolated=True):
+    """Registros (um por layout × algoritmo) do relatório de escala, à medida que terminam."""
+    run = run_isolated if isolated else run_case
+    for path, width, height, seed in scaling_layouts(sizes, spec, directory, samples):
+        # Cada layout gerado é usado só uma vez: os índices (e suas tabelas de BFS) não precisam ficar
+        LayoutIndex.clear_cache()
+        for algorithm in algorithms:
+            if full_search:
+                record = run(path, algorithm, max_expansions, max_time_s)
+            else:
+                record = run(path, "episode", max_expansions, max_time_s, 1.5, None, 100000, algorithm)
+            record.update(width=width, height=height, area=width * height, seed=seed, algorithm=algorithm)
+            yield {field: record[field] for field in FIELDS}
+
+
+def growth_exponent(rows, metric):
+    """Expoente `k` do ajuste por mínimos quadrados de log(metric) = k log(área) + c.
+
+    Usa só casos resolvidos com a métrica positiva; None se houver menos de 2 áreas.
+    """
+    points = [(math.log(r["area"]), math.log(r[metric])) for r in rows if r["solved"] and r[metric]]
+    if len({x for x, _ in points}) < 2:
+        return None
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    sxx = sum((x - mean_x) ** 2 for x, _ in points)
+    sxy = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    return sxy / sxx
+
+
+def main(argv=None):
+    defaults = LayoutSpec()
+    parser = argparse.ArgumentParser(description="Expansões e tempo das buscas em função da área do layout")
+    parser.add_argument("--sizes", default=",".join(f"{w}x{h}" for w, h in DEFAULT_SIZES),
+                        help="Tamanhos LxA separados por vírgula")
+    parser.add_argument("--algorithms", default=",".join(DEFAULT_ALGORITHMS),
+                        help=f"Algoritmos de busca ({','.join(sorted(SEARCH_ALGORITHMS))})")
+    parser.add_argument("--samples", type=int, default=3, help="Layouts (sementes) por tamanho (padrão: 3)")
+    parser.add_argument("--full-search", action="store_true",
+                        help="Busca no objetivo completo em vez do episódio do agente")
+    parser.add_argument("--counter-density", type=float, default=defaults.counter_density)
+    parser.add_argument("--pots", type=int, default=defaults.pots)
+    parser.add_argument("--boards", type=int, default=defaults.boards)
+    parser.add_argument("--orders", default=",".join(defaults.orders),
+                        help=f"Receitas dos pedidos: {', '.join(RECIPES)}")
+    parser.add_argument("--order-count", type=int, default=defaults.order_count)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    parser.add_argument("--max-expansions", type=int, default=50000, help="Limite de expansões das buscas")
+    parser.add_argument("--max-time", type=float, default=60.0, help="Limite de tempo das buscas (s)")
+    parser.add_argument("--layouts-dir", default=None, help="Mantém os layouts gerados neste diretório")
+    parser.add_argument("--output", default="out/scaling.json", help="Relatório JSON (padrão: out/scaling.json)")
+    parser.add_argument("--csv", default=None, help="Também salva o relatório em CSV neste caminho")
+    args = parser.parse_args(argv)
+
+    algorithms = [a.strip() for a in args.algorithms.split(",") if a.strip()]
+    for algorithm in algorithms:
+        if algorithm not in SEARCH_ALGORITHMS:
+            parser.error(f"algoritmo desconhecido: {algorithm}")
+    spec = LayoutSpec(
+        counter_density=args.counter_density,
+        pots=args.pots,
+        boards=args.boards,
+        orders=tuple(o.strip() for o in args.orders.split(",") if o.strip()),
+        order_count=args.order_count,
+        seed=args.seed,
+    )
+
+    print(f"{'tamanho':<8} {'área':>6} {'seed':>4} {'algoritmo':<15} {'ok':<6} {'expand.':>9} {'gerados':>10} "
+          f"{'fronteira':>9} {'tempo':>8} {'plano':>6}")
+    rows = []
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = args.layouts_dir or tmp
+        os.makedirs(directory, exist_ok=True)
+        for row in run_scaling(parse_sizes(args.sizes), algorithms, spec, directory, args.samples,
+                               args.full_search, args.max_expansions, args.max_time):
+            rows.append(row)
+            plan = "-" if row["plan_length"] is None else row["plan_length"]
+            size = f"{row['width']}x{row['height']}"
+            print(f"{size:<8} {row['area']:>6} {row['seed']:>4} {row['algorithm']:<15} {str(row['solved']):<6} "
+                  f"{row['nodes_expanded']:>9} {row['nodes_generated']:>10} {row['peak_frontier']:>9} "
+                  f"{row['wall_time_s']:>8.2f} {plan:>6}", flush=True)
+
+    print("\nCrescimento com a área (expansões ~ área^k, tempo ~ área^k):")
+    growth = {}
+    for algorithm in algorithms:
+        cases = [r for r in rows if r["algorithm"] == algorithm]
+        growth[algorithm] = {
+            "nodes_expanded": growth_exponent(cases, "nodes_expanded"),
+            "wall_time_s": growth_exponent(cases, "wall_time_s"),
+        }
+        k_exp, k_time = growth[algorithm]["nodes_expanded"], growth[algorithm]["wall_time_s"]
+        print(f"  {algorithm:<15} expansões k={'-' if k_exp is None else f'{k_exp:.2f}'}  "
+              f"tempo k={'-' if k_time is None else f'{k_time:.2f}'}")
+
+    os.makedirs(os.path.dirname(args.output) or ".", exist_ok=True)
+    with open(args.output, "w", encoding="utf-8") as f:
+        meta = {"spec": spec._asdict(), "sizes": args.sizes, "samples": args.samples, "full_search": args.full_search}
+        json.dump({"meta": meta, "results": rows, "growth": growth},
+                  f, indent=2)
+    print(f"\n[Escala] Relatório salvo em {args.output}.")
+    if args.csv:
+        os.makedirs(os.path.dirname(args.csv) or ".", exist_ok=True)
+        with open(args.csv, "w", newline="", encoding="utf-8") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            writer.writerows(rows)
+        print(f"[Escala] CSV salvo em {args.csv}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""
+Compara as heurísticas dos sub-objetivos com a heurística nula (UCS).
+
+Executa o episódio de cada layout como o `KitchenAgent` faria e, a cada
+replanejamento por sub-objetivo, resolve o mesmo problema duas vezes com
+`astar_search_with_limit`: uma com `h = 0` e outra com `subgoal.h`. O episódio
+segue com o plano da heurística. Ao final mostra expansões e tempo de parede
+somados por layout, além de quantas buscas encontraram planos de custo diferente
+(deve ser 0: as heurísticas são admissíveis).
+
+Uso:
+    python -m benchmarks.subgoal_heuristics [layouts/overcooked1.json ...] [--steps N]
+"""
+
+import argparse
+import glob
+import time
+
+from agents.algorithms.search import astar_search_with_limit
+from agents.kitchen_agent import KitchenAgent
+from agents.subgoals import zero_heuristic
+from problems.kitchen_problem import KitchenProblem
+from utils import load_kitchen_data, create_initial_state
+
+
+class _CountingProblem(KitchenProblem):
+    """KitchenProblem que conta expansões (uma chamada de `actions` por nó expandido)."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.expansions = 0
+
+    def actions(self, state):
+        self.expansions += 1
+        return super().actions(state)
+
+
+def _run_search(state, subgoal, h, max_expansions, max_time_s):
+    problem = _CountingProblem(state, goal_test_fn=subgoal.test)
+    start = time.perf_counter()
+    node = astar_search_with_limit(problem, h, max_expansions=max_expansions, max_time_s=max_time_s)
+    return node, problem.expansions, time.perf_counter() - start
+
+
+def benchmark_layout(layout_path, steps=None, max_expansions=100000, max_time_s=60.0):
+    """Roda um episódio comparando as duas heurísticas; retorna um dicionário de métricas."""
+    layout, orders, max_steps = load_kitchen_data(layout_path)
+    state = create_initial_state(layout, orders)
+    agent = KitchenAgent(heuristic=KitchenProblem(state).h)
+    problem = KitchenProblem(state)
+
+    row = {
+        "layout": layout_path,
+        "searches": 0,
+        "zero_expansions": 0,
+        "h_expansions": 0,
+        "zero_time_s": 0.0,
+        "h_time_s": 0.0,
+        "failures": 0,
+        "cost_mismatches": 0,
+        "steps": 0,
+    }
+
+    plan = []
+    for _ in range(steps or max_steps):
+        if not state.active_orders:
+            break
+        if not plan:
+            subgoal = agent.get_subgoal_test(state)
+            if subgoal is None:
+                # Objetivo completo: fora do escopo desta comparação
+                break
+            zero_node, zero_exp, zero_t = _run_search(state, subgoal, zero_heuristic, max_expansions, max_time_s)
+            h_node, h_exp, h_t = _run_search(state, subgoal, subgoal.h, max_expansions, max_time_s)
+
+            row["searches"] += 1
+            row["zero_expansions"] += zero_exp
+            row["h_expansions"] += h_exp
+            row["zero_time_s"] += zero_t
+            row["h_time_s"] += h_t
+
+            if h_node is None:
+                row["failures"] += 1
+                break
+            if zero_node is not None and abs(zero_node.path_cost - h_node.path_cost) > 1e-9:
+                row["cost_mismatches"] += 1
+            plan = h_node.solution()
+
+        state = problem.result(state, plan.pop(0))
+        row["steps"] += 1
+
+    return row
+
+
+def _format_row(row):
+    ratio = row["h_expansions"] / row["zero_expansions"] if row["zero_expansions"] else 1.0
+    return (
+        f"{row['layout']:<28} {row['searches']:>5} {row['steps']:>5} "
+        f"{row['zero_expansions']:>10} {row['h_expansions']:>10} {ratio:>6.2f} "
+        f"{row['zero_time_s']:>8.2f} {row['h_time_s']:>8.2f} "
+        f"{row['failures']:>4} {row['cost_mismatches']:>4}"
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Heurísticas de sub-objetivo vs. heurística nula")
+    parser.add_argument("layouts", nargs="*", help="Arquivos de layout (padrão: layouts/*.json)")
+    parser.add_argument("--steps", type=int, default=None, help="Passos por episódio (padrão: max_steps do layout)")
+    parser.add_argument("--max-expansions", type=int, default=100000)
+    parser.add_argument("--max-time", type=float, default=60.0, help="Tempo máximo por busca, em segundos")
+    args = parser.parse_args(argv)
+
+    layouts = args.layouts or sorted(glob.glob("layouts/*.json"))
+    print(
+        f"{'layout':<28} {'busc':>5} {'passo':>5} {'exp(h=0)':>10} {'exp(h)':>10} {'razão':>6} "
+        f"{'t(h=0)':>8} {'t(h)':>8} {'falha':>4} {'custo':>4}"
+    )
+    for layout_path in layouts:
+        row = benchmark_layout(layout_path, args.steps, args.max_expansions, args.max_time)
+        print(_format_row(row), flush=True)
+
+
+if __name__ == "__main__":
+    main()
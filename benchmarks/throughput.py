@@ -0,0 +1,78 @@
+"""
+Teste de carga do agente com pedidos chegando continuamente.
+
+Para cada layout, gera um fluxo de pedidos (`env.orders.generate_orders`, sorteados dos
+pedidos do layout) para cada intervalo médio entre chegadas e joga o episódio com os
+pedidos chegando em `instant` e expirando em `instant + duration`. Intervalos menores
+aumentam a pressão sobre o planejador; o relatório mostra a vazão de cada caso:
+
+    - pedidos/min, pontos/min (1 passo = 1 s)
+    - pedidos entregues e expirados
+    - atraso médio das entregas (entrega - deadline; negativo = antes do prazo)
+    - tamanho médio e máximo da fila de pedidos ativos
+
+Uso:
+    python -m benchmarks.throughput                                 # todos os layouts
+    python -m benchmarks.throughput layouts/overcooked2.json --intervals 60,30,15 --orders 20
+"""
+
+import argparse
+import glob
+import os
+
+from agents.kitchen_agent import KitchenAgent
+from benchmarks.episode import play_episode
+from env.orders import OrderStream, deadline, generate_orders
+from problems.kitchen_problem import KitchenProblem
+from utils import load_kitchen_data, create_initial_state
+
+DEFAULT_INTERVALS = (60.0, 40.0, 25.0)
+
+
+def run_stream(layout_path, count, mean_interval, seed=0):
+    """Joga um episódio com `count` pedidos chegando a cada `mean_interval` passos (em média).
+
+    Devolve (`Throughput`, `EpisodeResult`).
+    """
+    layout, templates, max_steps = load_kitchen_data(layout_path)
+    orders = generate_orders(templates, count, mean_interval, seed=seed)
+    stream = OrderStream(orders)
+    state = create_initial_state(layout, orders)
+    agent = KitchenAgent(heuristic=KitchenProblem(state).h)
+    # O episódio dura pelo menos até o prazo do último pedido
+    steps = max(max_steps, max(deadline(o) for o in orders))
+    episode = play_episode(state, agent, steps, orders=stream)
+    return episode.env.throughput(), episode
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Vazão do agente sob um fluxo contínuo de pedidos")
+    parser.add_argument("layouts", nargs="*", help="Arquivos de layout (padrão: layouts/overcooked*.json)")
+    parser.add_argument("--orders", type=int, default=10, help="Pedidos por fluxo (padrão: 10)")
+    parser.add_argument(
+        "--intervals",
+        default=",".join(f"{i:g}" for i in DEFAULT_INTERVALS),
+        help="Intervalos médios entre chegadas, em passos, separados por vírgula (padrão: 60,40,25)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Semente dos fluxos (padrão: 0)")
+    args = parser.parse_args(argv)
+
+    intervals = [float(i) for i in args.intervals.split(",") if i.strip()]
+    layouts = args.layouts or sorted(glob.glob("layouts/overcooked*.json"))
+    print(
+        f"{'layout':<18} {'intervalo':>9} {'passos':>6} {'entregues':>9} {'expirados':>9} "
+        f"{'pedidos/min':>11} {'pontos/min':>10} {'atraso':>7} {'fila':>5} {'máx':>4} {'travou':>6}"
+    )
+    for layout_path in layouts:
+        for interval in intervals:
+            result, episode = run_stream(layout_path, args.orders, interval, args.seed)
+            print(
+                f"{os.path.basename(layout_path):<18} {interval:>9g} {episode.steps:>6} {result.delivered:>9} "
+                f"{result.expired:>9} {result.orders_per_min:>11.2f} {result.score_per_min:>10.1f} "
+                f"{result.mean_lateness:>+7.1f} {result.mean_queue:>5.2f} {result.max_queue:>4} "
+                f"{'sim' if episode.stalled else 'não':>6}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,17 +1,29 @@
 from aima3.agents import Environment
+from env.orders import OrderMetrics
 from models.states import KitchenState
 
 
 class KitchenEnvironment(Environment):
-    def __init__(self, initial_state: KitchenState):
+    def __init__(self, initial_state: KitchenState, trace=None, orders=None):
         super().__init__()
+        # Linha do tempo opcional dos pedidos (`env.orders.OrderStream`): sem ela, todos os
+        # pedidos ficam ativos desde o início e não expiram
+        self.orders = orders
+        if orders is not None:
+            initial_state = orders.start(initial_state)
         self.state = initial_state
         self.height = len(initial_state.layout)
         self.width = len(initial_state.layout[0])
-        self.history = []  # Lista de tuplas (state, action)
+        # Rastro opcional (`env.trace.TraceWriter`): cada ação é gravada em disco assim
+        # que executada, em vez de acumular o histórico do episódio em memória
+        self.trace = trace
         
-        # Sistema de pontuação máxima baseada nos pedidos iniciais
-        self.max_score = sum(o.score for o in initial_state.active_orders)
+        # Sistema de pontuação máxima baseada nos pedidos iniciais (ou em todos os da linha do tempo)
+        if orders is not None:
+            self.max_score = orders.max_score
+        else:
+            self.max_score = sum(o.score for o in initial_state.active_orders)
+        self.metrics = OrderMetrics(initial_state)
 
     def thing_classes(self):
         return []
@@ -21,7 +33,7 @@ class KitchenEnvironment(Environment):
 
     def execute_action(self, agent, action):
         from problems.kitchen_problem import KitchenProblem
-        prev_state = self.state
+        before = self.state
         if action:
             problem = KitchenProblem(self.state)
             self.state = problem.result(self.state, action)
@@ -29,7 +41,41 @@ class KitchenEnvironment(Environment):
             # Incrementa o tempo mesmo sem ação
             self.state = self.state._replace(time=self.state.time + 1)
 
-        self.history.append((prev_state, action))
+        # Pedidos que chegam ou expiram neste passo
+        expired = ()
+        if self.orders is not None:
+            self.state, expired = self.orders.advance(before, self.state)
+        self.metrics.record(before, self.state, expired)
+
+        if self.trace is not None:
+            self.trace.record(action, self.state)
+
+    def is_done(self) -> bool:
+        """Nenhum pedido ativo e nenhum por chegar."""
+        if self.state.active_orders:
+            return False
+        return self.orders is None or not self.orders.pending(self.state)
+
+    def throughput(self):
+        """Métricas de vazão do episódio até aqui (`env.orders.Throughput`)."""
+        return self.metrics.throughput(self.state, self.orders)
+
+    def score(self) -> int:
+        """Pontos dos pedidos entregues até agora."""
+        return sum(o.score for o in self.state.delivered_orders)
+
+    def stars(self) -> int:
+        """Estrelas (0 a 3) pela fração da pontuação máxima já obtida."""
+        current_score = self.score()
+        if self.max_score <= 0:
+            return 0
+        if current_score >= self.max_score:
+            return 3
+        if current_score >= self.max_score * 0.75:
+            return 2
+        if current_score >= self.max_score * 0.5:
+            return 1
+        return 0
 
     def render(self, out=None, quiet: bool = False) -> str:
         from models.entities import Ingredient, Plate, Extinguisher, Pot
@@ -80,15 +126,8 @@ class KitchenEnvironment(Environment):
             holding_str = f"{held.name}({held.state})"
 
         # Cálculo de pontos e estrelas
-        current_score = sum(o.score for o in self.state.delivered_orders)
-        stars = 0
-        if self.max_score > 0:
-            if current_score >= self.max_score:
-                stars = 3
-            elif current_score >= self.max_score * 0.75:
-                stars = 2
-            elif current_score >= self.max_score * 0.5:
-                stars = 1
+        current_score = self.score()
+        stars = self.stars()
         stars_str = "⭐" * stars + "☆" * (3 - stars)
 
         lines = []
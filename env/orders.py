@@ -0,0 +1,152 @@
+"""
+Chegada e expiração de pedidos ao longo do episódio, e métricas de vazão.
+
+Sem um `OrderStream`, todos os pedidos do layout ficam ativos desde t=0 e nunca
+expiram (o comportamento original). Com ele, o ambiente segue a linha do tempo
+dos pedidos:
+
+    - um pedido entra em `active_orders` quando `time >= instant`
+    - um pedido ainda ativo expira (sai sem pontuar) quando `time >= instant + duration`
+
+A chegada e a expiração são dinâmica do ambiente, como o fogão e a pia: `result()`
+continua determinístico e não conhece pedidos futuros, e o agente vê cada pedido
+novo só quando ele chega (o plano em curso é validado e refeito se preciso).
+`OrderStream.advance` é uma função pura dos estados antes e depois do passo, então o
+replay do rastro reproduz as mesmas chegadas e expirações.
+
+`generate_orders` gera um fluxo contínuo de pedidos (chegadas de Poisson, sementeado)
+a partir dos pedidos do layout, para testar o planejador sob pressão constante.
+"""
+
+import random
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+from models.entities import Order
+from models.states import KitchenState
+
+TICKS_PER_MINUTE = 60   # o render mostra o tempo restante em segundos: 1 passo = 1 s
+
+
+def deadline(order: Order) -> int:
+    return order.instant + order.duration
+
+
+def _by_deadline(orders) -> Tuple[Order, ...]:
+    # Mesma Fila de Prioridade de `create_initial_state`
+    return tuple(sorted(orders, key=deadline))
+
+
+class OrderStream:
+    """Linha do tempo dos pedidos de um episódio."""
+
+    def __init__(self, orders: Sequence[Order], expire: bool = True):
+        self.orders = tuple(sorted(orders, key=lambda o: o.instant))
+        self.expire = expire
+
+    @property
+    def max_score(self) -> int:
+        return sum(o.score for o in self.orders)
+
+    def start(self, state: KitchenState) -> KitchenState:
+        """Estado inicial só com os pedidos já chegados em `state.time`."""
+        arrived = [o for o in self.orders if o.instant <= state.time]
+        return state._replace(active_orders=_by_deadline(arrived))
+
+    def advance(self, before: KitchenState, after: KitchenState) -> Tuple[KitchenState, Tuple[Order, ...]]:
+        """Aplica as chegadas e expirações do passo `before` --> `after`.
+
+        Devolve o estado atualizado e os pedidos que expiraram neste passo.
+        """
+        arrived = [o for o in self.orders if before.time < o.instant <= after.time]
+        active = after.active_orders + tuple(arrived)
+        expired = ()
+        if self.expire:
+            expired = tuple(o for o in active if deadline(o) <= after.time)
+            if expired:
+                active = tuple(o for o in active if deadline(o) > after.time)
+        if not arrived and not expired:
+            return after, ()
+        return after._replace(active_orders=_by_deadline(active)), expired
+
+    def pending(self, state: KitchenState) -> Tuple[Order, ...]:
+        """Pedidos que ainda vão chegar."""
+        return tuple(o for o in self.orders if o.instant > state.time)
+
+
+class Throughput(NamedTuple):
+    """Resumo de vazão de um episódio (tempo em passos; 1 passo = 1 s)."""
+    time: int
+    delivered: int
+    expired: int
+    pending: int                # pedidos ainda ativos ou por chegar
+    orders_per_min: float
+    mean_lateness: float        # entrega - deadline, em passos (negativo = antes do prazo)
+    score_per_min: float
+    mean_queue: float           # pedidos ativos, média por passo
+    max_queue: int
+
+    def summary(self) -> str:
+        return (
+            f"t={self.time} entregues={self.delivered} expirados={self.expired} pendentes={self.pending} "
+            f"pedidos/min={self.orders_per_min:.2f} atraso médio={self.mean_lateness:+.1f} "
+            f"pontos/min={self.score_per_min:.1f} fila média={self.mean_queue:.2f} (máx {self.max_queue})"
+        )
+
+
+class OrderMetrics:
+    """Registra entregas, expirações e o tamanho da fila a cada passo do ambiente."""
+
+    def __init__(self, initial_state: KitchenState):
+        self.start_time = initial_state.time
+        self.queue_lengths: List[int] = [len(initial_state.active_orders)]
+        self.deliveries: List[Tuple[int, Order]] = []   # (passo da entrega, pedido)
+        self.expirations: List[Tuple[int, Order]] = []  # (passo da expiração, pedido)
+
+    def record(self, before: KitchenState, after: KitchenState, expired=()):
+        for order in after.delivered_orders[len(before.delivered_orders):]:
+            self.deliveries.append((after.time, order))
+        for order in expired:
+            self.expirations.append((after.time, order))
+        self.queue_lengths.append(len(after.active_orders))
+
+    def throughput(self, state: KitchenState, stream: Optional[OrderStream] = None) -> Throughput:
+        elapsed = max(state.time - self.start_time, 1)
+        minutes = elapsed / TICKS_PER_MINUTE
+        delivered = len(self.deliveries)
+        lateness = [t - deadline(o) for t, o in self.deliveries]
+        pending = len(state.active_orders) + (len(stream.pending(state)) if stream is not None else 0)
+        return Throughput(
+            time=state.time,
+            delivered=delivered,
+            expired=len(self.expirations),
+            pending=pending,
+            orders_per_min=delivered / minutes,
+            mean_lateness=sum(lateness) / delivered if delivered else 0.0,
+            score_per_min=sum(o.score for _, o in self.deliveries) / minutes,
+            mean_queue=sum(self.queue_lengths) / len(self.queue_lengths),
+            max_queue=max(self.queue_lengths),
+        )
+
+
+def generate_orders(templates: Sequence[Order], count: int, mean_interval: float,
+                    duration: Optional[int] = None, seed: int = 0, start: int = 0) -> List[Order]:
+    """Fluxo de `count` pedidos com chegadas de Poisson.
+
+    Os intervalos entre chegadas são exponenciais com média `mean_interval` passos
+    (arredondados); cada pedido copia receita, ingredientes e pontuação de um dos
+    `templates` (sorteado) e tem prazo `duration` (ou o do template).
+    """
+    if not templates:
+        raise ValueError("generate_orders precisa de ao menos um pedido modelo")
+    rng = random.Random(seed)
+    orders = []
+    instant = float(start)
+    for i in range(count):
+        if i:
+            instant += rng.expovariate(1.0 / mean_interval) if mean_interval > 0 else 0.0
+        template = rng.choice(templates)
+        orders.append(template._replace(
+            instant=int(round(instant)),
+            duration=template.duration if duration is None else duration,
+        ))
+    return orders
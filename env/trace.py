@@ -0,0 +1,275 @@
+"""
+Rastro (trace) do episódio em JSONL, gravado em streaming, e ferramenta de replay.
+
+Formato (uma linha JSON por registro):
+    - cabeçalho: {"trace": 1, "meta": {...}, "state": <estado inicial completo>}
+      (com pedidos por chegada, também "orders": {"orders": [...], "expire": bool})
+    - um registro por passo: {"step": n, "action": "Move(1, 2)"} (ou "action": null)
+    - a cada `keyframe_interval` passos o registro do passo também traz "state",
+      o estado completo depois da ação, para o replay não precisar partir do início
+
+Como `result()` e as chegadas/expirações de pedidos (`env.orders.OrderStream`) são
+determinísticos, o estado inicial e as ações bastam para reconstruir qualquer passo.
+Cada registro é gravado e descarregado (`flush`) assim que o passo termina, então a
+memória do episódio não cresce com o número de passos e um episódio interrompido
+mantém o rastro até ali.
+
+Replay:
+    python -m env.trace out/trace.jsonl               # resumo + estado final
+    python -m env.trace out/trace.jsonl --step 42     # render do passo 42
+    python -m env.trace out/trace.jsonl --all         # todos os passos (como o render.txt)
+"""
+
+import argparse
+import json
+from typing import Optional
+
+from env.orders import OrderStream
+from models.actions import to_action
+from models.entities import Ingredient, Plate, Extinguisher, Pot, Order, Recipe, RecipeStep
+from models.states import KitchenState, LayoutIndex, PositionMap, StationState
+
+TRACE_VERSION = 1
+
+_ITEM_TYPES = {cls.__name__: cls for cls in (Ingredient, Plate, Extinguisher, Pot)}
+
+
+# Serialização do estado
+
+def _item_to_json(item):
+    if item is None:
+        return None
+    data = {"type": type(item).__name__}
+    data.update(item._asdict())
+    return data
+
+
+def _item_from_json(data):
+    if data is None:
+        return None
+    fields = {k: tuple(v) if isinstance(v, list) else v for k, v in data.items() if k != "type"}
+    return _ITEM_TYPES[data["type"]](**fields)
+
+
+def _order_to_json(order: Order):
+    data = {
+        "ingredients": list(order.ingredients),
+        "instant": order.instant,
+        "duration": order.duration,
+        "score": order.score,
+    }
+    if order.recipe:
+        data["recipe"] = {"name": order.recipe.name, "steps": [list(step) for step in order.recipe.steps]}
+    return data
+
+
+def _order_from_json(data) -> Order:
+    recipe = None
+    if "recipe" in data:
+        recipe = Recipe(
+            name=data["recipe"]["name"],
+            steps=tuple(RecipeStep(*step) for step in data["recipe"]["steps"]),
+        )
+    return Order(
+        ingredients=tuple(data["ingredients"]),
+        instant=data["instant"],
+        duration=data["duration"],
+        score=data["score"],
+        recipe=recipe,
+    )
+
+
+def _stream_to_json(stream: OrderStream) -> dict:
+    return {"orders": [_order_to_json(o) for o in stream.orders], "expire": stream.expire}
+
+
+def _stream_from_json(data) -> OrderStream:
+    return OrderStream([_order_from_json(o) for o in data["orders"]], expire=data["expire"])
+
+
+def state_to_json(state: KitchenState) -> dict:
+    return {
+        "agent_pos": list(state.agent_pos),
+        "held_item": _item_to_json(state.held_item),
+        "layout": list(state.layout),
+        "grid_objects": [[list(pos), _item_to_json(item)] for pos, item in state.grid_objects],
+        "active_orders": [_order_to_json(o) for o in state.active_orders],
+        "delivered_orders": [_order_to_json(o) for o in state.delivered_orders],
+        "stations_state": [
+            [list(pos), {
+                "progress": station.progress,
+                "is_on_fire": station.is_on_fire,
+                "content": _item_to_json(station.content),
+            }]
+            for pos, station in state.stations_state
+        ],
+        "time": state.time,
+    }
+
+
+def state_from_json(data) -> KitchenState:
+    layout_index = LayoutIndex.for_layout(data["layout"])
+    return KitchenState(
+        agent_pos=tuple(data["agent_pos"]),
+        held_item=_item_from_json(data["held_item"]),
+        layout=layout_index.layout,
+        grid_objects=PositionMap((tuple(pos), _item_from_json(item)) for pos, item in data["grid_objects"]),
+        active_orders=tuple(_order_from_json(o) for o in data["active_orders"]),
+        delivered_orders=tuple(_order_from_json(o) for o in data["delivered_orders"]),
+        stations_state=PositionMap(
+            (tuple(pos), StationState(
+                progress=station["progress"],
+                is_on_fire=station["is_on_fire"],
+                content=_item_from_json(station["content"]),
+            ))
+            for pos, station in data["stations_state"]
+        ),
+        time=data["time"],
+        layout_index=layout_index,
+    )
+
+
+def apply_action(state: KitchenState, action, orders: Optional[OrderStream] = None) -> KitchenState:
+    """Mesma transição de `KitchenEnvironment.execute_action` (sem ação só avança o tempo)."""
+    from problems.kitchen_problem import KitchenProblem
+    if action:
+        after = KitchenProblem(state).result(state, action)
+    else:
+        after = state._replace(time=state.time + 1)
+    if orders is not None:
+        after, _ = orders.advance(state, after)
+    return after
+
+
+# Gravação
+
+class TraceWriter:
+    """Grava o rastro de um episódio em `path`, um registro por passo, em streaming."""
+
+    def __init__(self, path, initial_state: KitchenState, meta: Optional[dict] = None, keyframe_interval=100,
+                 orders: Optional[OrderStream] = None):
+        self.path = path
+        self.keyframe_interval = keyframe_interval
+        self.steps = 0
+        self._file = open(path, "w", encoding="utf-8")
+        header = {"trace": TRACE_VERSION, "meta": meta or {}}
+        if orders is not None:
+            initial_state = orders.start(initial_state)
+            header["orders"] = _stream_to_json(orders)
+        header["state"] = state_to_json(initial_state)
+        self._write(header)
+
+    def _write(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n")
+        self._file.flush()
+
+    def record(self, action, state: KitchenState):
+        """Registra a ação do passo; `state` é o estado depois dela (usado nos keyframes)."""
+        self.steps += 1
+        record = {"step": self.steps, "action": str(action) if action else None}
+        if self.keyframe_interval and self.steps % self.keyframe_interval == 0:
+            record["state"] = state_to_json(state)
+        self._write(record)
+
+    def close(self):
+        if not self._file.closed:
+            self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Leitura e replay
+
+class Trace:
+    """Rastro carregado: estado inicial, ações por passo e keyframes."""
+
+    def __init__(self, meta: dict, initial: KitchenState, actions, keyframes, orders: Optional[OrderStream] = None):
+        self.meta = meta
+        self.initial = initial
+        self.actions = actions      # actions[n - 1] é a ação do passo n (None = sem ação)
+        self.keyframes = keyframes  # passo --> estado serializado
+        self.orders = orders        # linha do tempo dos pedidos (None = todos ativos desde t=0)
+
+    def __len__(self):
+        return len(self.actions)
+
+    @classmethod
+    def load(cls, path) -> "Trace":
+        with open(path, "r", encoding="utf-8") as f:
+            header = json.loads(f.readline())
+            if header.get("trace") != TRACE_VERSION:
+                raise ValueError(f"Rastro em formato desconhecido: {path}")
+            actions, keyframes = [], {}
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                actions.append(to_action(record["action"]))
+                if "state" in record:
+                    keyframes[record["step"]] = record["state"]
+        orders = _stream_from_json(header["orders"]) if "orders" in header else None
+        return cls(header["meta"], state_from_json(header["state"]), actions, keyframes, orders)
+
+    def state_at(self, step: int) -> KitchenState:
+        """Estado depois do passo `step` (0 = estado inicial), a partir do keyframe anterior."""
+        if not 0 <= step <= len(self.actions):
+            raise IndexError(f"Passo fora do rastro: {step} (0..{len(self.actions)})")
+        start = max((k for k in self.keyframes if k <= step), default=0)
+        state = state_from_json(self.keyframes[start]) if start else self.initial
+        for action in self.actions[start:step]:
+            state = apply_action(state, action, self.orders)
+        return state
+
+    def states(self):
+        """Todos os estados, do inicial ao último passo (replay único, sem keyframes)."""
+        state = self.initial
+        yield state
+        for action in self.actions:
+            state = apply_action(state, action, self.orders)
+            yield state
+
+    def render(self, state: KitchenState) -> str:
+        """Render do estado com o placar do episódio (pontuação máxima do estado inicial)."""
+        from env.kitchen_env import KitchenEnvironment
+        env = KitchenEnvironment(self.initial, orders=self.orders)
+        env.state = state
+        return env.render(quiet=True)
+
+    def render_at(self, step: int) -> str:
+        return self.render(self.state_at(step))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay de um rastro de episódio")
+    parser.add_argument("trace", nargs="?", default="out/trace.jsonl", help="Rastro JSONL (padrão: out/trace.jsonl)")
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument("--step", type=int, default=None, help="Mostra o estado depois deste passo (0 = inicial)")
+    group.add_argument("--all", action="store_true", help="Mostra todos os passos")
+    args = parser.parse_args(argv)
+
+    trace = Trace.load(args.trace)
+    if args.all:
+        for step, state in enumerate(trace.states()):
+            print("\n--- Estado Inicial ---" if step == 0 else f"\n--- Passo {step} / {len(trace)} ---")
+            print(trace.render(state), end="")
+        return
+
+    if args.step is not None:
+        try:
+            print(trace.render_at(args.step), end="")
+        except IndexError as exc:
+            parser.error(str(exc))
+        return
+
+    final = trace.state_at(len(trace))
+    meta = ", ".join(f"{k}={v}" for k, v in trace.meta.items())
+    print(f"[Replay] {args.trace}: {len(trace)} passos{f' ({meta})' if meta else ''}")
+    print(trace.render(final), end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,7 +4,10 @@ import argparse
 
 from utils import load_kitchen_data, create_initial_state
 from env.kitchen_env import KitchenEnvironment
+from env.orders import OrderStream, deadline, generate_orders
+from env.trace import TraceWriter
 from agents.kitchen_agent import KitchenAgent
+from agents.algorithms.search import SEARCH_ALGORITHMS
 from problems.kitchen_problem import KitchenProblem
 
 def _wait_for_key(prompt: str = "\n[Pressione qualquer tecla para avançar...]") -> None:  # aguarda tecla sem Enter
@@ -39,12 +42,92 @@ def run():
     parser.add_argument(
         "--auto",
         action="store_true",
-        help="Modo automático: executa sem interação, gera apenas out/render.txt",
+        help="Modo automático: executa sem interação, gera apenas out/render.txt e o rastro",
+    )
+    parser.add_argument(
+        "--quiet",
+        action="store_true",
+        help="Sem renderização (só com --auto): não gera render.txt; os passos podem ser renderizados pelo rastro",
+    )
+    parser.add_argument(
+        "--render-every",
+        type=int,
+        default=1,
+        metavar="N",
+        help="Com --auto, renderiza no render.txt só a cada N passos (e o estado final)",
+    )
+    parser.add_argument(
+        "--trace",
+        default=os.path.join("out", "trace.jsonl"),
+        help="Rastro JSONL do episódio, para replay com `python -m env.trace` (padrão: out/trace.jsonl)",
+    )
+    parser.add_argument(
+        "--algorithm",
+        choices=sorted(SEARCH_ALGORITHMS),
+        default="astar",
+        help="Algoritmo de busca do agente (padrão: astar; ida_star e rbfs usam memória limitada)",
+    )
+    parser.add_argument(
+        "--table-size",
+        type=int,
+        default=None,
+        help="Tamanho da tabela de transposição do IDA* (padrão: 100000 estados)",
+    )
+    parser.add_argument(
+        "--tick-budget-ms",
+        type=float,
+        default=None,
+        help="Orçamento de planejamento por passo, em ms (exige --algorithm ara_star)",
+    )
+    parser.add_argument(
+        "--macro-actions",
+        action="store_true",
+        help="Busca hierárquica: macro-ações GoTo até as estações, expandidas em Moves antes de executar",
+    )
+    parser.add_argument(
+        "--time-skip",
+        action="store_true",
+        help="Busca com WaitUntil: uma ação salta até o próximo evento de fogão, pia ou panela",
+    )
+    parser.add_argument(
+        "--timed-orders",
+        action="store_true",
+        help="Pedidos chegam em `instant` e expiram em `instant + duration` (padrão: todos ativos desde o início)",
+    )
+    parser.add_argument(
+        "--order-stream",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Fluxo contínuo de N pedidos sorteados dos pedidos do layout (implica --timed-orders)",
+    )
+    parser.add_argument(
+        "--order-interval",
+        type=float,
+        default=40.0,
+        help="Intervalo médio entre chegadas do --order-stream, em passos (padrão: 40)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=0,
+        help="Semente do --order-stream (padrão: 0)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Mede actions/result/goal_test/h em cada busca e mostra um resumo ao final",
     )
 
     args = parser.parse_args()
     layout_path = args.layout
     interactive = not args.auto
+    if interactive and (args.quiet or args.render_every != 1):
+        parser.error("--quiet e --render-every só se aplicam a --auto")
+    if args.render_every < 1:
+        parser.error("--render-every deve ser pelo menos 1")
+    # 0 = sem renderização; o rastro continua sendo gravado e renderiza qualquer passo depois
+    render_every = 0 if args.quiet else args.render_every
 
     # Diretório de saída dos renders
     out_dir = "out"
@@ -53,56 +136,90 @@ def run():
 
     # 1. Lê o layout JSON e constrói os pedidos
     layout, orders, max_steps = load_kitchen_data(layout_path)
+    order_stream = None
+    if args.order_stream is not None:
+        if args.order_stream < 1 or args.order_interval < 0:
+            parser.error("--order-stream deve ser pelo menos 1 e --order-interval não pode ser negativo")
+        orders = generate_orders(orders, args.order_stream, args.order_interval, seed=args.seed)
+        # O episódio dura pelo menos até o prazo do último pedido do fluxo
+        max_steps = max(max_steps, max(deadline(o) for o in orders))
+    if args.timed_orders or args.order_stream is not None:
+        order_stream = OrderStream(orders)
     initial_state = create_initial_state(layout, orders)
-
-    # 2. Inicializa o ambiente, o agente com sua heurística e registra o agente
-    env = KitchenEnvironment(initial_state)
+    if order_stream is not None:
+        initial_state = order_stream.start(initial_state)
+
+    # 2. Inicializa o ambiente (gravando o rastro), o agente com sua heurística e registra o agente
+    trace_dir = os.path.dirname(args.trace)
+    if trace_dir:
+        os.makedirs(trace_dir, exist_ok=True)
+    trace = TraceWriter(
+        args.trace, initial_state, meta={"layout": layout_path, "algorithm": args.algorithm, "max_steps": max_steps},
+        orders=order_stream,
+    )
+    env = KitchenEnvironment(initial_state, trace=trace, orders=order_stream)
     problem = KitchenProblem(initial_state)
-    agent = KitchenAgent(heuristic=problem.h)
+    search_options = {}
+    if args.table_size is not None:
+        if args.algorithm != "ida_star":
+            parser.error("--table-size só se aplica a --algorithm ida_star")
+        search_options["table_size"] = args.table_size
+    if args.tick_budget_ms is not None and args.algorithm != "ara_star":
+        parser.error("--tick-budget-ms só se aplica a --algorithm ara_star")
+    if args.tick_budget_ms is not None and (args.macro_actions or args.time_skip):
+        parser.error("--tick-budget-ms não se aplica a --macro-actions nem a --time-skip")
+    agent = KitchenAgent(
+        heuristic=problem.h,
+        algorithm=args.algorithm,
+        search_options=search_options,
+        profile=args.profile,
+        tick_budget_ms=args.tick_budget_ms,
+        macro_actions=args.macro_actions,
+        time_skip=args.time_skip,
+    )
     env.add_thing(agent)
 
-    # 3. Renderiza e registra o estado inicial
-    render_lines = [f"--- Render Log ({layout_path}) ---\n", "\n--- Estado Inicial ---\n"]
-    initial_render = env.render(quiet=True)
-    render_lines.append(initial_render)
+    # 3. Renderiza e registra o estado inicial (o log é gravado passo a passo, não acumulado)
+    render_file = None
+    if render_every:
+        render_file = open(render_path, "w", encoding="utf-8")
+        render_file.write(f"--- Render Log ({layout_path}) ---\n")
+        render_file.write("\n--- Estado Inicial ---\n")
+        initial_render = env.render(out=render_file, quiet=True)
 
     if interactive:
         _clear_screen()  # limpa o terminal antes de exibir
         print(f"=== Mini-Overcooked | Nível: {layout_path} ===")
         print("\n--- Estado Inicial ---")
         print(initial_render)
-        # Salva o estado inicial como step 000
-        step_path = os.path.join(out_dir, "step_000.txt")
-        with open(step_path, "w", encoding="utf-8") as sf:
-            sf.write("--- Estado Inicial ---\n")
-            sf.write(initial_render)
         _wait_for_key()
 
     # 4. Loop principal da simulação
     for step in range(1, max_steps + 1):
         env.step()
+        done = env.is_done()
 
-        step_render = env.render(quiet=True)
-        step_header = f"\n--- Passo {step} / {max_steps} ---\n"
-        render_lines.append(step_header)
-        render_lines.append(step_render)
+        # Renderiza só quando o texto vai ser usado: a cada N passos e no estado final
+        if render_file is not None and (step % render_every == 0 or done or step == max_steps):
+            render_file.write(f"\n--- Passo {step} / {max_steps} ---\n")
+            step_render = env.render(out=render_file, quiet=True)
+            render_file.flush()
 
         if interactive:
             _clear_screen()
             print(f"=== Mini-Overcooked | Nível: {layout_path} ===")
             print(f"--- Passo {step} / {max_steps} ---")
             print(step_render)
-            # Salva o estado atual em arquivo individual
-            step_path = os.path.join(out_dir, f"step_{step:03d}.txt")
-            with open(step_path, "w", encoding="utf-8") as sf:
-                sf.write(f"--- Passo {step} ---\n")
-                sf.write(step_render)
 
         # Verifica se o objetivo foi alcançado
-        if len(env.state.active_orders) == 0:
-            msg = "\n[Simulação] Todos os pedidos entregues! Objetivo alcançado."
+        if done:
+            if env.metrics.expirations:
+                msg = "\n[Simulação] Sem pedidos restantes (alguns expiraram)."
+            else:
+                msg = "\n[Simulação] Todos os pedidos entregues! Objetivo alcançado."
             print(msg)
-            render_lines.append(msg + "\n")
+            if render_file is not None:
+                render_file.write(msg + "\n")
             break
 
         if interactive:
@@ -110,13 +227,24 @@ def run():
     else:
         msg = "\n[Simulação] Limite de passos atingido."
         print(msg)
-        render_lines.append(msg + "\n")
-
-    # 5. Salva o log completo em render.txt
-    with open(render_path, "w", encoding="utf-8") as rf:
-        rf.write("".join(render_lines))
-
-    print(f"\n[Simulação] Finalizada. Render salvo em {render_path}.")
+        if render_file is not None:
+            render_file.write(msg + "\n")
+
+    # 5. Fecha o log e o rastro (ambos já estão em disco até o último passo)
+    trace.close()
+    if render_file is not None:
+        render_file.close()
+        print(f"\n[Simulação] Finalizada. Render salvo em {render_path}; rastro em {args.trace}.")
+    else:
+        print(f"\n[Simulação] Finalizada sem renderização; rastro em {args.trace} (replay: python -m env.trace).")
+    if order_stream is not None:
+        print(f"[Simulação] Vazão: {env.throughput().summary()}")
+    if args.profile:
+        print(f"[Simulação] Buscas do episódio: {agent.total_stats.summary()}")
+    if args.profile or args.tick_budget_ms is not None:
+        print(f"[Simulação] Latência por passo: {agent.latency.summary()}")
+        for line in agent.latency.lines():
+            print(f"    {line}")
 
 
 if __name__ == "__main__":
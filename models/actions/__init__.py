@@ -0,0 +1,35 @@
+from .kitchen_action import (
+    KitchenAction,
+    ActionList,
+    to_action,
+    MOVE,
+    PICK_UP,
+    PUT_DOWN,
+    PUT_IN_POT,
+    SERVE_FROM_POT,
+    DELIVER,
+    CHOP,
+    WAIT,
+    EXTINGUISH,
+    GOTO,
+    WAIT_UNTIL,
+    OPCODES,
+)
+
+__all__ = [
+    "KitchenAction",
+    "ActionList",
+    "to_action",
+    "MOVE",
+    "PICK_UP",
+    "PUT_DOWN",
+    "PUT_IN_POT",
+    "SERVE_FROM_POT",
+    "DELIVER",
+    "CHOP",
+    "WAIT",
+    "EXTINGUISH",
+    "GOTO",
+    "WAIT_UNTIL",
+    "OPCODES",
+]
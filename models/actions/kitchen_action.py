@@ -0,0 +1,98 @@
+import re
+from typing import NamedTuple, Optional, Union
+
+# Opcodes das ações. São strings internadas (comparação por identidade é
+# barata) e coincidem com o nome usado na forma textual legada.
+MOVE = "Move"
+PICK_UP = "PickUp"
+PUT_DOWN = "PutDown"
+PUT_IN_POT = "PutInPot"
+SERVE_FROM_POT = "ServeFromPot"
+DELIVER = "Deliver"
+CHOP = "Chop"
+WAIT = "Wait"
+EXTINGUISH = "Extinguish"
+# Macro-ação do modo hierárquico: caminho mínimo até o tile (x, y), expandido em `Move`s
+GOTO = "GoTo"
+# Salto no tempo: espera na estação (x, y) até o próximo evento de relógio, expandido em `Wait`s
+WAIT_UNTIL = "WaitUntil"
+
+OPCODES = (MOVE, PICK_UP, PUT_DOWN, PUT_IN_POT, SERVE_FROM_POT, DELIVER, CHOP, WAIT, EXTINGUISH, GOTO, WAIT_UNTIL)
+
+_ACTION_RE = re.compile(r"(\w+)\((.*)\)")
+
+
+class KitchenAction(NamedTuple):
+    """Ação compacta do agente: opcode + coordenadas (+ item, quando houver).
+
+    Substitui as strings como ``"PickUp(Onion, RAW, 2, 3)"`` no caminho quente
+    da busca: `actions()` cria tuplas e `result()` despacha pelo opcode, sem
+    formatar nem fazer parsing de texto. A forma textual existe apenas para
+    renderização/logs (`str(action)`) e para compatibilidade com planos em
+    string (`KitchenAction.parse`).
+
+    Igualdade e hash são os da tupla: uma ação nunca compara igual à sua forma
+    textual. Planos em string são convertidos na borda (`to_action`/`parse`).
+    """
+    op: str
+    x: int
+    y: int
+    item: Optional[str] = None        # nome do item (PickUp, PutDown, PutInPot)
+    item_state: Optional[str] = None  # estado do item (PickUp, PutDown) ou "trash"
+
+    @property
+    def pos(self):
+        return (self.x, self.y)
+
+    def __str__(self) -> str:
+        if self.op in (PICK_UP, PUT_DOWN):
+            return f"{self.op}({self.item}, {self.item_state}, {self.x}, {self.y})"
+        if self.op == PUT_IN_POT:
+            return f"{self.op}({self.item}, {self.x}, {self.y})"
+        return f"{self.op}({self.x}, {self.y})"
+
+    __repr__ = __str__
+
+    @classmethod
+    def parse(cls, text: str) -> Optional["KitchenAction"]:
+        """Converte a forma textual legada em uma ação. Retorna None se inválida."""
+        match = _ACTION_RE.match(text)
+        if not match:
+            return None
+        op, params_str = match.groups()
+        params = [p.strip() for p in params_str.split(",")]
+        try:
+            if op in (PICK_UP, PUT_DOWN):
+                return cls(op, int(params[2]), int(params[3]), params[0], params[1])
+            if op == PUT_IN_POT:
+                return cls(op, int(params[1]), int(params[2]), params[0])
+            return cls(op, int(params[0]), int(params[1]))
+        except (IndexError, ValueError):
+            return None
+
+
+def to_action(action: Union[KitchenAction, str, None]) -> Optional[KitchenAction]:
+    """Camada de conversão: aceita `KitchenAction` ou a forma textual legada."""
+    if action is None or isinstance(action, KitchenAction):
+        return action
+    return KitchenAction.parse(action)
+
+
+class ActionList(list):
+    """Lista de `KitchenAction`s devolvida por `KitchenProblem.actions()`.
+
+    Camada de conversão para o código que ainda trata ações como texto: `in`, `index`
+    e `count` também aceitam a forma textual (``"Move(1, 2)" in acoes``), convertida
+    com `to_action`. Os elementos continuam sendo `KitchenAction`s.
+    """
+
+    __slots__ = ()
+
+    def __contains__(self, action) -> bool:
+        return list.__contains__(self, to_action(action))
+
+    def index(self, action, *args) -> int:
+        return list.index(self, to_action(action), *args)
+
+    def count(self, action) -> int:
+        return list.count(self, to_action(action))
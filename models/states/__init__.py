@@ -1,9 +1,14 @@
 
 from .kitchen_state import KitchenState
-from .station_state import StationState
+from .layout_index import LayoutIndex
+from .position_map import PositionMap
+from .station_state import StationState, ActiveTimer
 
 __all__ = [
 	"KitchenState",
+	"LayoutIndex",
+	"PositionMap",
 	"StationState",
+	"ActiveTimer",
 ]
 
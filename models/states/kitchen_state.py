@@ -1,63 +1,120 @@
 from typing import NamedTuple, Optional, Tuple, Union
 
 from models.entities import Order, Ingredient, Plate, Extinguisher, Pot
+from models.states.layout_index import LayoutIndex
+from models.states.position_map import PositionMap
 from models.states.station_state import StationState
 
 KitchenItem = Union[Ingredient, Plate, Extinguisher, Pot]
 
 
-class KitchenState(NamedTuple):
+class StateCache:
+    """Valores derivados de um `KitchenState`, calculados na primeira consulta (None até lá)."""
+
+    __slots__ = ("hash", "timers", "fingerprint")
+
+    def __init__(self):
+        self.hash = None
+        self.timers = None
+        self.fingerprint = None
+
+
+class _KitchenStateFields(NamedTuple):
     agent_pos: Tuple[int, int]
     held_item: Optional[KitchenItem]
     layout: Tuple[str, ...] # Armazena o grid estático (W, ., C, D, etc)
-    # Representado como ((x, y), KitchenItem) para itens dinâmicos sobre bancadas
-    grid_objects: Tuple[Tuple[Tuple[int, int], KitchenItem], ...]
+    # Mapeamento (x, y) --> KitchenItem para itens dinâmicos sobre bancadas
+    grid_objects: PositionMap
     active_orders: Tuple[Order, ...]
     delivered_orders: Tuple[Order, ...]
     # Mapeamento de (x, y) para estado da estação (fogão, tábua de corte)
-    stations_state: Tuple[Tuple[Tuple[int, int], StationState], ...]
+    stations_state: PositionMap
     time: int = 0
+    # Índice estático do level, compartilhado (por identidade) por todos os estados
+    layout_index: Optional[LayoutIndex] = None
+    # Caches do estado (ver KitchenState); cada estado tem o seu, nunca copiado
+    cache: Optional[StateCache] = None
 
-    def _search_key(self):
-        sorted_objects = tuple(sorted(self.grid_objects, key=lambda x: x[0]))
-        sorted_stations = tuple(sorted(self.stations_state, key=lambda x: x[0]))
 
+class KitchenState(_KitchenStateFields):
+    """Estado imutável da cozinha.
+
+    `grid_objects` e `stations_state` são `PositionMap`s: iteram em ordem
+    canônica, têm hash incremental e busca O(1) por posição, então estados
+    iguais comparam sem reordenar nada. O hash do estado ignora `time` e é
+    calculado uma única vez por estado, já que é consultado várias vezes por nó
+    no `explored` da busca.
+
+    Os valores derivados ficam no `StateCache` do campo `cache` (a classe não tem
+    `__dict__`): o hash, os relógios ativos (`KitchenProblem.active_timers`) e a
+    impressão digital Zobrist (`models.states.zobrist`). `result()` deriva os dois
+    últimos do estado pai; os estados criados de outro jeito os calculam na primeira
+    consulta. O cache não entra na igualdade, e `_replace`, cópias e a serialização
+    começam com um vazio.
+    """
+
+    __slots__ = ()
+
+    def __new__(cls, *args, cache=None, **kwargs):
+        return super().__new__(cls, *args, cache=StateCache() if cache is None else cache, **kwargs)
+
+    def _replace(self, **changes):
+        changes["cache"] = StateCache()
+        return super()._replace(**changes)
+
+    def _search_key(self):
         return (
             self.agent_pos,
             self.held_item,
             self.layout,
-            sorted_objects,
+            self.grid_objects,
             self.active_orders,
             self.delivered_orders,
-            sorted_stations,
+            self.stations_state,
         )
 
     def __hash__(self):
-        return hash(self._search_key())
+        cache = self.cache
+        if cache.hash is None:
+            cache.hash = hash(self._search_key())
+        return cache.hash
 
     def __eq__(self, other):
+        if self is other:
+            return True
         if not isinstance(other, KitchenState):
             return False
+        if hash(self) != hash(other):
+            return False
         return self._search_key() == other._search_key()
 
+    def __ne__(self, other):
+        return not self == other
+
+    def __getnewargs__(self):
+        # Sem o cache (o hash de strings varia entre processos): o estado desserializado ganha um vazio
+        return tuple(self)[:-1]
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={value!r}" for name, value in zip(self._fields[:-1], self))
+        return f"KitchenState({fields})"
+
     def get_layout_at(self, x: int, y: int) -> str:
+        if self.layout_index is not None:
+            return self.layout_index.tile_at(x, y)
         if 0 <= y < len(self.layout) and 0 <= x < len(self.layout[0]):
             return self.layout[y][x]
         return 'W' # Fora dos limites é parede
 
-    def get_object_at(self, pos: Tuple[int, int]) -> Optional[Ingredient]:
-        for obj_pos, obj in self.grid_objects:
-            if obj_pos == pos:
-                return obj
-        return None
+    def get_object_at(self, pos: Tuple[int, int]) -> Optional[KitchenItem]:
+        return self.grid_objects.get(pos)
 
     def get_station_state_at(self, pos: Tuple[int, int]) -> Optional[StationState]:
-        for s_pos, s_state in self.stations_state:
-            if s_pos == pos:
-                return s_state
-        return None
+        return self.stations_state.get(pos)
 
     def is_impassable(self, x: int, y: int) -> bool:
+        if self.layout_index is not None:
+            return not self.layout_index.is_passable(x, y)
         return self.get_layout_at(x, y) != '.'
 
     def __lt__(self, other):
@@ -0,0 +1,285 @@
+from collections import OrderedDict, deque
+from typing import Dict, List, Tuple
+
+from models.actions import KitchenAction, MOVE, GOTO
+
+Position = Tuple[int, int]
+
+# Ordem de vizinhança usada por `KitchenProblem.actions()`. A ordem importa:
+# ela define a ordem dos sucessores e, portanto, o desempate na busca.
+MOVE_OFFSETS = ((0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (-1, 1), (1, -1), (-1, -1))  # vizinhança-8
+INTERACTION_OFFSETS = ((0, 1), (0, -1), (1, 0), (-1, 0))  # vizinhança-4
+
+# C=Balcão, S=Fogão, T/B=Tábua de Corte, D=Entrega, W=Pia,
+# G=Lixeira, E=Extintor, P=Prato, O=Fonte Cebola,
+# V=Fonte Tomate, K=Panela
+INTERACTIVE_TILES = frozenset(('C', 'S', 'T', 'B', 'D', 'W', 'G', 'E', 'P', 'O', 'V', 'K'))
+
+# Fontes infinitas de ingredientes (tile --> ingrediente)
+SOURCE_TILES = {'O': 'Onion', 'V': 'Tomato', 'M': 'Meat', 'B': 'Bread', 'L': 'Lettuce'}
+
+OUT_OF_BOUNDS_TILE = 'W'  # Fora dos limites é parede
+
+UNREACHABLE = float("inf")
+
+# Índices guardados por `LayoutIndex.for_layout` (os menos usados recentemente saem primeiro)
+MAX_CACHED_LAYOUTS = 32
+
+
+class LayoutIndex:
+    """Índice estático de um level, construído uma única vez por layout.
+
+    Todos os `KitchenState` de um mesmo level referenciam a mesma instância
+    (por identidade), de modo que `actions()`, `result()` e `h()` consultam
+    posições de estações, passabilidade e vizinhos em O(1), sem varrer o
+    grid a cada nó expandido.
+
+    `for_layout` reaproveita os índices dos últimos `MAX_CACHED_LAYOUTS` layouts (LRU);
+    as tabelas de distâncias e caminhos e as chaves Zobrist de cada índice são liberadas
+    com ele.
+    """
+
+    __slots__ = (
+        "layout", "width", "height", "passable", "tiles_by_type",
+        "stoves", "boards", "sinks", "pots", "deliveries", "counters", "sources",
+        "return_counters", "approach_cells", "_move_actions", "_interaction_neighbors", "_distance_tables",
+        "_paths", "_goto_actions", "zobrist_keys",
+    )
+
+    _cache: "OrderedDict[Tuple[str, ...], LayoutIndex]" = OrderedDict()
+
+    def __init__(self, layout: Tuple[str, ...]):
+        self.layout = tuple(layout)
+        self.height = len(self.layout)
+        self.width = len(self.layout[0]) if self.layout else 0
+
+        # Bitmap de passabilidade indexado por y * width + x
+        self.passable = tuple(char == '.' for row in self.layout for char in row)
+
+        tiles_by_type: Dict[str, List[Position]] = {}
+        for y, row in enumerate(self.layout):
+            for x, char in enumerate(row):
+                tiles_by_type.setdefault(char, []).append((x, y))
+        self.tiles_by_type = {char: tuple(positions) for char, positions in tiles_by_type.items()}
+
+        # Estações agrupadas por tipo
+        self.stoves = self.positions('S')
+        self.boards = self.positions('T', 'B')
+        self.sinks = self.positions('W')
+        self.pots = self.positions('K')
+        self.deliveries = self.positions('D')
+        self.counters = self.positions('C')
+        self.sources: Dict[str, Tuple[Position, ...]] = {}
+        for tile, ingredient in SOURCE_TILES.items():
+            self.sources[ingredient] = self.sources.get(ingredient, ()) + self.positions(tile)
+
+        # Onde surgem os pratos sujos após uma entrega: tiles P primeiro, depois balcões C.
+        # Só balcões alcançáveis (com um piso vizinho): um prato num balcão cercado se perderia
+        self.return_counters = tuple(
+            (x, y) for x, y in self.positions('P') + self.positions('C')
+            if any(self.is_passable(x + dx, y + dy) for dx, dy in INTERACTION_OFFSETS)
+        )
+
+        self._move_actions: Dict[Position, Tuple[KitchenAction, ...]] = {}
+        self._interaction_neighbors: Dict[Position, Tuple[Tuple[int, int, str], ...]] = {}
+        self._distance_tables: Dict[Position, Tuple[float, ...]] = {}
+        self._paths: Dict[Tuple[Position, Position], Tuple[Position, ...]] = {}
+        self._goto_actions: Dict[Position, Tuple[KitchenAction, ...]] = {}
+        # Componente de estado --> chave de 64 bits (preenchido por `models.states.zobrist`)
+        self.zobrist_keys: Dict[tuple, int] = {}
+        for pos, is_passable in zip(self._all_positions(), self.passable):
+            if is_passable:
+                self._move_actions[pos] = self._build_move_actions(pos)
+                self._interaction_neighbors[pos] = self._build_interaction_neighbors(pos)
+
+        # Tiles caminháveis de onde se interage com alguma estação: os destinos dos `GoTo`
+        self.approach_cells = tuple(pos for pos, neighbors in self._interaction_neighbors.items() if neighbors)
+
+    @classmethod
+    def for_layout(cls, layout) -> "LayoutIndex":
+        """Retorna o índice do layout, reaproveitando o já construído para ele."""
+        key = tuple(layout)
+        index = cls._cache.get(key)
+        if index is None:
+            index = cls._cache[key] = cls(key)
+            if len(cls._cache) > MAX_CACHED_LAYOUTS:
+                cls._cache.popitem(last=False)
+        else:
+            cls._cache.move_to_end(key)
+        return index
+
+    @classmethod
+    def clear_cache(cls):
+        """Esquece os índices guardados (os estados vivos continuam com os seus)."""
+        cls._cache.clear()
+
+    def __repr__(self) -> str:
+        return f"LayoutIndex({self.width}x{self.height})"
+
+    # Consultas de tiles
+
+    def tile_at(self, x: int, y: int) -> str:
+        if 0 <= y < self.height and 0 <= x < self.width:
+            return self.layout[y][x]
+        return OUT_OF_BOUNDS_TILE
+
+    def is_passable(self, x: int, y: int) -> bool:
+        if 0 <= y < self.height and 0 <= x < self.width:
+            return self.passable[y * self.width + x]
+        return False
+
+    def positions(self, *tiles: str) -> Tuple[Position, ...]:
+        """Posições (em ordem de varredura por linha) dos tiles informados."""
+        if len(tiles) == 1:
+            return self.tiles_by_type.get(tiles[0], ())
+        return tuple(sorted(
+            (pos for tile in tiles for pos in self.tiles_by_type.get(tile, ())),
+            key=lambda p: (p[1], p[0]),
+        ))
+
+    # Vizinhança pré-computada
+
+    def move_actions(self, pos: Position) -> Tuple[KitchenAction, ...]:
+        """Ações `Move` válidas a partir de `pos` (vizinhança-8 passável)."""
+        actions = self._move_actions.get(pos)
+        if actions is None:
+            actions = self._build_move_actions(pos)
+        return actions
+
+    def interaction_neighbors(self, pos: Position) -> Tuple[Tuple[int, int, str], ...]:
+        """Tiles interativos (x, y, tile) na vizinhança-4 de `pos`."""
+        neighbors = self._interaction_neighbors.get(pos)
+        if neighbors is None:
+            neighbors = self._build_interaction_neighbors(pos)
+        return neighbors
+
+    # Distâncias reais (BFS na vizinhança-8 caminhável)
+
+    def distance(self, source: Position, target: Position) -> float:
+        """Número de `Move`s para, partindo de `source`, poder interagir com `target`.
+
+        Se `target` é uma estação (não caminhável), conta os passos até um
+        tile caminhável vizinho-4 dela (de onde a interação é possível); se é
+        caminhável, os passos até o próprio tile. Quando `source` é uma
+        estação, parte do melhor tile caminhável vizinho-4 dela — assim a
+        mesma função mede agente --> estação e estação --> estação.
+        Retorna `UNREACHABLE` (infinito) quando não há caminho.
+        """
+        x, y = source
+        if not (0 <= y < self.height and 0 <= x < self.width):
+            return UNREACHABLE
+        return self.distance_table(target)[y * self.width + x]
+
+    def distance_table(self, target: Position) -> Tuple[float, ...]:
+        """Tabela (indexada por y * width + x) de `distance(pos, target)` para todo tile."""
+        table = self._distance_tables.get(target)
+        if table is None:
+            table = self._distance_tables[target] = self._build_distance_table(target)
+        return table
+
+    # Caminhos mínimos (macro-ações `GoTo`)
+
+    def path(self, source: Position, target: Position) -> Tuple[Position, ...]:
+        """Tiles visitados (sem `source`) num caminho mínimo de `source` ao tile caminhável `target`.
+
+        Desce a tabela de distâncias de `target`, escolhendo a cada passo o primeiro
+        vizinho na ordem de `MOVE_OFFSETS`, então o caminho é sempre o mesmo para o
+        mesmo par. Os caminhos ficam guardados por par (origem, destino).
+        Retorna () se `source == target` ou se não há caminho.
+        """
+        key = (source, target)
+        path = self._paths.get(key)
+        if path is None:
+            path = self._paths[key] = self._build_path(source, target)
+        return path
+
+    def goto_actions(self, pos: Position) -> Tuple[KitchenAction, ...]:
+        """`GoTo` de `pos` para cada tile de aproximação alcançável (exceto o próprio `pos`)."""
+        actions = self._goto_actions.get(pos)
+        if actions is None:
+            actions = self._goto_actions[pos] = tuple(
+                KitchenAction(GOTO, x, y) for x, y in self.approach_cells
+                if (x, y) != pos and self.distance(pos, (x, y)) != UNREACHABLE
+            )
+        return actions
+
+    def _build_path(self, source: Position, target: Position) -> Tuple[Position, ...]:
+        table = self.distance_table(target)
+        width = self.width
+        d = self.distance(source, target)
+        if d == UNREACHABLE:
+            return ()
+        path = []
+        pos = source
+        while d > 0:
+            for action in self.move_actions(pos):
+                if table[action.y * width + action.x] == d - 1:
+                    pos = (action.x, action.y)
+                    break
+            path.append(pos)
+            d -= 1
+        return tuple(path)
+
+    def _build_distance_table(self, target: Position) -> Tuple[float, ...]:
+        width = self.width
+        dist = [UNREACHABLE] * (width * self.height)
+
+        # Sementes: o próprio alvo (se caminhável) ou os tiles de onde se interage com ele
+        tx, ty = target
+        if self.is_passable(tx, ty):
+            seeds = [target]
+        else:
+            seeds = [
+                (tx + dx, ty + dy) for dx, dy in INTERACTION_OFFSETS
+                if self.is_passable(tx + dx, ty + dy)
+            ]
+
+        queue = deque()
+        for sx, sy in seeds:
+            dist[sy * width + sx] = 0
+            queue.append((sx, sy))
+
+        # A vizinhança-8 é simétrica, então a BFS a partir do alvo dá a distância até ele
+        while queue:
+            pos = queue.popleft()
+            d = dist[pos[1] * width + pos[0]] + 1
+            for action in self._move_actions[pos]:
+                i = action.y * width + action.x
+                if d < dist[i]:
+                    dist[i] = d
+                    queue.append((action.x, action.y))
+
+        # Tiles não caminháveis (estações) herdam a distância do melhor vizinho-4 caminhável
+        for y in range(self.height):
+            for x in range(width):
+                i = y * width + x
+                if not self.passable[i]:
+                    dist[i] = min(
+                        (dist[(y + dy) * width + x + dx] for dx, dy in INTERACTION_OFFSETS
+                         if self.is_passable(x + dx, y + dy)),
+                        default=UNREACHABLE,
+                    )
+        return tuple(dist)
+
+    def _all_positions(self):
+        for y in range(self.height):
+            for x in range(self.width):
+                yield (x, y)
+
+    def _build_move_actions(self, pos: Position) -> Tuple[KitchenAction, ...]:
+        x, y = pos
+        return tuple(
+            KitchenAction(MOVE, x + dx, y + dy)
+            for dx, dy in MOVE_OFFSETS
+            if self.is_passable(x + dx, y + dy)
+        )
+
+    def _build_interaction_neighbors(self, pos: Position) -> Tuple[Tuple[int, int, str], ...]:
+        x, y = pos
+        neighbors = []
+        for dx, dy in INTERACTION_OFFSETS:
+            sx, sy = x + dx, y + dy
+            tile = self.tile_at(sx, sy)
+            if tile in INTERACTIVE_TILES:
+                neighbors.append((sx, sy, tile))
+        return tuple(neighbors)
@@ -0,0 +1,114 @@
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+
+Position = Tuple[int, int]
+
+
+def canonical_order(entries) -> tuple:
+    """Ordena pares ((x, y), valor) por linha (y, x), a ordem canônica do estado."""
+    return tuple(sorted(entries, key=lambda entry: (entry[0][1], entry[0][0])))
+
+
+class PositionMap:
+    """Mapeamento imutável e hashable de posição (x, y) --> item.
+
+    Substitui as tuplas de pares ``((x, y), item)`` de `KitchenState`:
+    a busca por posição (`get`) é O(1) e o hash é mantido de forma
+    incremental — `set`/`remove`/`update` derivam o hash do mapa novo a
+    partir do hash do mapa pai e apenas das entradas alteradas.
+
+    Continua se comportando como a antiga sequência de pares: a iteração,
+    `len()` e a indexação inteira (``mapa[0]``) usam a ordem canônica
+    (por linha), então código como ``for pos, item in state.grid_objects``
+    não muda. Mapas que não mudam em `result()` são compartilhados entre o
+    estado pai e o filho, sem cópia.
+    """
+
+    __slots__ = ("_data", "_hash", "_items")
+
+    def __init__(self, entries: Iterable[Tuple[Position, Any]] = ()):
+        self._data: Dict[Position, Any] = dict(entries)
+        self._hash = 0
+        for entry in self._data.items():
+            self._hash ^= hash(entry)
+        self._items: Optional[Tuple[Tuple[Position, Any], ...]] = None
+
+    @classmethod
+    def _derived(cls, data: Dict[Position, Any], hash_value: int) -> "PositionMap":
+        new_map = cls.__new__(cls)
+        new_map._data = data
+        new_map._hash = hash_value
+        new_map._items = None
+        return new_map
+
+    # Consulta
+
+    def get(self, pos: Position, default: Optional[Any] = None) -> Optional[Any]:
+        return self._data.get(pos, default)
+
+    def __contains__(self, pos: Position) -> bool:
+        return pos in self._data
+
+    def items(self) -> Tuple[Tuple[Position, Any], ...]:
+        """Pares (posição, item) em ordem canônica (calculada uma vez por mapa)."""
+        if self._items is None:
+            self._items = canonical_order(self._data.items())
+        return self._items
+
+    def positions(self) -> Iterator[Position]:
+        return iter(self._data)
+
+    def __iter__(self) -> Iterator[Tuple[Position, Any]]:
+        return iter(self.items())
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __getitem__(self, index: int) -> Tuple[Position, Any]:
+        return self.items()[index]
+
+    # Atualizações persistentes (retornam um novo mapa)
+
+    def set(self, pos: Position, value: Any) -> "PositionMap":
+        return self.update({pos: value})
+
+    def remove(self, pos: Position) -> "PositionMap":
+        if pos not in self._data:
+            return self
+        data = dict(self._data)
+        hash_value = self._hash ^ hash((pos, data.pop(pos)))
+        return self._derived(data, hash_value)
+
+    def update(self, changes: Dict[Position, Any]) -> "PositionMap":
+        if not changes:
+            return self
+        data = dict(self._data)
+        hash_value = self._hash
+        for pos, value in changes.items():
+            if pos in data:
+                hash_value ^= hash((pos, data[pos]))
+            data[pos] = value
+            hash_value ^= hash((pos, value))
+        return self._derived(data, hash_value)
+
+    # Igualdade e hash
+
+    def __hash__(self) -> int:
+        return self._hash
+
+    def __eq__(self, other) -> bool:
+        if self is other:
+            return True
+        if not isinstance(other, PositionMap):
+            return NotImplemented
+        return self._hash == other._hash and self._data == other._data
+
+    def __ne__(self, other) -> bool:
+        result = self.__eq__(other)
+        return result if result is NotImplemented else not result
+
+    def __repr__(self) -> str:
+        return f"PositionMap({list(self.items())!r})"
+
+    def __reduce__(self):
+        # O hash depende do processo (hash de strings), então é recalculado ao desserializar
+        return (PositionMap, (self.items(),))
@@ -1,4 +1,4 @@
-from typing import NamedTuple, Optional
+from typing import NamedTuple, Optional, Tuple
 
 from models.entities.ingredient import Ingredient
 
@@ -6,4 +6,11 @@ from models.entities.ingredient import Ingredient
 class StationState(NamedTuple):
     progress: int = 0
     is_on_fire: bool = False
-    content: Optional[Ingredient] = None
\ No newline at end of file
+    content: Optional[Ingredient] = None
+
+
+class ActiveTimer(NamedTuple):
+    """Estação com relógio correndo (fogão, pia ou panela) e os ticks até o próximo evento."""
+    pos: Tuple[int, int]
+    kind: str           # tile da estação: 'S', 'W' ou 'K'
+    remaining: int
@@ -0,0 +1,99 @@
+"""
+Impressões digitais Zobrist (64 bits) do `KitchenState`.
+
+A impressão é o XOR das chaves de cada componente que entra na igualdade dos estados
+(`KitchenState._search_key`, sem o layout, que é o mesmo em toda a busca):
+
+    - posição do agente e item na mão
+    - cada objeto sobre os balcões e cada estado de estação, com a posição
+    - cada pedido ativo e entregue, com o índice na tupla
+
+Cada componente distinto ganha, na primeira vez em que aparece, uma chave de 64 bits
+sorteada (gerador sementeado). As chaves ficam no `LayoutIndex` do estado
+(`zobrist_keys`), e não num dict global: saem da memória junto com o índice, quando
+o layout deixa o cache de `LayoutIndex.for_layout`. Como a combinação é um XOR,
+`result()` deriva a impressão do filho da do pai trocando só as chaves dos componentes
+alterados (`child_fingerprint`). Estados iguais têm a mesma impressão; dois estados
+diferentes colidem com probabilidade ~2^-64.
+"""
+
+import random
+from typing import Dict, Iterable, Optional, Tuple
+
+from models.states.layout_index import LayoutIndex
+
+_RNG = random.Random(0x5A0B)
+
+
+def layout_keys(state) -> Dict[tuple, int]:
+    """Chaves (componente --> 64 bits) do layout de `state`."""
+    index = state.layout_index
+    if index is None:
+        index = LayoutIndex.for_layout(state.layout)
+    return index.zobrist_keys
+
+
+def feature_key(keys: Dict[tuple, int], feature: tuple) -> int:
+    try:
+        return keys[feature]
+    except KeyError:
+        key = keys[feature] = _RNG.getrandbits(64)
+        return key
+
+
+def _orders_key(keys: Dict[tuple, int], kind: str, orders, start: int = 0) -> int:
+    key = 0
+    for i in range(start, len(orders)):
+        key ^= feature_key(keys, (kind, i, orders[i]))
+    return key
+
+
+def fingerprint(state) -> int:
+    """Impressão digital de `state` (calculada uma vez e guardada no cache do estado)."""
+    if state.cache.fingerprint is not None:
+        return state.cache.fingerprint
+    keys = layout_keys(state)
+    key = feature_key(keys, ("agent", state.agent_pos)) ^ feature_key(keys, ("held", state.held_item))
+    for pos, item in state.grid_objects.items():
+        key ^= feature_key(keys, ("object", pos, item))
+    for pos, s_state in state.stations_state.items():
+        key ^= feature_key(keys, ("station", pos, s_state))
+    key ^= _orders_key(keys, "active", state.active_orders) ^ _orders_key(keys, "delivered", state.delivered_orders)
+    state.cache.fingerprint = key
+    return key
+
+
+def _swap(keys: Dict[tuple, int], key: int, kind: str, pos: Tuple[int, int], before, after) -> int:
+    """Troca a chave da posição `pos` de um `PositionMap` (`before` --> `after`)."""
+    if pos in before:
+        key ^= feature_key(keys, (kind, pos, before.get(pos)))
+    if pos in after:
+        key ^= feature_key(keys, (kind, pos, after.get(pos)))
+    return key
+
+
+def child_fingerprint(state, new_state, object_pos: Optional[Tuple[int, int]],
+                      station_positions: Iterable[Tuple[int, int]]) -> int:
+    """Impressão de `new_state` a partir da de `state` (que já precisa tê-la).
+
+    `object_pos` é o balcão que a transição pode ter mudado (None se nenhum) e
+    `station_positions` as estações atualizadas; os pedidos entregues só crescem no fim.
+    Os dois estados são do mesmo layout (mesmas chaves).
+    """
+    keys = layout_keys(state)
+    key = state.cache.fingerprint
+    if new_state.agent_pos != state.agent_pos:
+        key ^= feature_key(keys, ("agent", state.agent_pos)) ^ feature_key(keys, ("agent", new_state.agent_pos))
+    if new_state.held_item is not state.held_item:
+        key ^= feature_key(keys, ("held", state.held_item)) ^ feature_key(keys, ("held", new_state.held_item))
+    if object_pos is not None and new_state.grid_objects is not state.grid_objects:
+        key = _swap(keys, key, "object", object_pos, state.grid_objects, new_state.grid_objects)
+    if new_state.stations_state is not state.stations_state:
+        for pos in station_positions:
+            key = _swap(keys, key, "station", pos, state.stations_state, new_state.stations_state)
+    if new_state.active_orders is not state.active_orders:
+        key ^= (_orders_key(keys, "active", state.active_orders)
+                ^ _orders_key(keys, "active", new_state.active_orders))
+    if new_state.delivered_orders is not state.delivered_orders:
+        key ^= _orders_key(keys, "delivered", new_state.delivered_orders, len(state.delivered_orders))
+    return key
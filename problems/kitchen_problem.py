@@ -1,13 +1,30 @@
-import re
 from aima3.search import Problem
+from models.actions import (
+    KitchenAction,
+    ActionList,
+    to_action,
+    MOVE,
+    PICK_UP,
+    PUT_DOWN,
+    PUT_IN_POT,
+    SERVE_FROM_POT,
+    DELIVER,
+    CHOP,
+    WAIT,
+    EXTINGUISH,
+    GOTO,
+    WAIT_UNTIL,
+)
 from models.entities import Ingredient, Order, Plate, Extinguisher, Pot
-from models.states import KitchenState, StationState
-from typing import List
+from models.states import KitchenState, LayoutIndex, StationState, ActiveTimer
+from models.states.zobrist import fingerprint, child_fingerprint
+from typing import List, Optional, Tuple, Union
 from utils.recipe_utils import (
-    order_satisfied_by_plate,
     pot_required_ingredients,
     pot_needed_ingredients,
-    pot_needed_count_for_order,
+    pot_assignments,
+    deliverable_order,
+    order_priority,
 )
 
 CHOP_DURATION = 3       # passos para cortar um ingrediente
@@ -16,49 +33,141 @@ BURN_LIMIT = 10         # passos até queimar (e pegar fogo)
 WASH_DURATION = 2       # passos para lavar um prato sujo
 POT_COOK_DURATION = 7   # passos para a panela concluir o cozimento
 
+
+def ticks_to_event(tile: str, s_state: StationState) -> Optional[int]:
+    """Ticks até a próxima mudança de uma estação com relógio (None se ele está parado).
+
+    Fogão: `CHOPPED` --> `COOKED`; pia: `DIRTY` --> `CLEAN`; panela: `COOKING` --> `READY`.
+    """
+    content = s_state.content
+    if tile == 'S' and isinstance(content, Ingredient) and content.state == 'CHOPPED':
+        return max(COOK_DURATION - s_state.progress, 1)
+    if tile == 'W' and isinstance(content, Plate) and content.state == 'DIRTY':
+        return max(WASH_DURATION - s_state.progress, 1)
+    if tile == 'K' and isinstance(content, Pot) and content.state == 'COOKING':
+        return max(POT_COOK_DURATION - s_state.progress, 1)
+    return None
+
+
+def expand_macros(plan, start) -> List[KitchenAction]:
+    """Plano com macro-ações --> plano só com ações primitivas (para o ambiente).
+
+    Cada `GoTo` vira os `Move`s do caminho mínimo guardado no `LayoutIndex`, o mesmo
+    que `KitchenProblem.result()` usou para simulá-lo, e cada `WaitUntil` vira os
+    `Wait`s até o próximo evento. `start` é o estado de onde o plano parte; as demais
+    ações são mantidas como estão.
+    """
+    problem = KitchenProblem(start)
+    index = problem.initial.layout_index
+    state = problem.initial
+    expanded = []
+    for action in plan:
+        action = to_action(action)
+        if action is not None and action.op == GOTO:
+            for x, y in index.path(state.agent_pos, action.pos):
+                expanded.append(KitchenAction(MOVE, x, y))
+        elif action is not None and action.op == WAIT_UNTIL:
+            expanded.extend([KitchenAction(WAIT, action.x, action.y)] * problem.next_event(state))
+        else:
+            expanded.append(action)
+        state = problem.result(state, action)
+    return expanded
+
+
 class KitchenProblem(Problem):
     def __init__(self, initial: KitchenState, goal_orders: List[Order] = None,
-                 on_transition=None, goal_test_fn=None):
+                 on_transition=None, goal_test_fn=None, macro_actions=False, time_skip=False):
+        """
+        macro_actions: modo hierárquico. `actions()` oferece `GoTo(x, y)` até cada tile de
+                       onde se interage com uma estação, no lugar dos `Move`s de um tile;
+                       o plano encontrado é convertido em `Move`s com `expand_macros`
+        time_skip:     `actions()` oferece `WaitUntil(x, y)` no lugar de `Wait(x, y)`: uma só
+                       ação que pula até o próximo evento de relógio (fogão, pia ou panela)
+        """
+        if initial.layout_index is None:
+            initial = initial._replace(layout_index=LayoutIndex.for_layout(initial.layout))
         super().__init__(initial)
         self.goal_orders = goal_orders
         self.on_transition = on_transition
         self.goal_test_fn = goal_test_fn
+        self.macro_actions = macro_actions
+        self.time_skip = time_skip
 
     def goal_test(self, state: KitchenState) -> bool:
         if self.goal_test_fn:
             return self.goal_test_fn(state)
         return len(state.active_orders) == 0
 
-    def actions(self, state: KitchenState) -> List[str]:
-        possible_actions = []
-        x, y = state.agent_pos
-
-        # 1. Movimentação
-        # for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]: # vizinhança-4
-        for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (-1, 1), (1, -1), (-1, -1)]: # vizinhança-8
-            nx, ny = x + dx, y + dy
-            if not state.is_impassable(nx, ny):
-                possible_actions.append(f"Move({nx}, {ny})")
-
-        # 2. Interações com Estações Adjacentes
-        # for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0), (1, 1), (-1, 1), (1, -1), (-1, -1)]: # vizinhança-8
-        for dx, dy in [(0, 1), (0, -1), (1, 0), (-1, 0)]: # vizinhança-4
-            sx, sy = x + dx, y + dy
-            tile = state.get_layout_at(sx, sy)
-
-            # C=Balcão, S=Fogão, T/B=Tábua de Corte, D=Entrega, W=Pia,
-            # G=Lixeira, E=Extintor, P=Prato, O=Fonte Cebola,
-            # V=Fonte Tomate, K=Panela
-            if tile not in ('C', 'S', 'T', 'B', 'D', 'W', 'G', 'E', 'P', 'O', 'V', 'K'):
-                continue
+    def actions(self, state: KitchenState) -> ActionList:
+        index = state.layout_index
+
+        # 1. Movimentação (vizinhança-8 pré-computada no LayoutIndex) ou, no modo
+        # hierárquico, caminhos mínimos até os tiles de onde há alguma interação possível
+        # (estações com relógio correndo oferecem Wait, então continuam como destino)
+        if self.macro_actions:
+            possible_actions = ActionList(
+                action for action in index.goto_actions(state.agent_pos)
+                if self._interactions(state, action.pos)
+            )
+        else:
+            possible_actions = ActionList(index.move_actions(state.agent_pos))
+
+        # 2. Interações com as estações adjacentes
+        interactions = self._interactions(state, state.agent_pos)
+        if self.time_skip:
+            # Todas as esperas pulam até o mesmo evento: basta um `WaitUntil`
+            waits = [a for a in interactions if a.op == WAIT]
+            interactions = [a for a in interactions if a.op != WAIT]
+            if waits:
+                interactions.append(KitchenAction(WAIT_UNTIL, waits[0].x, waits[0].y))
+        possible_actions.extend(interactions)
+        return possible_actions
 
+    @staticmethod
+    def active_timers(state: KitchenState) -> Tuple[ActiveTimer, ...]:
+        """Estações com relógio correndo no estado, em ordem de posição.
+
+        Vem pronto de `result()`; nos demais estados (inicial, decodificados, com
+        pedidos alterados pelo ambiente) é calculado uma vez e guardado no cache do estado.
+        """
+        if state.cache.timers is not None:
+            return state.cache.timers
+        index = state.layout_index or LayoutIndex.for_layout(state.layout)
+        timers = []
+        for pos, s_state in state.stations_state.items():
+            tile = index.tile_at(pos[0], pos[1])
+            remaining = ticks_to_event(tile, s_state)
+            if remaining is not None:
+                timers.append(ActiveTimer(pos, tile, remaining))
+        state.cache.timers = tuple(sorted(timers))
+        return state.cache.timers
+
+    @staticmethod
+    def fingerprint(state: KitchenState) -> int:
+        """Impressão digital Zobrist de 64 bits do estado (chave dos conjuntos fechados compactos)."""
+        return fingerprint(state)
+
+    @staticmethod
+    def next_event(state: KitchenState) -> int:
+        """Ticks até o próximo evento de relógio em alguma estação (1 se nenhum está correndo)."""
+        return min((timer.remaining for timer in KitchenProblem.active_timers(state)), default=1)
+
+    def _interactions(self, state: KitchenState, agent_pos) -> List[KitchenAction]:
+        """Ações de interação com as estações vizinhas de `agent_pos` no estado `state`.
+
+        Vizinhança-4, apenas tiles interativos: C=Balcão, S=Fogão, T/B=Tábua de Corte,
+        D=Entrega, W=Pia, G=Lixeira, E=Extintor, P=Prato, O=Fonte Cebola,
+        V=Fonte Tomate, K=Panela.
+        """
+        possible_actions = []
+        for sx, sy, tile in state.layout_index.interaction_neighbors(agent_pos):
             obj_on_tile = state.get_object_at((sx, sy))
             station_state = state.get_station_state_at((sx, sy))
 
             # Apagar fogo
             if station_state and station_state.is_on_fire:
                 if isinstance(state.held_item, Extinguisher):
-                    possible_actions.append(f"Extinguish({sx}, {sy})")
+                    possible_actions.append(KitchenAction(EXTINGUISH, sx, sy))
                 continue
 
             held = state.held_item
@@ -72,82 +181,78 @@ class KitchenProblem(Problem):
                         pass
                     elif isinstance(held, Ingredient) and held.state == 'CHOPPED':
                         if pot.state in ('EMPTY', 'FILLING'):
-                            # Verifica se ainda precisamos desse ingrediente
-                            needed = pot_needed_ingredients(pot, state)
+                            # Verifica se o pedido atribuído à panela ainda precisa desse ingrediente
+                            needed = pot_needed_ingredients(pot, pot_assignments(state).get((sx, sy)))
                             if needed:
-                                possible_actions.append(
-                                    f"PutInPot({held.name}, {sx}, {sy})"
-                                )
+                                possible_actions.append(KitchenAction(PUT_IN_POT, sx, sy, held.name))
                     elif isinstance(held, Plate) and held.state == 'CLEAN':
-                        if pot.state == 'READY':
-                            possible_actions.append(f"ServeFromPot({sx}, {sy})")
+                        if pot.state == 'READY' or self._orphan_pot(state, (sx, sy), pot):
+                            possible_actions.append(KitchenAction(SERVE_FROM_POT, sx, sy))
                     # Espera enquanto cozinha
                     if pot.state == 'COOKING':
-                        possible_actions.append(f"Wait({sx}, {sy})")
+                        possible_actions.append(KitchenAction(WAIT, sx, sy))
                 continue
 
             if held is None:
                 # Pegar item quando sem nada na mão
                 if obj_on_tile:
                     if isinstance(obj_on_tile, Plate):
-                        possible_actions.append(f"PickUp(Plate, {obj_on_tile.state}, {sx}, {sy})")
+                        possible_actions.append(KitchenAction(PICK_UP, sx, sy, "Plate", obj_on_tile.state))
                     elif isinstance(obj_on_tile, Extinguisher):
-                        possible_actions.append(f"PickUp(Extinguisher, READY, {sx}, {sy})")
+                        possible_actions.append(KitchenAction(PICK_UP, sx, sy, "Extinguisher", "READY"))
                     else:
-                        possible_actions.append(f"PickUp({obj_on_tile.name}, {obj_on_tile.state}, {sx}, {sy})")
+                        possible_actions.append(KitchenAction(PICK_UP, sx, sy, obj_on_tile.name, obj_on_tile.state))
                 elif tile == 'O':   # Fonte infinita de cebola
-                    possible_actions.append(f"PickUp(Onion, RAW, {sx}, {sy})")
+                    possible_actions.append(KitchenAction(PICK_UP, sx, sy, "Onion", "RAW"))
                 elif tile == 'V':   # Fonte infinita de tomate
-                    possible_actions.append(f"PickUp(Tomato, RAW, {sx}, {sy})")
+                    possible_actions.append(KitchenAction(PICK_UP, sx, sy, "Tomato", "RAW"))
                 elif tile == 'M':   # Fonte infinita de carne
-                    possible_actions.append(f"PickUp(Meat, RAW, {sx}, {sy})")
+                    possible_actions.append(KitchenAction(PICK_UP, sx, sy, "Meat", "RAW"))
                 elif tile == 'B':   # Fonte infinita de pão
-                    possible_actions.append(f"PickUp(Bread, RAW, {sx}, {sy})")
+                    possible_actions.append(KitchenAction(PICK_UP, sx, sy, "Bread", "RAW"))
                 elif tile == 'L':   # Fonte infinita de alface
-                    possible_actions.append(f"PickUp(Lettuce, RAW, {sx}, {sy})")
+                    possible_actions.append(KitchenAction(PICK_UP, sx, sy, "Lettuce", "RAW"))
                 elif tile in ('S', 'T', 'B', 'W'):
                     if station_state and station_state.content:
                         content = station_state.content
                         if isinstance(content, Plate):
-                            possible_actions.append(f"PickUp(Plate, {content.state}, {sx}, {sy})")
+                            possible_actions.append(KitchenAction(PICK_UP, sx, sy, "Plate", content.state))
                         else:
-                            possible_actions.append(f"PickUp({content.name}, {content.state}, {sx}, {sy})")
+                            possible_actions.append(KitchenAction(PICK_UP, sx, sy, content.name, content.state))
             else:
                 # Colocar/interagir quando segurando algo
 
                 # Lixeira
                 if tile == 'G':
-                    possible_actions.append(f"PutDown({getattr(held, 'name', 'Item')}, trash, {sx}, {sy})")
+                    possible_actions.append(KitchenAction(PUT_DOWN, sx, sy, getattr(held, 'name', 'Item'), "trash"))
 
                 # Balcão ou espaço vazio
                 if tile in ('C', 'E', 'P') and obj_on_tile is None:
                     if isinstance(held, Plate):
-                        possible_actions.append(f"PutDown(Plate, {held.state}, {sx}, {sy})")
+                        possible_actions.append(KitchenAction(PUT_DOWN, sx, sy, "Plate", held.state))
                     elif isinstance(held, Extinguisher):
-                        possible_actions.append(f"PutDown(Extinguisher, READY, {sx}, {sy})")
+                        possible_actions.append(KitchenAction(PUT_DOWN, sx, sy, "Extinguisher", "READY"))
                     else:
-                        possible_actions.append(f"PutDown({held.name}, {held.state}, {sx}, {sy})")
+                        possible_actions.append(KitchenAction(PUT_DOWN, sx, sy, held.name, held.state))
 
                 # Montar prato sobre balcão (colocar ingrediente em prato limpo)
                 elif tile == 'C' and isinstance(obj_on_tile, Plate) and obj_on_tile.state == 'CLEAN':
                     if isinstance(held, Ingredient) and held.state in ('CHOPPED', 'COOKED'):
-                        possible_actions.append(f"PutDown({held.name}, {held.state}, {sx}, {sy})")
+                        possible_actions.append(KitchenAction(PUT_DOWN, sx, sy, held.name, held.state))
 
                 # Colocar em estação (tábua, fogão, pia)
                 elif tile in ('S', 'T', 'B', 'W') and station_state and station_state.content is None:
                     if tile in ('T', 'B') and isinstance(held, Ingredient) and held.state == 'RAW':
-                        possible_actions.append(f"PutDown({held.name}, {held.state}, {sx}, {sy})")
+                        possible_actions.append(KitchenAction(PUT_DOWN, sx, sy, held.name, held.state))
                     elif tile == 'S' and isinstance(held, Ingredient) and held.state == 'CHOPPED':
-                        possible_actions.append(f"PutDown({held.name}, {held.state}, {sx}, {sy})")
+                        possible_actions.append(KitchenAction(PUT_DOWN, sx, sy, held.name, held.state))
                     elif tile == 'W' and isinstance(held, Plate) and held.state == 'DIRTY':
-                        possible_actions.append(f"PutDown(Plate, DIRTY, {sx}, {sy})")
+                        possible_actions.append(KitchenAction(PUT_DOWN, sx, sy, "Plate", "DIRTY"))
 
-                # Entrega (somente se o prato satisfaz o pedido ativo)
+                # Entrega (somente se o prato satisfaz algum pedido ativo)
                 if tile == 'D' and isinstance(held, Plate) and held.state == 'WITH_FOOD':
-                    if state.active_orders:
-                        order = state.active_orders[0]
-                        if order_satisfied_by_plate(held, order):
-                            possible_actions.append(f"Deliver({sx}, {sy})")
+                    if deliverable_order(held, state.active_orders) is not None:
+                        possible_actions.append(KitchenAction(DELIVER, sx, sy))
 
                 # Pegar comida diretamente do fogão/tábua para o prato limpo
                 if isinstance(held, Plate) and held.state == 'CLEAN':
@@ -155,48 +260,69 @@ class KitchenProblem(Problem):
                         content = station_state.content
                         if (tile == 'S' and content.state == 'COOKED') or \
                            (tile in ('T', 'B') and content.state == 'CHOPPED'):
-                            possible_actions.append(f"PickUp({content.name}, {content.state}, {sx}, {sy})")
+                            possible_actions.append(KitchenAction(PICK_UP, sx, sy, content.name, content.state))
 
             # Ações específicas de estação (Cortar, Aguardar)
             if tile in ('T', 'B') and station_state and station_state.content:
                 if isinstance(station_state.content, Ingredient) and station_state.content.state == 'RAW':
-                    possible_actions.append(f"Chop({sx}, {sy})")
+                    possible_actions.append(KitchenAction(CHOP, sx, sy))
 
             if tile == 'S' and station_state and station_state.content:
                 if isinstance(station_state.content, Ingredient) and station_state.content.state == 'CHOPPED':
-                    possible_actions.append(f"Wait({sx}, {sy})")
+                    possible_actions.append(KitchenAction(WAIT, sx, sy))
 
             if tile == 'W' and station_state and station_state.content:
                 if isinstance(station_state.content, Plate) and station_state.content.state == 'DIRTY':
-                    possible_actions.append(f"Wait({sx}, {sy})")
+                    possible_actions.append(KitchenAction(WAIT, sx, sy))
 
         return possible_actions
 
-    def result(self, state: KitchenState, action: str) -> KitchenState:
-        match = re.match(r"(\w+)\((.*)\)", action)
-        if not match:
-            return state._replace(time=state.time + 1)
+    @staticmethod
+    def _orphan_pot(state: KitchenState, pos, pot: Pot) -> bool:
+        """Panela com ingredientes sem pedido atribuído (o pedido dela expirou): pode ser esvaziada."""
+        return bool(pot.ingredients) and pos not in pot_assignments(state)
+
+    def result(self, state: KitchenState, action: Union[KitchenAction, str]) -> KitchenState:
+        # Planos antigos em string são convertidos; ações inválidas só avançam o tempo
+        action = to_action(action)
+        if action is None:
+            new_state = state._replace(time=state.time + 1)
+            if self.on_transition is not None:
+                self.on_transition(state, action, new_state)
+            return new_state
 
-        act_name, params_str = match.groups()
-        params = [p.strip() for p in params_str.split(",")]
+        act_name = action.op
 
         new_agent_pos = state.agent_pos
         new_held_item = state.held_item
-        new_grid_objects = list(state.grid_objects)
-        new_delivered_orders = list(state.delivered_orders)
-        new_active_orders = list(state.active_orders)
-        new_stations_state = {pos: s_state for pos, s_state in state.stations_state}
-
-        if act_name == "Move":
-            new_agent_pos = (int(params[0]), int(params[1]))
-
-        elif act_name == "PickUp":
-            pos = (int(params[2]), int(params[3]))
+        # Mapas e tuplas do estado pai são compartilhados; só o que muda é recriado
+        new_grid_objects = state.grid_objects
+        new_delivered_orders = state.delivered_orders
+        new_active_orders = state.active_orders
+        stations = state.stations_state
+        station_updates = {}
+        object_pos = None   # balcão que a ação pode mudar (para a impressão digital)
+        ticks = 1
+
+        if act_name == MOVE:
+            new_agent_pos = (action.x, action.y)
+
+        elif act_name == GOTO:
+            # Um tick por tile do caminho; as estações progridem em cada um deles
+            new_agent_pos = (action.x, action.y)
+            ticks = max(len(state.layout_index.path(state.agent_pos, new_agent_pos)), 1)
+
+        elif act_name == WAIT_UNTIL:
+            # Salta direto para o próximo evento (os ticks intermediários não mudam nada além do progresso)
+            ticks = self.next_event(state)
+
+        elif act_name == PICK_UP:
+            pos = object_pos = (action.x, action.y)
             picked_item = state.get_object_at(pos)
             if picked_item is None:
-                if pos in new_stations_state:
-                    picked_item = new_stations_state[pos].content
-                    new_stations_state[pos] = StationState(progress=0, content=None)
+                if pos in stations:
+                    picked_item = stations.get(pos).content
+                    station_updates[pos] = StationState(progress=0, content=None)
                 elif state.get_layout_at(pos[0], pos[1]) == 'O':  # fonte de cebola
                     picked_item = Ingredient(name="Onion", state="RAW")
                 elif state.get_layout_at(pos[0], pos[1]) == 'V':  # fonte de tomate
@@ -210,106 +336,147 @@ class KitchenProblem(Problem):
                     new_held_item = state.held_item._replace(
                         contents=tuple(new_contents), state="WITH_FOOD"
                     )
-                    new_grid_objects = [obj for obj in new_grid_objects if obj[0] != pos]
+                    new_grid_objects = new_grid_objects.remove(pos)
             else:
                 new_held_item = picked_item
-                new_grid_objects = [obj for obj in new_grid_objects if obj[0] != pos]
+                new_grid_objects = new_grid_objects.remove(pos)
 
-        elif act_name == "PutDown":
-            pos = (int(params[2]), int(params[3]))
+        elif act_name == PUT_DOWN:
+            pos = object_pos = (action.x, action.y)
             tile = state.get_layout_at(pos[0], pos[1])
             obj_at_pos = state.get_object_at(pos)
 
-            if tile == 'G':  # Lixeira: descarta o item
-                new_held_item = None
+            if tile == 'G':  # Lixeira: descarta o item (de um prato com comida, só a comida)
+                if isinstance(new_held_item, Plate) and new_held_item.state == 'WITH_FOOD':
+                    new_held_item = Plate(state="CLEAN")
+                else:
+                    new_held_item = None
             elif isinstance(obj_at_pos, Plate) and obj_at_pos.state == 'CLEAN' and isinstance(new_held_item, Ingredient):
                 # Montagem: colocar ingrediente no prato sobre o balcão
                 new_contents = list(obj_at_pos.contents)
                 new_contents.append(new_held_item.name)
                 updated_plate = obj_at_pos._replace(contents=tuple(new_contents), state="WITH_FOOD")
-                new_grid_objects = [obj for obj in new_grid_objects if obj[0] != pos]
-                new_grid_objects.append((pos, updated_plate))
+                new_grid_objects = new_grid_objects.set(pos, updated_plate)
                 new_held_item = None
             elif tile in ('C', 'E', 'P'):
-                new_grid_objects.append((pos, new_held_item))
+                new_grid_objects = new_grid_objects.set(pos, new_held_item)
                 new_held_item = None
             elif tile in ('S', 'T', 'B', 'W'):
-                new_stations_state[pos] = StationState(progress=0, content=new_held_item)
+                station_updates[pos] = StationState(progress=0, content=new_held_item)
                 new_held_item = None
 
-        elif act_name == "PutInPot":
+        elif act_name == PUT_IN_POT:
             # Coloca ingrediente CHOPPED na panela
-            pos = (int(params[1]), int(params[2]))
-            pot = new_stations_state[pos].content
+            pos = (action.x, action.y)
+            pot = stations.get(pos).content
             if isinstance(pot, Pot) and isinstance(new_held_item, Ingredient):
                 new_ingredients = pot.ingredients + (new_held_item.name,)
-                needed = pot_needed_count_for_order(new_active_orders, new_ingredients)
-                if needed == 0:  # todos os ingredientes colocados → começa a cozinhar
+                order = pot_assignments(state).get(pos)
+                needed = len(pot_needed_ingredients(pot._replace(ingredients=new_ingredients), order))
+                if needed == 0:  # todos os ingredientes do pedido da panela → começa a cozinhar
                     new_pot_state = "COOKING"
                 else:            # ainda faltam ingredientes
                     new_pot_state = "FILLING"
                 new_pot = Pot(ingredients=new_ingredients, state=new_pot_state, progress=0)
-                new_stations_state[pos] = StationState(progress=0, content=new_pot)
+                station_updates[pos] = StationState(progress=0, content=new_pot)
                 new_held_item = None
 
-        elif act_name == "ServeFromPot":
-            # Agente tem prato limpo e serve a sopa pronta nele
-            pos = (int(params[0]), int(params[1]))
-            pot = new_stations_state[pos].content
-            if isinstance(pot, Pot) and pot.state == 'READY' and isinstance(new_held_item, Plate):
+        elif act_name == SERVE_FROM_POT:
+            # Agente tem prato limpo e serve a sopa pronta nele (ou esvazia uma panela sem pedido)
+            pos = (action.x, action.y)
+            pot = stations.get(pos).content
+            if isinstance(pot, Pot) and isinstance(new_held_item, Plate) and (
+                pot.state == 'READY' or self._orphan_pot(state, pos, pot)
+            ):
                 new_held_item = new_held_item._replace(
                     contents=pot.ingredients, state="WITH_FOOD"
                 )
                 # Reseta a panela para vazia
-                new_stations_state[pos] = StationState(progress=0, content=Pot())
+                station_updates[pos] = StationState(progress=0, content=Pot())
 
-        elif act_name == "Deliver":
+        elif act_name == DELIVER:
             if new_active_orders:
-                delivered_order = new_active_orders.pop(0)
-                new_delivered_orders.append(delivered_order)
+                # Entrega o pedido (na ordem do escalonador) que o prato satisfaz
+                delivered_order = None
+                if isinstance(new_held_item, Plate):
+                    delivered_order = deliverable_order(new_held_item, new_active_orders)
+                if delivered_order is None:
+                    delivered_order = order_priority(new_active_orders)[0]
+                i = new_active_orders.index(delivered_order)
+                new_active_orders = new_active_orders[:i] + new_active_orders[i + 1:]
+                new_delivered_orders = new_delivered_orders + (delivered_order,)
                 new_held_item = None
 
                 # Gera prato sujo no balcão de retorno (P) ou em qualquer balcão vazio (C)
                 return_pos = None
-                for y_idx, row in enumerate(state.layout):
-                    for x_idx, char in enumerate(row):
-                        if char == 'P':
-                            if state.get_object_at((x_idx, y_idx)) is None:
-                                return_pos = (x_idx, y_idx)
-                                break
-                    if return_pos:
+                for counter_pos in state.layout_index.return_counters:
+                    if state.get_object_at(counter_pos) is None:
+                        return_pos = counter_pos
                         break
 
-                if not return_pos:
-                    for y_idx, row in enumerate(state.layout):
-                        for x_idx, char in enumerate(row):
-                            if char == 'C':
-                                if state.get_object_at((x_idx, y_idx)) is None:
-                                    return_pos = (x_idx, y_idx)
-                                    break
-                        if return_pos:
-                            break
-
                 if return_pos:
-                    new_grid_objects.append((return_pos, Plate(state="DIRTY")))
+                    object_pos = return_pos
+                    new_grid_objects = new_grid_objects.set(return_pos, Plate(state="DIRTY"))
 
-        elif act_name == "Chop":
-            pos = (int(params[0]), int(params[1]))
-            s_state = new_stations_state[pos]
+        elif act_name == CHOP:
+            pos = (action.x, action.y)
+            s_state = stations.get(pos)
             new_progress = s_state.progress + 1
             new_content = s_state.content
             if new_progress >= CHOP_DURATION:  # corte concluído
                 if isinstance(new_content, Ingredient):
                     new_content = new_content._replace(state='CHOPPED')
                 new_progress = 0
-            new_stations_state[pos] = StationState(progress=new_progress, content=new_content)
+            station_updates[pos] = StationState(progress=new_progress, content=new_content)
 
-        elif act_name == "Extinguish":
-            pos = (int(params[0]), int(params[1]))
-            new_stations_state[pos] = StationState(progress=0, is_on_fire=False, content=None)
+        elif act_name == EXTINGUISH:
+            pos = (action.x, action.y)
+            station_updates[pos] = StationState(progress=0, is_on_fire=False, content=None)
 
-        # Progresso global por tick: fogões (S), pias (W), panelas (K)
-        for pos, s_state in new_stations_state.items():
+        # Só progridem as estações com relógio correndo e as que a ação acabou de mexer
+        running = [timer.pos for timer in self.active_timers(state)]
+        if station_updates:
+            running = sorted(set(running).union(station_updates))
+        candidates = [(pos, stations.get(pos)) for pos in running]
+        for _ in range(ticks):
+            self._tick_stations(state, candidates, station_updates)
+
+        new_state = KitchenState(
+            agent_pos=new_agent_pos,
+            held_item=new_held_item,
+            layout=state.layout,
+            grid_objects=new_grid_objects,
+            active_orders=new_active_orders,
+            delivered_orders=new_delivered_orders,
+            stations_state=stations.update(station_updates),
+            time=state.time + ticks,
+            layout_index=state.layout_index,
+        )
+        timers = []
+        for pos, s_state in candidates:
+            tile = state.layout_index.tile_at(pos[0], pos[1])
+            remaining = ticks_to_event(tile, station_updates.get(pos, s_state))
+            if remaining is not None:
+                timers.append(ActiveTimer(pos, tile, remaining))
+        new_state.cache.timers = tuple(timers)
+        if state.cache.fingerprint is not None:
+            # A impressão do filho sai da do pai, trocando só os componentes alterados
+            new_state.cache.fingerprint = child_fingerprint(state, new_state, object_pos, station_updates)
+        # Gancho opcional de instrumentação/rastreamento: on_transition(estado, ação, novo_estado)
+        if self.on_transition is not None:
+            self.on_transition(state, action, new_state)
+        return new_state
+
+    @staticmethod
+    def _tick_stations(state, stations, station_updates):
+        """Progresso global de um tick: fogões (S), pias (W), panelas (K).
+
+        `stations` são os pares (posição, estado) a considerar (os relógios ativos); o
+        estado mais recente de cada um é lido de `station_updates` (se houver), onde
+        também é gravado o estado após o tick.
+        """
+        for pos, s_state in stations:
+            s_state = station_updates.get(pos, s_state)
             tile = state.get_layout_at(pos[0], pos[1])
 
             if tile == 'S' and isinstance(s_state.content, Ingredient) and s_state.content.state == 'CHOPPED':
@@ -321,7 +488,7 @@ class KitchenProblem(Problem):
                 if new_progress >= BURN_LIMIT:
                     new_content = new_content._replace(state='BURNT')
                     new_fire = True
-                new_stations_state[pos] = StationState(
+                station_updates[pos] = StationState(
                     progress=new_progress, content=new_content, is_on_fire=new_fire
                 )
 
@@ -331,7 +498,7 @@ class KitchenProblem(Problem):
                 if new_progress >= WASH_DURATION:
                     new_content = Plate(state="CLEAN")
                     new_progress = 0
-                new_stations_state[pos] = StationState(progress=new_progress, content=new_content)
+                station_updates[pos] = StationState(progress=new_progress, content=new_content)
 
             elif tile == 'K' and isinstance(s_state.content, Pot) and s_state.content.state == 'COOKING':
                 new_progress = s_state.progress + 1
@@ -340,22 +507,18 @@ class KitchenProblem(Problem):
                     new_pot = new_pot._replace(state='READY', progress=new_progress)
                 else:
                     new_pot = new_pot._replace(progress=new_progress)
-                new_stations_state[pos] = StationState(progress=new_progress, content=new_pot)
-
-        return KitchenState(
-            agent_pos=new_agent_pos,
-            held_item=new_held_item,
-            layout=state.layout,
-            grid_objects=tuple(new_grid_objects),
-            active_orders=tuple(new_active_orders),
-            delivered_orders=tuple(new_delivered_orders),
-            stations_state=tuple(new_stations_state.items()),
-            time=state.time + 1
-        )
+                station_updates[pos] = StationState(progress=new_progress, content=new_pot)
 
     def path_cost(self, c, state1, action, state2):
-        if "Wait" in action:
+        action = to_action(action)
+        if action is not None and action.op == WAIT:
             return c + 1.1
+        if action is not None and action.op == WAIT_UNTIL:
+            # 1.1 por `Wait` substituído
+            return c + 1.1 * (state2.time - state1.time)
+        if action is not None and action.op == GOTO:
+            # Um por `Move` do caminho
+            return c + state2.time - state1.time
         return c + 1
 
     # Função de heurística
@@ -363,41 +526,29 @@ class KitchenProblem(Problem):
         state = node.state
         if not state.active_orders:
             return 0
+        # Estimativa do prato mais próximo de sair + ao menos um Deliver por pedido restante
+        return self._next_dish_h(state) + len(state.active_orders) - 1
 
+    def _next_dish_h(self, state):
         ax, ay = state.agent_pos
         held = state.held_item
 
-        # Varredura de pontos de interesse
-        chop_stations = []
-        stoves = []
-        deliveries = []
-        sinks = []
+        # Pontos de interesse estáticos (pré-computados no LayoutIndex)
+        index = state.layout_index
+        chop_stations = index.boards
+        stoves = index.stoves
+        deliveries = index.deliveries
+        sinks = index.sinks
+        raw_sources_onion = index.positions('O')
+        raw_sources_tomato = index.positions('V')
+        pot_stations = index.pots
+
+        # Pontos de interesse dinâmicos
         extinguishers = []
         plates_clean = []
         plates_dirty = []
         cooked_food = []
         chopped_food = []
-        raw_sources_onion = []
-        raw_sources_tomato = []
-        pot_stations = []
-
-        for y, row in enumerate(state.layout):
-            for x, char in enumerate(row):
-                pos = (x, y)
-                if char == 'T' or char == 'B':
-                    chop_stations.append(pos)
-                elif char == 'S':
-                    stoves.append(pos)
-                elif char == 'D':
-                    deliveries.append(pos)
-                elif char == 'W':
-                    sinks.append(pos)
-                elif char == 'O':
-                    raw_sources_onion.append(pos)
-                elif char == 'V':
-                    raw_sources_tomato.append(pos)
-                elif char == 'K':
-                    pot_stations.append(pos)
 
         for pos, obj in state.grid_objects:
             if isinstance(obj, Plate):
@@ -425,17 +576,18 @@ class KitchenProblem(Problem):
                     elif obj.state == 'CHOPPED':
                         chopped_food.append(pos)
 
-        # Ordem ativa e sua receita
-        order = state.active_orders[0]
+        # Pedido de maior prioridade (escalonador) e sua receita
+        order = order_priority(state.active_orders)[0]
         needed_ingredients = pot_required_ingredients(order)
 
-        def md(a, b):
-            return abs(a[0] - b[0]) + abs(a[1] - b[1])
+        # Distância real (BFS na vizinhança-8 caminhável, pré-computada no LayoutIndex)
+        # até poder interagir com o alvo; substitui a distância de Manhattan
+        dist = index.distance
 
         def best_dist(pos, targets):
             if not targets:
                 return 0
-            return min(md(pos, t) for t in targets)
+            return min(dist(pos, t) for t in targets)
 
         agent = (ax, ay)
 
@@ -458,61 +610,69 @@ class KitchenProblem(Problem):
         if isinstance(held, Plate) and held.state == 'WITH_FOOD':
             return best_dist(agent, deliveries)
 
-        # Receita usa panela (K)?
+        # Receita usa panela (K)? Cada panela trabalha no pedido que o escalonador lhe
+        # atribuiu; vale a estimativa da panela cujo prato sai primeiro
         uses_pot = bool(pot_stations) and bool(needed_ingredients)
 
-        if uses_pot:
-            # Verificar estado da panela
-            for pot_pos in pot_stations:
-                ss = state.get_station_state_at(pot_pos)
-                if ss and isinstance(ss.content, Pot):
-                    pot = ss.content
-                    if pot.state == 'READY':
-                        # Só precisamos de prato limpo → servir → entregar
-                        if isinstance(held, Plate) and held.state == 'CLEAN':
-                            return md(agent, pot_pos) + best_dist(pot_pos, deliveries)
-                        return best_dist(agent, plates_clean) + best_dist(
-                            plates_clean[0] if plates_clean else agent, pot_pos
-                        ) + best_dist(pot_pos, deliveries)
+        def pot_estimate(pot_pos, ss, needed_ingredients):
+            pot = ss.content
+            if pot.state == 'READY':
+                # Só precisamos de prato limpo → servir → entregar
+                if isinstance(held, Plate) and held.state == 'CLEAN':
+                    return dist(agent, pot_pos) + best_dist(pot_pos, deliveries)
+                return best_dist(agent, plates_clean) + dist(
+                    plates_clean[0] if plates_clean else agent, pot_pos
+                ) + best_dist(pot_pos, deliveries)
+
+            if pot.state == 'COOKING':
+                remaining_cook = next(
+                    (t.remaining for t in self.active_timers(state) if t.pos == pot_pos),
+                    max(0, POT_COOK_DURATION - ss.progress),
+                )
+                return remaining_cook + best_dist(pot_pos, deliveries)
+
+            already_in = list(pot.ingredients)
+            still_needed = list(needed_ingredients)
+            for ing in already_in:
+                if ing in still_needed:
+                    still_needed.remove(ing)
+
+            # Estimate: for each missing ingredient
+            # agent → source → chop → pot
+            if still_needed:
+                if isinstance(held, Ingredient) and held.state == 'CHOPPED' and held.name in still_needed:
+                    still_needed.remove(held.name)
+                    cost = dist(agent, pot_pos)
+                elif isinstance(held, Ingredient) and held.state == 'RAW':
+                    cost = best_dist(agent, chop_stations) + CHOP_DURATION + dist(
+                        chop_stations[0] if chop_stations else agent, pot_pos)
+                else:
+                    first_ing = still_needed[0]
+                    sources = raw_sources_onion if first_ing == 'Onion' else raw_sources_tomato
+                    cost = best_dist(agent, sources) + best_dist(
+                        sources[0] if sources else agent, chop_stations
+                    ) + CHOP_DURATION + dist(
+                        chop_stations[0] if chop_stations else agent, pot_pos
+                    )
+                for ing in still_needed[1:]:
+                    sources = raw_sources_onion if ing == 'Onion' else raw_sources_tomato
+                    cost += best_dist(agent, sources) + best_dist(
+                        sources[0] if sources else agent, chop_stations
+                    ) + CHOP_DURATION + dist(
+                        chop_stations[0] if chop_stations else agent, pot_pos
+                    )
+                cost += POT_COOK_DURATION + best_dist(pot_pos, deliveries)
+                return cost
 
-                    if pot.state == 'COOKING':
-                        remaining_cook = max(0, POT_COOK_DURATION - ss.progress)
-                        return remaining_cook + best_dist(pot_pos, deliveries)
-
-                    already_in = list(pot.ingredients)
-                    still_needed = list(needed_ingredients)
-                    for ing in already_in:
-                        if ing in still_needed:
-                            still_needed.remove(ing)
-
-                    # Estimate: for each missing ingredient
-                    # agent → source → chop → pot
-                    if still_needed:
-                        if isinstance(held, Ingredient) and held.state == 'CHOPPED' and held.name in still_needed:
-                            still_needed.remove(held.name)
-                            cost = md(agent, pot_pos)
-                        elif isinstance(held, Ingredient) and held.state == 'RAW':
-                            cost = best_dist(agent, chop_stations) + CHOP_DURATION + best_dist(
-                                chop_stations[0] if chop_stations else agent, pot_pos)
-                        else:
-                            first_ing = still_needed[0]
-                            sources = raw_sources_onion if first_ing == 'Onion' else raw_sources_tomato
-                            cost = best_dist(agent, sources) + best_dist(
-                                sources[0] if sources else agent, chop_stations
-                            ) + CHOP_DURATION + best_dist(
-                                chop_stations[0] if chop_stations else agent, pot_pos
-                            )
-                        for ing in still_needed[1:]:
-                            sources = raw_sources_onion if ing == 'Onion' else raw_sources_tomato
-                            cost += best_dist(agent, sources) + best_dist(
-                                sources[0] if sources else agent, chop_stations
-                            ) + CHOP_DURATION + best_dist(
-                                chop_stations[0] if chop_stations else agent, pot_pos
-                            )
-                        cost += POT_COOK_DURATION + best_dist(pot_pos, deliveries)
-                        return cost
-
-                    return POT_COOK_DURATION + best_dist(pot_pos, deliveries)
+            return POT_COOK_DURATION + best_dist(pot_pos, deliveries)
+
+        if uses_pot:
+            estimates = [
+                pot_estimate(pot_pos, state.get_station_state_at(pot_pos), pot_required_ingredients(pot_order))
+                for pot_pos, pot_order in pot_assignments(state).items()
+            ]
+            if estimates:
+                return min(estimates)
 
         # Receita simples (sem panela, ou fallback)
 
@@ -521,13 +681,11 @@ class KitchenProblem(Problem):
                 best = float("inf")
                 for pos in chopped_food + cooked_food:
                     for d in deliveries:
-                        best = min(best, md(agent, pos) + md(pos, d))
+                        best = min(best, dist(agent, pos) + dist(pos, d))
                 return best
             targets = [
-                (x, y)
-                for y, row in enumerate(state.layout)
-                for x, char in enumerate(row)
-                if char == 'C' and state.get_object_at((x, y)) is None
+                pos for pos in index.counters
+                if state.get_object_at(pos) is None
             ]
             return best_dist(agent, targets) if targets else 0
 
@@ -535,7 +693,7 @@ class KitchenProblem(Problem):
             best = float("inf")
             for pc in plates_clean:
                 for d in deliveries:
-                    best = min(best, md(agent, pc) + md(pc, d))
+                    best = min(best, dist(agent, pc) + dist(pc, d))
             return best
 
         if isinstance(held, Ingredient) and held.state == 'RAW':
@@ -543,14 +701,14 @@ class KitchenProblem(Problem):
             for cs in chop_stations:
                 for s in stoves:
                     for d in deliveries:
-                        best = min(best, md(agent, cs) + CHOP_DURATION + md(cs, s) + COOK_DURATION + md(s, d))
+                        best = min(best, dist(agent, cs) + CHOP_DURATION + dist(cs, s) + COOK_DURATION + dist(s, d))
             return best
 
         if isinstance(held, Ingredient) and held.state == 'CHOPPED':
             best = float("inf")
             for s in stoves:
                 for d in deliveries:
-                    best = min(best, md(agent, s) + COOK_DURATION + md(s, d))
+                    best = min(best, dist(agent, s) + COOK_DURATION + dist(s, d))
             return best
 
         if cooked_food:
@@ -558,7 +716,7 @@ class KitchenProblem(Problem):
             for cf in cooked_food:
                 for pc in plates_clean:
                     for d in deliveries:
-                        best = min(best, md(agent, cf) + md(cf, pc) + md(pc, d))
+                        best = min(best, dist(agent, cf) + dist(cf, pc) + dist(pc, d))
             return best
 
         if chopped_food:
@@ -566,7 +724,7 @@ class KitchenProblem(Problem):
             for cf in chopped_food:
                 for s in stoves:
                     for d in deliveries:
-                        best = min(best, md(agent, cf) + md(cf, s) + COOK_DURATION + md(s, d))
+                        best = min(best, dist(agent, cf) + dist(cf, s) + COOK_DURATION + dist(s, d))
             return best
 
         # Nada feito
@@ -577,6 +735,6 @@ class KitchenProblem(Problem):
                 for s in stoves:
                     for d in deliveries:
                         best = min(best,
-                                   md(agent, rs) + md(rs, cs) + CHOP_DURATION +
-                                   md(cs, s) + COOK_DURATION + md(s, d))
+                                   dist(agent, rs) + dist(rs, cs) + CHOP_DURATION +
+                                   dist(cs, s) + COOK_DURATION + dist(s, d))
         return best
\ No newline at end of file
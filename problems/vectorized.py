@@ -0,0 +1,487 @@
+"""
+Codificação vetorial do `KitchenState` e geração de sucessores em lote (NumPy).
+
+Cada estado vira um vetor de inteiros de largura fixa (por layout):
+
+    [x, y, item na mão, tempo,
+     por estação: conteúdo, progresso, em chamas, progresso da panela,
+     por balcão: objeto,
+     pedidos ativos..., pedidos entregues...]
+
+Itens e pedidos (NamedTuples aninhadas) são internados numa tabela e representados
+pelo seu id; 0 é "vazio". Uma panela é internada sem o `progress`, que vai na coluna
+própria da estação, para que o relógio da panela avance só com aritmética.
+
+`VectorizedKitchen.expand_many(batch)` gera de uma vez os sucessores de uma fatia da
+fronteira:
+    - os `Move`s saem de uma tabela de vizinhos por célula, sem laço por estado;
+    - o progresso por tick das estações (fogão, pia, panela) é aplicado a todos os
+      filhos com operações vetoriais e tabelas de consulta por id de item;
+    - as interações (pegar, largar, cortar...) são poucas por estado: quais são
+      aplicáveis vem de `KitchenProblem.actions()` e o efeito é aplicado na linha.
+
+`KitchenProblem` continua sendo a implementação de referência; o teste diferencial
+compara os sucessores das duas.
+"""
+
+from typing import List, Tuple
+
+import numpy as np
+
+from models.actions import (
+    KitchenAction,
+    MOVE,
+    PICK_UP,
+    PUT_DOWN,
+    PUT_IN_POT,
+    SERVE_FROM_POT,
+    DELIVER,
+    CHOP,
+    EXTINGUISH,
+)
+from models.entities import Ingredient, Plate, Pot
+from models.states import KitchenState, PositionMap, StationState
+from problems.kitchen_problem import (
+    KitchenProblem,
+    CHOP_DURATION,
+    COOK_DURATION,
+    BURN_LIMIT,
+    WASH_DURATION,
+    POT_COOK_DURATION,
+)
+from utils.recipe_utils import assign_pots, deliverable_order, order_priority, pot_needed_ingredients
+
+EMPTY = 0  # id de "nenhum item / nenhum pedido"
+
+AGENT_X, AGENT_Y, HELD, TIME = range(4)
+STATION_FIELDS = 4  # conteúdo, progresso, em chamas, progresso da panela
+CONTENT, PROGRESS, FIRE, POT_PROGRESS = range(STATION_FIELDS)
+
+
+class InternTable:
+    """Tabela valor <--> id inteiro (o id 0 é reservado para None)."""
+
+    def __init__(self):
+        self.values = [None]
+        self.ids = {None: EMPTY}
+
+    def __len__(self):
+        return len(self.values)
+
+    def intern(self, value) -> int:
+        value_id = self.ids.get(value)
+        if value_id is None:
+            value_id = self.ids[value] = len(self.values)
+            self.values.append(value)
+        return value_id
+
+
+class StateCodec:
+    """Converte `KitchenState` <--> vetor `np.int32` de largura fixa para um layout.
+
+    As colunas das estações seguem a ordem canônica de `stations_state` do estado
+    inicial; as dos balcões, a dos tiles C/E/P. A fila de pedidos tem uma coluna por
+    pedido do estado inicial (ativos e entregues), completada com `EMPTY`.
+    """
+
+    def __init__(self, initial: KitchenState):
+        index = initial.layout_index
+        self.layout = initial.layout
+        self.layout_index = index
+        self.items = InternTable()
+        self.orders = InternTable()
+
+        self.stations = tuple(pos for pos, _ in initial.stations_state)
+        self.station_slot = {pos: i for i, pos in enumerate(self.stations)}
+        self.station_tiles = tuple(index.tile_at(*pos) for pos in self.stations)
+        self.pot_slots = tuple(i for i, tile in enumerate(self.station_tiles) if tile == 'K')
+
+        counters = set(index.positions('C', 'E', 'P')) | set(initial.grid_objects.positions())
+        self.counters = tuple(sorted(counters, key=lambda p: (p[1], p[0])))
+        self.counter_slot = {pos: i for i, pos in enumerate(self.counters)}
+        self.max_orders = len(initial.active_orders) + len(initial.delivered_orders)
+
+        self.station_base = 4
+        self.counter_base = self.station_base + STATION_FIELDS * len(self.stations)
+        self.active_base = self.counter_base + len(self.counters)
+        self.delivered_base = self.active_base + self.max_orders
+        self.width = self.delivered_base + self.max_orders
+
+    # Colunas
+
+    def station_column(self, slot: int, field: int) -> int:
+        return self.station_base + STATION_FIELDS * slot + field
+
+    def station_columns(self, field: int) -> np.ndarray:
+        return self.station_base + STATION_FIELDS * np.arange(len(self.stations)) + field
+
+    # Itens de estação (a panela é internada sem o progresso)
+
+    def station_content(self, row, slot: int):
+        content = self.items.values[row[self.station_column(slot, CONTENT)]]
+        if isinstance(content, Pot):
+            content = content._replace(progress=int(row[self.station_column(slot, POT_PROGRESS)]))
+        return content
+
+    def set_station(self, row, slot: int, station: StationState):
+        content = station.content
+        pot_progress = 0
+        if isinstance(content, Pot):
+            pot_progress = content.progress
+            content = content._replace(progress=0)
+        row[self.station_column(slot, CONTENT)] = self.items.intern(content)
+        row[self.station_column(slot, PROGRESS)] = station.progress
+        row[self.station_column(slot, FIRE)] = int(station.is_on_fire)
+        row[self.station_column(slot, POT_PROGRESS)] = pot_progress
+
+    def active_orders(self, row) -> tuple:
+        values = self.orders.values
+        return tuple(values[i] for i in row[self.active_base:self.delivered_base] if i != EMPTY)
+
+    def pot_orders(self, row) -> dict:
+        """Pedido atribuído a cada panela pelo escalonador (`assign_pots`)."""
+        pots = []
+        for slot in self.pot_slots:
+            content = self.station_content(row, slot)
+            if isinstance(content, Pot):
+                pots.append((self.stations[slot], content))
+        return assign_pots(pots, self.active_orders(row))
+
+    # Conversão
+
+    def encode(self, state: KitchenState) -> np.ndarray:
+        if state.layout != self.layout:
+            raise ValueError("Estado de outro layout")
+        if len(state.active_orders) + len(state.delivered_orders) > self.max_orders:
+            raise ValueError("Mais pedidos do que colunas na fila")
+        row = np.zeros(self.width, dtype=np.int32)
+        row[AGENT_X], row[AGENT_Y] = state.agent_pos
+        row[HELD] = self.items.intern(state.held_item)
+        row[TIME] = state.time
+        for pos, station in state.stations_state:
+            slot = self.station_slot.get(pos)
+            if slot is None:
+                raise ValueError(f"Estação fora do layout codificado: {pos}")
+            self.set_station(row, slot, station)
+        for pos, item in state.grid_objects:
+            slot = self.counter_slot.get(pos)
+            if slot is None:
+                raise ValueError(f"Objeto fora de um balcão: {pos}")
+            row[self.counter_base + slot] = self.items.intern(item)
+        for i, order in enumerate(state.active_orders):
+            row[self.active_base + i] = self.orders.intern(order)
+        for i, order in enumerate(state.delivered_orders):
+            row[self.delivered_base + i] = self.orders.intern(order)
+        return row
+
+    def encode_many(self, states) -> np.ndarray:
+        return np.stack([self.encode(state) for state in states]) if states else np.zeros((0, self.width), np.int32)
+
+    def station_state(self, row, slot: int) -> StationState:
+        return StationState(
+            progress=int(row[self.station_column(slot, PROGRESS)]),
+            is_on_fire=bool(row[self.station_column(slot, FIRE)]),
+            content=self.station_content(row, slot),
+        )
+
+    def decode(self, row) -> KitchenState:
+        items = self.items.values
+        orders = self.orders.values
+        stations = PositionMap((pos, self.station_state(row, slot)) for slot, pos in enumerate(self.stations))
+        objects = PositionMap(
+            (pos, items[row[self.counter_base + slot]])
+            for slot, pos in enumerate(self.counters)
+            if row[self.counter_base + slot] != EMPTY
+        )
+        return KitchenState(
+            agent_pos=(int(row[AGENT_X]), int(row[AGENT_Y])),
+            held_item=items[row[HELD]],
+            layout=self.layout,
+            grid_objects=objects,
+            active_orders=self.active_orders(row),
+            delivered_orders=tuple(orders[i] for i in row[self.delivered_base:] if i != EMPTY),
+            stations_state=stations,
+            time=int(row[TIME]),
+            layout_index=self.layout_index,
+        )
+
+    def local_view(self, row, neighbors) -> KitchenState:
+        """Estado só com as estações e objetos de `neighbors` (x, y, tile) e as panelas.
+
+        Basta para `KitchenProblem.actions()`, que só olha a vizinhança-4 do agente,
+        o item na mão, os pedidos ativos e as panelas (para o escalonador); é bem mais
+        barato que `decode()`.
+        """
+        items = self.items.values
+        stations, objects = [], []
+        slots = {self.station_slot.get((x, y)) for x, y, _ in neighbors}
+        for slot in sorted(slots.union(self.pot_slots) - {None}):
+            stations.append((self.stations[slot], self.station_state(row, slot)))
+        for x, y, _ in neighbors:
+            slot = self.counter_slot.get((x, y))
+            if slot is not None and row[self.counter_base + slot] != EMPTY:
+                objects.append(((x, y), items[row[self.counter_base + slot]]))
+        return KitchenState(
+            agent_pos=(int(row[AGENT_X]), int(row[AGENT_Y])),
+            held_item=items[row[HELD]],
+            layout=self.layout,
+            grid_objects=PositionMap(objects),
+            active_orders=self.active_orders(row),
+            delivered_orders=(),
+            stations_state=PositionMap(stations),
+            time=int(row[TIME]),
+            layout_index=self.layout_index,
+        )
+
+
+class VectorizedKitchen:
+    """Sucessores em lote sobre a codificação de `StateCodec`.
+
+    Mesma dinâmica de `KitchenProblem.result()` e mesma ordem de sucessores de
+    `KitchenProblem.actions()` (movimentos primeiro, depois interações).
+    """
+
+    def __init__(self, initial: KitchenState):
+        self.problem = KitchenProblem(initial)
+        self.codec = codec = StateCodec(self.problem.initial)
+        index = codec.layout_index
+
+        # Vizinhos de movimento por célula (y * width + x), -1 onde não há
+        self.move_table = {}
+        neighbors = np.full((index.width * index.height, 8), -1, dtype=np.int32)
+        for (x, y), moves in index._move_actions.items():
+            cell = y * index.width + x
+            self.move_table[cell] = moves
+            for k, move in enumerate(moves):
+                neighbors[cell, k] = move.y * index.width + move.x
+        self.neighbors = neighbors
+
+        tiles = np.array(codec.station_tiles, dtype=object)
+        self.is_stove = tiles == 'S'
+        self.is_sink = tiles == 'W'
+        self.is_pot = tiles == 'K'
+        self._lookup_size = 0
+
+    # Tabelas de consulta por id de item para o tick das estações
+
+    def _refresh_lookups(self):
+        items = self.codec.items
+        if len(items) == self._lookup_size:
+            return
+        clean = items.intern(Plate(state="CLEAN"))
+        start = 0
+        cooks, sinks, pots = [], [], []
+        cooked, burnt, ready = [], [], []
+        # Internar os itens derivados pode aumentar a tabela: repete até estabilizar
+        while start < len(items):
+            end = len(items)
+            for item in items.values[start:end]:
+                stove_item = isinstance(item, Ingredient) and item.state == 'CHOPPED'
+                pot_item = isinstance(item, Pot) and item.state == 'COOKING'
+                cooks.append(stove_item)
+                sinks.append(isinstance(item, Plate) and item.state == 'DIRTY')
+                pots.append(pot_item)
+                cooked.append(items.intern(item._replace(state='COOKED')) if stove_item else EMPTY)
+                burnt.append(items.intern(item._replace(state='BURNT')) if stove_item else EMPTY)
+                ready.append(items.intern(item._replace(state='READY')) if pot_item else EMPTY)
+            start = end
+        self.cooks = np.array(cooks, dtype=bool)
+        self.washes = np.array(sinks, dtype=bool)
+        self.pot_cooks = np.array(pots, dtype=bool)
+        self.cooked = np.array(cooked, dtype=np.int32)
+        self.burnt = np.array(burnt, dtype=np.int32)
+        self.ready = np.array(ready, dtype=np.int32)
+        self.clean_plate = clean
+        self._lookup_size = len(items)
+
+    def tick(self, batch: np.ndarray) -> np.ndarray:
+        """Avança um passo de tempo em todas as linhas (in-place): relógios das estações."""
+        codec = self.codec
+        batch[:, TIME] += 1
+        if not codec.stations:
+            return batch
+        self._refresh_lookups()
+        content_cols = codec.station_columns(CONTENT)
+        progress_cols = codec.station_columns(PROGRESS)
+        fire_cols = codec.station_columns(FIRE)
+        pot_cols = codec.station_columns(POT_PROGRESS)
+
+        content = batch[:, content_cols]
+        progress = batch[:, progress_cols]
+        advanced = progress + 1
+
+        # Fogão: ingrediente picado cozinha e, passado o limite, queima e pega fogo
+        stove = self.is_stove & self.cooks[content]
+        burning = stove & (advanced >= BURN_LIMIT)
+        new_content = np.where(stove & (advanced >= COOK_DURATION), self.cooked[content], content)
+        new_content = np.where(burning, self.burnt[content], new_content)
+        batch[:, fire_cols] = np.where(burning, 1, batch[:, fire_cols])
+        new_progress = np.where(stove, advanced, progress)
+
+        # Pia: prato sujo fica limpo e o progresso volta a zero
+        sink = self.is_sink & self.washes[content]
+        washed = sink & (advanced >= WASH_DURATION)
+        new_content = np.where(washed, self.clean_plate, new_content)
+        new_progress = np.where(sink, np.where(washed, 0, advanced), new_progress)
+
+        # Panela: o progresso da estação e o da panela andam juntos até ficar pronta
+        pot = self.is_pot & self.pot_cooks[content]
+        new_content = np.where(pot & (advanced >= POT_COOK_DURATION), self.ready[content], new_content)
+        new_progress = np.where(pot, advanced, new_progress)
+        batch[:, pot_cols] = np.where(pot, advanced, batch[:, pot_cols])
+
+        batch[:, content_cols] = new_content
+        batch[:, progress_cols] = new_progress
+        return batch
+
+    # Efeito das interações (sem o tick), espelhando `KitchenProblem.result()`
+
+    def _apply_interaction(self, row, action: KitchenAction):
+        codec = self.codec
+        items = codec.items
+        pos = (action.x, action.y)
+        tile = codec.layout_index.tile_at(*pos)
+        held = items.values[row[HELD]]
+        station = codec.station_slot.get(pos)
+        counter = codec.counter_slot.get(pos)
+        obj = items.values[row[codec.counter_base + counter]] if counter is not None else None
+        op = action.op
+
+        if op == PICK_UP:
+            picked = obj
+            if picked is None:
+                if station is not None:
+                    picked = codec.station_content(row, station)
+                    codec.set_station(row, station, StationState(progress=0, content=None))
+                elif tile == 'O':
+                    picked = Ingredient(name="Onion", state="RAW")
+                elif tile == 'V':
+                    picked = Ingredient(name="Tomato", state="RAW")
+            if isinstance(held, Plate) and held.state == 'CLEAN':
+                if isinstance(picked, Ingredient):
+                    row[HELD] = items.intern(
+                        held._replace(contents=held.contents + (picked.name,), state="WITH_FOOD")
+                    )
+                    if counter is not None:
+                        row[codec.counter_base + counter] = EMPTY
+            else:
+                row[HELD] = items.intern(picked)
+                if counter is not None:
+                    row[codec.counter_base + counter] = EMPTY
+
+        elif op == PUT_DOWN:
+            if tile == 'G':
+                row[HELD] = items.intern(Plate(state="CLEAN")) if (
+                    isinstance(held, Plate) and held.state == 'WITH_FOOD'
+                ) else EMPTY
+            elif isinstance(obj, Plate) and obj.state == 'CLEAN' and isinstance(held, Ingredient):
+                row[codec.counter_base + counter] = items.intern(
+                    obj._replace(contents=obj.contents + (held.name,), state="WITH_FOOD")
+                )
+                row[HELD] = EMPTY
+            elif tile in ('C', 'E', 'P'):
+                row[codec.counter_base + counter] = row[HELD]
+                row[HELD] = EMPTY
+            elif tile in ('S', 'T', 'B', 'W'):
+                codec.set_station(row, station, StationState(progress=0, content=held))
+                row[HELD] = EMPTY
+
+        elif op == PUT_IN_POT:
+            pot = codec.station_content(row, station)
+            if isinstance(pot, Pot) and isinstance(held, Ingredient):
+                ingredients = pot.ingredients + (held.name,)
+                order = codec.pot_orders(row).get(pos)
+                needed = len(pot_needed_ingredients(pot._replace(ingredients=ingredients), order))
+                new_pot = Pot(ingredients=ingredients, state="COOKING" if needed == 0 else "FILLING", progress=0)
+                codec.set_station(row, station, StationState(progress=0, content=new_pot))
+                row[HELD] = EMPTY
+
+        elif op == SERVE_FROM_POT:
+            pot = codec.station_content(row, station)
+            orphan = bool(pot.ingredients) and pos not in codec.pot_orders(row) if isinstance(pot, Pot) else False
+            if isinstance(pot, Pot) and isinstance(held, Plate) and (pot.state == 'READY' or orphan):
+                row[HELD] = items.intern(held._replace(contents=pot.ingredients, state="WITH_FOOD"))
+                codec.set_station(row, station, StationState(progress=0, content=Pot()))
+
+        elif op == DELIVER:
+            active = row[codec.active_base:codec.delivered_base]
+            if active[0] != EMPTY:
+                orders = codec.active_orders(row)
+                order = deliverable_order(held, orders) if isinstance(held, Plate) else None
+                if order is None:
+                    order = order_priority(orders)[0]
+                i = orders.index(order)
+                delivered = row[codec.delivered_base:]
+                delivered[np.count_nonzero(delivered)] = active[i]
+                active[i:-1] = active[i + 1:].copy()
+                active[-1] = EMPTY
+                row[HELD] = EMPTY
+                for return_pos in codec.layout_index.return_counters:
+                    column = codec.counter_base + codec.counter_slot[return_pos]
+                    if row[column] == EMPTY:
+                        row[column] = items.intern(Plate(state="DIRTY"))
+                        break
+
+        elif op == CHOP:
+            content = codec.station_content(row, station)
+            progress = int(row[codec.station_column(station, PROGRESS)]) + 1
+            if progress >= CHOP_DURATION:
+                if isinstance(content, Ingredient):
+                    content = content._replace(state='CHOPPED')
+                progress = 0
+            codec.set_station(row, station, StationState(progress=progress, content=content))
+
+        elif op == EXTINGUISH:
+            codec.set_station(row, station, StationState(progress=0, is_on_fire=False, content=None))
+
+    # Geração em lote
+
+    def expand_many(self, batch: np.ndarray) -> Tuple[np.ndarray, List[KitchenAction], np.ndarray]:
+        """Sucessores de todas as linhas de `batch`.
+
+        Retorna (índice do pai de cada filho, ações, filhos), agrupados por pai na ordem
+        de `KitchenProblem.actions()`.
+        """
+        codec = self.codec
+        index = codec.layout_index
+        cells = batch[:, AGENT_Y] * index.width + batch[:, AGENT_X]
+
+        # Movimentos: todos os pares (pai, vizinho válido) de uma vez
+        targets = self.neighbors[cells]
+        move_parents, move_ranks = np.nonzero(targets >= 0)
+        move_targets = targets[move_parents, move_ranks]
+        move_children = batch[move_parents]
+        move_children[:, AGENT_X] = move_targets % index.width
+        move_children[:, AGENT_Y] = move_targets // index.width
+        move_actions = [self.move_table[c][k] for c, k in zip(cells[move_parents].tolist(), move_ranks.tolist())]
+
+        # Interações: só nos estados com algum tile interativo adjacente
+        parents, ranks, actions, rows = [], [], [], []
+        for i, row in enumerate(batch):
+            neighbors = index.interaction_neighbors((int(row[AGENT_X]), int(row[AGENT_Y])))
+            if not neighbors:
+                continue
+            state = codec.local_view(row, neighbors)
+            rank = 8
+            for action in self.problem.actions(state):
+                if action.op == MOVE:
+                    continue
+                child = row.copy()
+                self._apply_interaction(child, action)
+                parents.append(i)
+                ranks.append(rank)
+                actions.append(action)
+                rows.append(child)
+                rank += 1
+
+        if rows:
+            children = np.concatenate([move_children, np.stack(rows)])
+            all_parents = np.concatenate([move_parents, np.array(parents, dtype=move_parents.dtype)])
+            all_ranks = np.concatenate([move_ranks, np.array(ranks, dtype=move_ranks.dtype)])
+            all_actions = move_actions + actions
+        else:
+            children, all_parents, all_ranks, all_actions = move_children, move_parents, move_ranks, move_actions
+
+        order = np.lexsort((all_ranks, all_parents))
+        children = self.tick(children[order])
+        return all_parents[order], [all_actions[i] for i in order.tolist()], children
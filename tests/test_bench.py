@@ -0,0 +1,120 @@
+from agents.kitchen_agent import KitchenAgent
+from benchmarks.batch import FIELDS as BATCH_FIELDS, BatchCase, build_cases, read_records, run_batch, run_case
+from benchmarks.bench import compare_reports
+from benchmarks.episode import play_episode
+from benchmarks.render import MODES as RENDER_MODES, bench_layout
+from benchmarks.scaling import growth_exponent, run_scaling
+from benchmarks.throughput import run_stream
+from env.orders import OrderStream
+from problems.kitchen_problem import KitchenProblem
+from utils import create_initial_state, load_kitchen_data
+from utils.layout_generator import LayoutSpec
+
+
+def _report(**overrides):
+    row = {
+        "layout": "overcooked1.json",
+        "algorithm": "astar",
+        "solved": True,
+        "nodes_expanded": 1000,
+        "nodes_generated": 5000,
+        "peak_frontier": 300,
+        "peak_rss_kb": 20000,
+        "wall_time_s": 1.0,
+        "plan_length": 40,
+        "plan_cost": 40.0,
+        "orders_delivered": 1,
+        "steps": None,
+        "stalled": None,
+    }
+    row.update(overrides)
+    return {"meta": {}, "results": [row]}
+
+
+def test_compare_reports_without_regressions():
+    baseline = _report()
+    # Melhorias e ruído dentro da tolerância não são regressões
+    current = _report(nodes_expanded=900, wall_time_s=1.2, peak_rss_kb=21000)
+    assert compare_reports(baseline, current) == []
+
+
+def test_compare_reports_flags_regressions():
+    baseline = _report()
+    current = _report(solved=False, nodes_expanded=2000, wall_time_s=3.0, orders_delivered=0)
+    regressions = compare_reports(baseline, current)
+
+    assert any("deixou de encontrar" in r for r in regressions)
+    assert any("nodes_expanded" in r for r in regressions)
+    assert any("wall_time_s" in r for r in regressions)
+    assert any("orders_delivered" in r for r in regressions)
+
+
+def test_batch_case_record():
+    record = run_case(BatchCase("layouts/overcooked1.json", "astar", "subgoal"))
+
+    assert set(record) == set(BATCH_FIELDS)
+    assert record["step_budget"] == 300          # max_steps do layout
+    assert record["score"] == record["max_score"] == 20
+    assert record["stars"] == 3
+    assert record["expansions"] > 0
+
+
+def test_run_batch_streams_jsonl(tmp_path):
+    cases = build_cases(["layouts/overcooked1.json"], ["astar", "ida_star"], ["subgoal"], [5, 10])
+    output = tmp_path / "batch.jsonl"
+    seen = []
+    records = run_batch(cases, str(output), jobs=2, on_record=seen.append)
+
+    assert len(records) == len(seen) == 4
+    assert sorted(map(str, read_records(output))) == sorted(map(str, records))
+    assert sorted((r["algorithm"], r["steps"]) for r in records) == [
+        ("astar", 5), ("astar", 10), ("ida_star", 5), ("ida_star", 10)
+    ]
+
+
+def test_render_overhead_benchmark_reports_every_mode():
+    results, steps = bench_layout("layouts/overcooked1.json", repeat=1)
+    assert steps > 0
+    assert set(results) == set(RENDER_MODES)
+    assert all(us > 0 for us in results.values())
+
+
+def test_throughput_benchmark_streams_orders():
+    result, episode = run_stream("layouts/overcooked1.json", count=3, mean_interval=30)
+    assert not episode.stalled
+    assert result.delivered + result.expired + result.pending == 3
+    assert result.delivered > 0 and result.score_per_min > 0
+    assert result.max_queue >= 1
+
+
+def test_episode_waits_for_orders_still_to_arrive():
+    _, onion_orders, _ = load_kitchen_data("layouts/overcooked1.json")
+    _, mixed_orders, _ = load_kitchen_data("layouts/overcooked2.json")
+    layout = ["#####", "#OTK#", "#.A.#", "#DPC#", "#####"]
+    onion = onion_orders[0]._replace(instant=20)
+    # Sem tomates na cozinha: a busca falha enquanto este for o único pedido ativo
+    tomato = mixed_orders[1]._replace(instant=0, duration=10)
+
+    def play(stream):
+        state = create_initial_state(layout, list(stream.orders))
+        agent = KitchenAgent(heuristic=KitchenProblem(state).h)
+        return play_episode(state, agent, 200, orders=stream)
+
+    for orders in ([onion], [tomato, onion]):
+        episode = play(OrderStream(orders))
+        assert not episode.stalled and episode.env.is_done()
+        assert episode.env.state.delivered_orders == (onion,)
+        assert episode.steps - episode.actions >= 20   # esperou a chegada do pedido
+
+    # Nada mais chega nem expira: a busca falharia para sempre
+    episode = play(OrderStream([tomato], expire=False))
+    assert episode.stalled and episode.steps == 1
+
+
+def test_scaling_benchmark_fits_growth_with_area(tmp_path):
+    rows = list(run_scaling(((10, 7), (16, 10)), ["astar"], LayoutSpec(), str(tmp_path), isolated=False))
+    assert [(r["width"], r["height"], r["area"]) for r in rows] == [(10, 7, 70), (16, 10, 160)]
+    assert all(r["solved"] and r["nodes_expanded"] > 0 for r in rows)
+    assert growth_exponent(rows, "nodes_expanded") is not None
+    assert growth_exponent(rows[:1], "nodes_expanded") is None
+    assert growth_exponent([{"area": 10, "solved": True, "x": 10}, {"area": 100, "solved": True, "x": 100}], "x") == 1.0
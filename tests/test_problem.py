@@ -1,5 +1,30 @@
-from models.entities import Order,Ingredient
-from problems.kitchen_problem import KitchenProblem
+import copy
+import pickle
+
+import pytest
+
+from models.actions import KitchenAction, DELIVER, GOTO, MOVE, PICK_UP, WAIT, WAIT_UNTIL, to_action
+from models.entities import Order,Ingredient, Plate, Pot
+from models.states import ActiveTimer, PositionMap, StationState
+from problems.kitchen_problem import KitchenProblem, expand_macros
+from problems.vectorized import VectorizedKitchen
+from agents.algorithms.search import (
+    astar_search_with_limit,
+    greedy_best_first_search,
+    ida_star_search,
+    rbfs_search,
+    ARAStar,
+    ara_star_search,
+)
+from agents.algorithms.fingerprints import FingerprintTable, FingerprintCollision
+from agents.algorithms.node_store import ROOT, NodeStore
+from agents.algorithms.stats import SearchStats, LatencyHistogram
+from agents.kitchen_agent import KitchenAgent
+from agents.plan_cache import PlanCache
+from agents.replanning import DStarLite
+from agents.subgoals import zero_heuristic
+from aima3.search import Node
+from utils import load_kitchen_data, assign_pots, deliverable_order, order_priority, pot_assignments
 from utils.state_factory import create_initial_state
 
 def create_simple_state():
@@ -48,3 +73,682 @@ def test_kitchen_problem_result_pickup():
     
     # Testa se o tempo está sendo incrementado
     assert new_state.time == state.time + 1
+
+def test_kitchen_problem_actions_are_typed():
+    state = create_simple_state()
+    problem = KitchenProblem(state)
+    actions = problem.actions(state)
+
+    assert all(isinstance(a, KitchenAction) for a in actions)
+    assert KitchenAction(PICK_UP, 2, 3, "Onion", "RAW") in actions
+    # A lista aceita a forma textual (camada de conversão); a ação em si nunca é igual a ela
+    pickup = actions.index(KitchenAction(PICK_UP, 2, 3, "Onion", "RAW"))
+    assert actions.index("PickUp(Onion, RAW, 2, 3)") == pickup and actions.count("Move(1, 2)") == 1
+    assert "PickUp(Onion, RAW, 2, 3)" not in list(actions) and "Nada" not in actions
+    # A forma textual existe apenas para logs/renderização
+    assert str(KitchenAction(PICK_UP, 2, 3, "Onion", "RAW")) == "PickUp(Onion, RAW, 2, 3)"
+
+def test_kitchen_action_parse_roundtrip():
+    for text in ("Move(1, 2)", "PickUp(Onion, RAW, 2, 3)", "PutInPot(Onion, 7, 1)",
+                 "PutDown(Onion, trash, 4, 5)", "Wait(3, 3)", "Deliver(1, 7)"):
+        action = KitchenAction.parse(text)
+        assert action is not None
+        assert str(action) == text
+    assert KitchenAction.parse("Nada") is None
+
+
+def test_kitchen_action_eq_hash_contract():
+    # Igualdade só entre ações (a forma textual é convertida na borda), com hash coerente
+    move = KitchenAction(MOVE, 1, 2)
+    assert move != "Move(1, 2)" and "Move(1, 2)" not in {move}
+    assert to_action("Move(1, 2)") == move and hash(to_action("Move(1, 2)")) == hash(move)
+    assert {move: 1}[KitchenAction.parse("Move(1, 2)")] == 1
+
+def test_kitchen_problem_result_accepts_typed_and_string_actions():
+    state = create_simple_state()
+    problem = KitchenProblem(state)
+
+    typed = problem.result(state, KitchenAction(PICK_UP, 2, 3, "Onion", "RAW"))
+    legacy = problem.result(state, "PickUp(Onion, RAW, 2, 3)")
+
+    assert typed == legacy
+    assert problem.path_cost(0, state, KitchenAction(WAIT, 2, 3), state) == 1.1
+    assert problem.path_cost(0, state, "Wait(2, 3)", state) == 1.1
+
+def test_kitchen_problem_result_shares_unchanged_maps():
+    state = create_simple_state()
+    problem = KitchenProblem(state)
+
+    moved = problem.result(state, KitchenAction(MOVE, 1, 2))
+    assert moved.grid_objects is state.grid_objects
+    assert moved.get_object_at((2, 1)) == state.get_object_at((2, 1))
+
+    # O hash incremental do mapa derivado coincide com o de um mapa novo
+    picked = problem.result(state, KitchenAction(PICK_UP, 2, 1, "Plate", "CLEAN"))
+    assert picked.get_object_at((2, 1)) is None
+    assert picked.grid_objects == PositionMap(picked.grid_objects.items())
+    assert hash(picked.grid_objects) == hash(PositionMap(picked.grid_objects.items()))
+
+
+def test_subgoal_heuristic_is_admissible_and_zero_at_goal():
+    state = create_simple_state()
+    problem = KitchenProblem(state)
+    agent = KitchenAgent(heuristic=problem.h)
+
+    subgoal = agent.get_subgoal_test(state)
+    assert subgoal.name == "fetch_ingredient"
+
+    sub_problem = KitchenProblem(state, goal_test_fn=subgoal.test)
+    optimal = astar_search_with_limit(sub_problem, zero_heuristic)
+    guided = astar_search_with_limit(sub_problem, subgoal.h)
+    assert guided.path_cost == optimal.path_cost
+
+    # h nunca superestima o custo restante e vale 0 no objetivo
+    for node in optimal.path():
+        assert subgoal.h(node) <= optimal.path_cost - node.path_cost
+    assert subgoal.h(optimal) == 0
+
+    # Segurando a cebola crua: o sub-objetivo passa a ser levá-la a uma tábua;
+    # sem tábuas no layout a heurística ainda é finita
+    held = problem.result(state, "PickUp(Onion, RAW, 2, 3)")
+    assert agent.get_subgoal_test(held).name == "place_raw"
+    assert agent.get_subgoal_test(held).h(Node(held)) >= 1
+
+
+def test_chop_heuristic_counts_chopped_items_already_out():
+    # Cebola crua na mão e uma já cortada no balcão ao lado: largar + pegar custa 2
+    layout, orders, _ = load_kitchen_data("layouts/overcooked1.json")
+    state = create_initial_state(layout, orders)._replace(
+        agent_pos=(2, 2), held_item=Ingredient(name="Onion", state="RAW"),
+    )
+    state = state._replace(grid_objects=state.grid_objects.set((1, 2), Ingredient(name="Onion", state="CHOPPED")))
+    subgoal = KitchenAgent(heuristic=None).get_subgoal_test(state)
+    assert subgoal.name == "chop_held"
+
+    problem = KitchenProblem(state, goal_test_fn=subgoal.test)
+    optimal = astar_search_with_limit(problem, zero_heuristic)
+    assert optimal.path_cost == 2.0
+    for node in optimal.path():
+        assert subgoal.h(node) <= optimal.path_cost - node.path_cost
+    assert astar_search_with_limit(problem, subgoal.h).path_cost == optimal.path_cost
+
+
+def test_search_functions_fill_stats():
+    state = create_simple_state()
+    problem = KitchenProblem(state, goal_test_fn=lambda s: s.held_item is not None)
+
+    stats = SearchStats()
+    node = astar_search_with_limit(problem, lambda n: 0, stats=stats)
+    assert node is not None
+    assert stats.expanded >= 1
+    assert stats.generated >= stats.expanded
+    assert stats.peak_frontier >= 1
+
+    # Limite de expansões opcional nas buscas sem limite por padrão
+    unreachable = KitchenProblem(state, goal_test_fn=lambda s: False)
+    capped = SearchStats()
+    assert greedy_best_first_search(unreachable, lambda n: 0, max_expansions=5, stats=capped) is None
+    assert capped.expanded == 5
+
+
+def test_search_profiling_progress_and_transition_hooks():
+    transitions = []
+    progress = []
+    state = create_simple_state()
+    problem = KitchenProblem(
+        state,
+        goal_test_fn=lambda s: s.held_item is not None,
+        on_transition=lambda s, a, s2: transitions.append((s, a, s2)),
+    )
+
+    stats = SearchStats(profile=True, on_progress=lambda st: progress.append(st.expanded), progress_every=1)
+    node = astar_search_with_limit(problem, lambda n: 0, stats=stats)
+    assert node is not None
+
+    assert stats.calls["actions"] == stats.expanded
+    assert stats.calls["result"] == stats.generated == len(transitions)
+    assert stats.calls["goal_test"] >= stats.expanded
+    assert stats.calls["h"] == stats.pushes
+    assert progress == list(range(1, stats.expanded + 1))
+    assert stats.elapsed_s > 0
+
+    # Sem perfil, só os contadores são preenchidos
+    plain = SearchStats()
+    astar_search_with_limit(problem, lambda n: 0, stats=plain)
+    assert plain.expanded == stats.expanded
+    assert plain.calls["actions"] == 0
+
+
+def test_astar_skips_stale_entries_and_tests_goal_once():
+    state = create_simple_state()
+
+    # Estado inicial já é objetivo: um único teste de objetivo
+    trivial = SearchStats(profile=True)
+    node = astar_search_with_limit(KitchenProblem(state, goal_test_fn=lambda s: True), lambda n: 0, stats=trivial)
+    assert node.state == state
+    assert trivial.calls["goal_test"] == 1
+
+    # Com h consistente (h = 0) nenhum estado é expandido duas vezes
+    problem = KitchenProblem(
+        state,
+        goal_test_fn=lambda s: isinstance(s.held_item, Ingredient) and s.agent_pos == (1, 1),
+    )
+    stats = SearchStats()
+    node = astar_search_with_limit(problem, lambda n: 0, stats=stats)
+    assert node is not None
+    assert stats.reexpansions == 0
+    # Toda retirada do heap (expansão, entrada obsoleta ou o objetivo) veio de um push
+    assert stats.expanded + stats.stale_pops + 1 <= stats.pushes
+
+
+def test_memory_bounded_searches_match_astar_cost():
+    state = create_simple_state()
+    problem = KitchenProblem(
+        state,
+        goal_test_fn=lambda s: isinstance(s.held_item, Ingredient) and s.agent_pos == (1, 1),
+    )
+    optimal = astar_search_with_limit(problem, zero_heuristic)
+
+    for search, options in (
+        (ida_star_search, {}),
+        (ida_star_search, {"table_size": 2}),  # tabela quase vazia: só o caminho evita ciclos
+        (rbfs_search, {}),
+    ):
+        stats = SearchStats()
+        node = search(problem, zero_heuristic, stats=stats, **options)
+        assert node is not None
+        assert node.path_cost == optimal.path_cost
+        assert problem.goal_test(node.state)
+        assert stats.expanded > 0
+
+
+def test_kitchen_agent_selects_search_algorithm():
+    state = create_simple_state()
+    agent = KitchenAgent(heuristic=KitchenProblem(state).h, algorithm="ida_star", search_options={"table_size": 10})
+    action = agent(state)
+    assert action == KitchenAction.parse("PickUp(Onion, RAW, 2, 3)")
+    assert agent.debug_info["plan_found"]
+
+    with pytest.raises(ValueError):
+        KitchenAgent(heuristic=None, algorithm="dijkstra")
+
+
+def test_plan_cache_validates_and_evicts_lru():
+    state = create_simple_state()
+    holding = lambda s: isinstance(s.held_item, Ingredient)
+    problem = KitchenProblem(state, goal_test_fn=holding)
+    pickup = KitchenAction.parse("PickUp(Onion, RAW, 2, 3)")
+    cache = PlanCache(max_size=2)
+
+    assert cache.lookup("a", problem, holding) is None
+    cache.store("a", [pickup])
+    assert cache.lookup("a", problem, holding) == (pickup,)
+
+    # Plano inaplicável no estado atual (mover para a parede) não é reaproveitado
+    cache.store("b", [KitchenAction.parse("Move(0, 2)"), pickup])
+    assert cache.lookup("b", problem, holding) is None
+    assert cache.invalidations == 1
+
+    # "a" foi usado mais recentemente que "b": "b" sai ao entrar "c"
+    cache.lookup("a", problem, holding)
+    cache.store("c", [pickup])
+    assert set(cache.entries) == {"a", "c"}
+    assert cache.as_dict()["hits"] == 2
+
+
+def test_kitchen_agent_plan_cache_keeps_episode():
+    layout, orders, _ = load_kitchen_data("layouts/overcooked1.json")
+    initial = create_initial_state(layout, orders)
+    problem = KitchenProblem(initial)
+
+    def play(agent):
+        state, actions, info = initial, [], None
+        while state.active_orders:
+            action = agent(state)
+            assert action is not None
+            actions.append(action)
+            info = agent.debug_info.get("plan_cache", info)
+            state = problem.result(state, action)
+        return actions, info
+
+    cached_agent = KitchenAgent(heuristic=problem.h)
+    plain_agent = KitchenAgent(heuristic=problem.h, plan_cache_size=0)
+    cached_actions, info = play(cached_agent)
+    plain_actions, plain_info = play(plain_agent)
+    assert cached_actions == plain_actions
+    assert plain_info is None
+
+    assert info["hits"] > 0
+    assert 0 < info["hit_rate"] < 1
+    assert cached_agent.total_stats.expanded < plain_agent.total_stats.expanded
+
+
+def test_ara_star_is_resumable_and_ends_optimal():
+    layout, orders, _ = load_kitchen_data("layouts/overcooked1.json")
+    state = create_initial_state(layout, orders)
+    subgoal = KitchenAgent(heuristic=None).get_subgoal_test(state)
+    problem = KitchenProblem(state, goal_test_fn=subgoal.test)
+    optimal = astar_search_with_limit(problem, subgoal.h)
+
+    h_calls = []
+    counted_h = lambda node: h_calls.append(node) or subgoal.h(node)
+    planner = ARAStar(problem, counted_h, initial_weight=3.0, weight_step=1.0)
+    assert planner.step(0.0) is None        # orçamento nulo: nada feito, busca mantida
+    assert not planner.done
+    # Nem a repriorização da fronteira passa do orçamento: ela fica para o próximo passo
+    assert h_calls == [] and planner.rebuild and len(planner.pending) == 1
+
+    costs = []
+    stats = SearchStats()
+    while not planner.done:
+        node = planner.step(0.001, stats)
+        if node is not None:
+            costs.append(node.path_cost)
+    assert costs == sorted(costs, reverse=True)
+    assert costs[-1] == pytest.approx(optimal.path_cost)
+    assert planner.weight == 1.0
+    assert stats.expanded == planner.expansions
+    assert ara_star_search(problem, subgoal.h).path_cost == pytest.approx(optimal.path_cost)
+
+
+def test_capped_ara_star_plan_stays_out_of_plan_cache():
+    layout, orders, _ = load_kitchen_data("layouts/overcooked1.json")
+    state = create_initial_state(layout, orders)
+    targets = ((2, 2), (3, 7))
+    problem = KitchenProblem(state, goal_test_fn=lambda s: s.agent_pos in targets)
+    # Manhattan (os movimentos são em 8 direções): o primeiro plano do ARA* custa 5, o ótimo 3
+    h = lambda n: min(abs(n.state.agent_pos[0] - x) + abs(n.state.agent_pos[1] - y) for x, y in targets)
+    options = {"initial_weight": 3.0, "weight_step": 1.0}
+
+    for tick_budget_ms in (None, 1000):
+        agent = KitchenAgent(heuristic=h, algorithm="ara_star", tick_budget_ms=tick_budget_ms,
+                             search_options=options)
+        node = agent._search(problem, h, max_expansions=5, stats=SearchStats(), key="k")
+        assert node.path_cost == 5
+        assert len(agent.plan_cache) == 0
+
+        node = agent._search(problem, h, max_expansions=1000, stats=SearchStats(), key="k")
+        assert node.path_cost == 3
+        assert agent.plan_cache.entries["k"] == tuple(node.solution())
+
+
+def test_kitchen_agent_restarts_stale_ara_star_without_plan():
+    layout, orders, _ = load_kitchen_data("layouts/overcooked1.json")
+    state = create_initial_state(layout, orders)
+    agent = KitchenAgent(heuristic=KitchenProblem(state).h, algorithm="ara_star", tick_budget_ms=0)
+
+    # Orçamento nulo: o ARA* fica em andamento, sem plano
+    assert agent(state) is None and agent.debug_info["planning"]
+    planner = agent.planner
+    assert agent(state._replace(time=1)) is None and agent.planner is planner
+
+    # Um pedido chega antes do primeiro plano: a busca recomeça do estado atual
+    arrived = state._replace(time=2, active_orders=state.active_orders + (orders[0]._replace(instant=2),))
+    assert agent(arrived) is None and agent.debug_info["planner_restarted"]
+    assert agent.planner is not planner and agent.planner.problem.initial == arrived
+
+
+def test_kitchen_agent_tick_budget_and_latency_histogram():
+    layout, orders, max_steps = load_kitchen_data("layouts/overcooked1.json")
+    state = create_initial_state(layout, orders)
+    problem = KitchenProblem(state)
+    agent = KitchenAgent(heuristic=problem.h, algorithm="ara_star", tick_budget_ms=1)
+
+    calls = 0
+    for _ in range(max_steps):
+        action = agent(state)
+        calls += 1
+        assert action is not None or agent.debug_info.get("planning")
+        if action is not None:
+            state = problem.result(state, action)
+        if not state.active_orders:
+            break
+    assert not state.active_orders
+    assert agent.latency.count == calls
+    assert agent.latency.percentile(0.5) <= agent.latency.max_ms
+
+    with pytest.raises(ValueError):
+        KitchenAgent(heuristic=problem.h, tick_budget_ms=1)
+
+    histogram = LatencyHistogram(bounds=(1, 10))
+    for latency in (0.5, 0.5, 5, 50):
+        histogram.record(latency)
+    assert histogram.as_dict()["buckets"] == {"<=1ms": 2, "<=10ms": 1, ">10ms": 1}
+    assert histogram.percentile(0.5) == pytest.approx(1.0)
+    assert histogram.percentile(1.0) == pytest.approx(50)
+
+
+def test_dstar_lite_matches_bfs_and_repairs_blocked_cells():
+    layout, orders, _ = load_kitchen_data("layouts/overcooked2.json")
+    index = create_initial_state(layout, orders).layout_index
+    walkable = sorted(p for p in index._move_actions)
+    goal, start = walkable[0], walkable[-1]
+
+    planner = DStarLite(index, goal)
+    path = planner.path(start)
+    assert path[0] == start and path[-1] == goal
+    assert len(path) - 1 == index.distance(start, goal)
+
+    # O agente anda e a busca é reaproveitada
+    expansions = planner.expansions
+    assert len(planner.path(path[1])) == len(path) - 1
+    assert planner.expansions - expansions < expansions
+
+    # Bloquear um tile do caminho: o novo caminho desvia e tem o custo de uma busca nova
+    blocked = {path[len(path) // 2]}
+    planner.set_blocked(blocked)
+    repaired = planner.path(start)
+    fresh = DStarLite(index, goal, blocked).path(start)
+    assert not blocked & set(repaired or ())
+    assert (repaired is None) == (fresh is None)
+    if repaired:
+        assert len(repaired) == len(fresh)
+
+
+def test_kitchen_agent_repairs_diverged_plan():
+    layout, orders, max_steps = load_kitchen_data("layouts/overcooked1.json")
+    state = create_initial_state(layout, orders)
+    problem = KitchenProblem(state)
+    agent = KitchenAgent(heuristic=problem.h)
+
+    state = problem.result(state, agent(state))
+    assert agent.plan
+    # Empurra o agente para outro tile: só os Moves até a próxima interação são refeitos
+    other = next(p for p in sorted(state.layout_index._move_actions) if p != state.agent_pos)
+    state = state._replace(agent_pos=other)
+    action = agent(state)
+    assert agent.debug_info["plan_repair"] in ("movement", "still_valid")
+    for _ in range(max_steps):
+        state = problem.result(state, action)
+        if not state.active_orders:
+            break
+        action = agent(state)
+    assert not state.active_orders
+
+    # Um item na mão invalida o PickUp do plano: o sub-objetivo é buscado de novo
+    agent = KitchenAgent(heuristic=problem.h)
+    state = create_initial_state(layout, orders)
+    state = problem.result(state, agent(state))
+    state = state._replace(held_item=Ingredient(name="Onion", state="RAW"))
+    agent(state)
+    assert agent.debug_info["plan_repair"] == "replan"
+    assert agent.repairs["replan"] == 1
+
+
+def _assert_same_successors(problem, vectorized, states):
+    parents, actions, children = vectorized.expand_many(vectorized.codec.encode_many(states))
+    expected = [(i, a, problem.result(s, a)) for i, s in enumerate(states) for a in problem.actions(s)]
+    assert len(expected) == len(actions)
+    for (i, action, child), parent, vec_action, row in zip(expected, parents, actions, children):
+        decoded = vectorized.codec.decode(row)
+        assert (parent, vec_action) == (i, action)
+        assert decoded == child and decoded.time == child.time
+
+
+def test_vectorized_expansion_matches_kitchen_problem():
+    # Estados de um episódio completo (pratos sujos, panela enchendo e cozinhando)
+    layout, orders, max_steps = load_kitchen_data("layouts/overcooked1.json")
+    state = create_initial_state(layout, orders)
+    problem = KitchenProblem(state)
+    vectorized = VectorizedKitchen(state)
+    agent = KitchenAgent(heuristic=problem.h)
+    states = [state]
+    for _ in range(max_steps):
+        state = problem.result(state, agent(state))
+        states.append(state)
+        if not state.active_orders:
+            break
+    assert [vectorized.codec.decode(row) for row in vectorized.codec.encode_many(states)] == states
+    _assert_same_successors(problem, vectorized, states)
+
+    # Relógios no limite: fogão queimando, prato terminando de lavar, panela ficando pronta
+    state = create_initial_state(["#####", "#SAW#", "#.K.#", "#####"], orders)
+    state = state._replace(stations_state=state.stations_state.update({
+        (1, 1): StationState(progress=9, content=Ingredient(name="Onion", state="CHOPPED")),
+        (3, 1): StationState(progress=1, content=Plate(state="DIRTY")),
+        (2, 2): StationState(progress=6, content=Pot(ingredients=("Onion",) * 3, state="COOKING", progress=6)),
+    }))
+    problem = KitchenProblem(state)
+    states = [state, state._replace(held_item=Plate(state="CLEAN"))]
+    states += [problem.result(s, a) for s in states for a in problem.actions(s)]
+    _assert_same_successors(problem, VectorizedKitchen(state), states)
+    burnt = problem.result(state, problem.actions(state)[0]).stations_state.get((1, 1))
+    assert burnt.is_on_fire and burnt.content.state == "BURNT"
+
+def test_pot_scheduler_spreads_orders_and_delivers_any_active():
+    layout = [
+        "#######",
+        "#K.K.D#",
+        "#..A..#",
+        "#O.T.C#",
+        "#######",
+    ]
+    soon = Order(ingredients=("Onion",), instant=0, duration=20, score=10, recipe=None)
+    late = Order(ingredients=("Tomato",), instant=0, duration=90, score=30, recipe=None)
+    state = create_initial_state(layout, [late, soon])
+
+    # Prazo mais curto primeiro; cada panela fica com um pedido diferente
+    assert order_priority(state.active_orders) == (soon, late)
+    assert pot_assignments(state) == {(1, 1): soon, (3, 1): late}
+
+    # Panela com ingrediente fica com o pedido em que ele cabe, mesmo que não seja o primeiro
+    pots = [((1, 1), Pot()), ((3, 1), Pot(ingredients=("Tomato",), state="FILLING"))]
+    assert assign_pots(pots, state.active_orders) == {(3, 1): late, (1, 1): soon}
+
+    # A entrega aceita qualquer pedido ativo que o prato satisfaça, não só o da frente
+    problem = KitchenProblem(state)
+    plate = Plate(state="WITH_FOOD", contents=("Tomato",))
+    at_delivery = state._replace(agent_pos=(4, 1), held_item=plate)
+    assert deliverable_order(plate, state.active_orders) == late
+    assert KitchenAction(DELIVER, 5, 1) in problem.actions(at_delivery)
+    delivered = problem.result(at_delivery, "Deliver(5, 1)")
+    assert delivered.active_orders == (soon,)
+    assert delivered.delivered_orders == (late,)
+
+    wrong = at_delivery._replace(held_item=Plate(state="WITH_FOOD", contents=("Onion", "Onion")))
+    assert "Deliver(5, 1)" not in problem.actions(wrong)
+
+
+def test_macro_actions_match_primitive_moves():
+    layout, orders, _ = load_kitchen_data("layouts/overcooked1.json")
+    state = create_initial_state(layout, orders)
+    # Panela cozinhando: o relógio dela corre durante o GoTo
+    cooking = StationState(progress=4, content=Pot(ingredients=("Onion",) * 3, state="COOKING", progress=4))
+    state = state._replace(stations_state=state.stations_state.set((7, 1), cooking))
+    problem = KitchenProblem(state, macro_actions=True)
+
+    actions = problem.actions(state)
+    assert actions and not any(a.op == MOVE for a in actions)
+    assert KitchenAction(GOTO, 7, 2) in actions
+    # Só destinos com alguma interação: com as mãos vazias, balcões vazios não contam
+    assert KitchenAction(GOTO, 2, 2) not in actions
+
+    goto = KitchenAction(GOTO, 11, 7)
+    after = problem.result(state, goto)
+    moves = expand_macros([goto], state)
+    assert len(moves) == state.layout_index.distance(state.agent_pos, (11, 7)) == 6
+    assert all(a.op == MOVE for a in moves)
+    primitive = KitchenProblem(state)
+    expected = state
+    for action in moves:
+        assert action in primitive.actions(expected)
+        expected = primitive.result(expected, action)
+    assert after == expected and after.time == expected.time == 6
+    assert after.get_station_state_at((7, 1)).content.state == "READY"
+    assert problem.path_cost(0, state, goto, after) == 6
+
+    # O agente no modo hierárquico executa só ações primitivas e cumpre o level
+    agent = KitchenAgent(heuristic=problem.h, macro_actions=True)
+    state = create_initial_state(layout, orders)
+    executed = []
+    for _ in range(120):
+        action = agent(state)
+        if action is None:
+            break
+        executed.append(action)
+        state = primitive.result(state, action)
+    assert not state.active_orders
+    assert all(a.op != GOTO for a in executed)
+
+
+def test_time_skip_jumps_to_next_timer_event():
+    layout, orders, _ = load_kitchen_data("layouts/overcooked1.json")
+    state = create_initial_state(layout, orders)
+    cooking = StationState(progress=0, content=Pot(ingredients=("Onion",) * 3, state="COOKING"))
+    washing = StationState(progress=0, content=Plate(state="DIRTY"))
+    state = state._replace(
+        agent_pos=(7, 2),
+        stations_state=state.stations_state.set((7, 1), cooking).set((13, 5), washing),
+    )
+    problem = KitchenProblem(state, time_skip=True)
+    actions = problem.actions(state)
+    assert KitchenAction(WAIT_UNTIL, 7, 1) in actions
+    assert not any(a.op == WAIT for a in actions)
+
+    # Próximo evento: a pia termina de lavar em 2 ticks (antes da panela)
+    skip = KitchenAction(WAIT_UNTIL, 7, 1)
+    assert problem.next_event(state) == 2
+    after = problem.result(state, skip)
+    assert after.time == 2 and after.get_station_state_at((13, 5)).content.state == "CLEAN"
+    assert problem.path_cost(0, state, skip, after) == pytest.approx(2.2)
+    ready = problem.result(after, skip)
+    assert ready.time == 7 and ready.get_station_state_at((7, 1)).content.state == "READY"
+
+    # O plano é expandido nos Waits equivalentes, que o problema primitivo reproduz
+    waits = expand_macros([skip, skip], state)
+    assert waits == [KitchenAction(WAIT, 7, 1)] * 7
+    primitive = KitchenProblem(state)
+    expected = state
+    for action in waits:
+        assert action in primitive.actions(expected)
+        expected = primitive.result(expected, action)
+    assert expected == ready
+
+
+def test_active_timers_track_running_stations():
+    layout, orders, _ = load_kitchen_data("layouts/overcooked1.json")
+    state = create_initial_state(layout, orders)
+    problem = KitchenProblem(state)
+    assert problem.active_timers(state) == ()
+
+    # Prato sujo na mão, ao lado da pia: largá-lo liga o relógio da pia
+    dirty = state._replace(agent_pos=(12, 5), held_item=Plate(state="DIRTY"))
+    washing = problem.result(dirty, "PutDown(Plate, DIRTY, 13, 5)")
+    assert problem.active_timers(washing) == (ActiveTimer((13, 5), "W", 1),)
+    assert problem.next_event(washing) == 1
+
+    # O relógio chega ao fim e sai do conjunto; o resultado bate com o recálculo do zero
+    clean = problem.result(washing, "Move(11, 5)")
+    assert clean.get_station_state_at((13, 5)).content.state == "CLEAN"
+    assert problem.active_timers(clean) == ()
+    for derived in (washing, clean):
+        assert problem.active_timers(derived._replace()) == problem.active_timers(derived)
+
+
+def test_kitchen_state_caches_live_outside_instance_dict():
+    layout, orders, _ = load_kitchen_data("layouts/overcooked1.json")
+    problem = KitchenProblem(create_initial_state(layout, orders))
+    state = problem.result(problem.initial, "Move(6, 4)")
+    hash(state)
+    problem.fingerprint(state)
+    assert not hasattr(state, "__dict__")
+    assert state.cache.timers == () and state.cache.hash is not None
+
+    # _replace, cópias e a serialização começam com o cache vazio; a igualdade o ignora
+    for copy_ in (state._replace(), pickle.loads(pickle.dumps(state)), copy.copy(state)):
+        assert copy_ == state and copy_.cache is not state.cache
+        assert copy_.cache.fingerprint is None and copy_.cache.timers is None
+    assert "cache" not in repr(state)
+
+
+def test_fingerprint_closed_set_matches_state_closed_set():
+    layout, orders, _ = load_kitchen_data("layouts/overcooked1.json")
+    state = create_initial_state(layout, orders)
+    problem = KitchenProblem(state)
+
+    # A impressão derivada em result() é a mesma recalculada do zero
+    current = problem.initial
+    problem.fingerprint(current)
+    for action in ["Move(11, 5)", "PickUp(11, 4)", "Move(11, 5)", "Move(12, 5)", "PutDown(Plate, CLEAN, 13, 5)",
+                   "Wait(13, 5)", "PickUp(13, 5)"]:
+        current = problem.result(current, action)
+        assert problem.fingerprint(current) == problem.fingerprint(current._replace())
+    assert problem.fingerprint(current._replace(time=0)) == problem.fingerprint(current)
+
+    # As chaves são do LayoutIndex do estado, não do processo
+    other_layout, other_orders, _ = load_kitchen_data("layouts/overcooked2.json")
+    other = create_initial_state(other_layout, other_orders)
+    keys = dict(state.layout_index.zobrist_keys)
+    KitchenProblem.fingerprint(other)
+    assert keys and state.layout_index.zobrist_keys == keys and other.layout_index.zobrist_keys
+
+    # Mesma busca com estados ou impressões; o modo verificado confere colisões
+    subgoal = KitchenProblem(state, goal_test_fn=lambda s: isinstance(s.held_item, Ingredient))
+    for search in (astar_search_with_limit, greedy_best_first_search):
+        plain, verified = SearchStats(), SearchStats()
+        node = search(subgoal, zero_heuristic, max_expansions=5000, stats=plain)
+        fp_node = search(subgoal, zero_heuristic, max_expansions=5000, stats=verified, fingerprints="verify")
+        assert node is not None and node.solution() == fp_node.solution()
+        assert (plain.expanded, plain.pushes) == (verified.expanded, verified.pushes)
+
+    # A tabela cresce mantendo as entradas, e uma colisão forjada é detectada
+    table = FingerprintTable(problem.fingerprint, capacity=8)
+    states = [problem.initial._replace(agent_pos=(x, 5)) for x in range(1, 14)]
+    for g, s in enumerate(states):
+        table[s] = float(g)
+    assert len(table) == len(states) and table.nbytes >= 16 * len(states)
+    assert [table[s] for s in states] == [float(g) for g in range(len(states))]
+    colliding = FingerprintTable(lambda s: 42, verify=True)
+    colliding.add(states[0])
+    assert states[0] in colliding
+    with pytest.raises(FingerprintCollision):
+        colliding.add(states[1])
+
+
+def test_node_store_interns_states_and_rebuilds_solution():
+    layout, orders, _ = load_kitchen_data("layouts/overcooked1.json")
+    problem = KitchenProblem(create_initial_state(layout, orders))
+    start = problem.initial
+
+    # Estados e ações são internados; os handles crescem na ordem de inserção
+    store = NodeStore()
+    root = store.add(store.intern(start), ROOT, None, 0.0, 5.0)
+    move = KitchenAction(MOVE, 6, 4)
+    child = problem.result(start, move)
+    first = store.add(store.intern(child), root, move, 1.0, 4.0)
+    again = store.add(store.intern(problem.result(start, move)), root, KitchenAction(MOVE, 6, 4), 1.0, 4.0)
+    assert (root, first, again) == (0, 1, 2)
+    assert len(store.states) == 2 and len(store.action_table) == 1 and len(store) == 3
+    node = store.node(again)
+    assert node.state == child and node.depth == 1 and node.path_cost == 1.0
+    assert node.solution() == [move] and node.path()[0].state is start
+
+    # Com `problem`, os estados expandidos são descartados e o caminho é refeito com result()
+    store = NodeStore(FingerprintTable(problem.fingerprint), problem)
+    root = store.add(store.intern(start), ROOT, None, 0.0, 5.0)
+    store.close(0)
+    first = store.add(store.intern(child), root, move, 1.0, 4.0)
+    assert store.states == [None, child] and store.intern(start) == 0
+    node = store.node(first)
+    assert node.state == child and node.path()[0].state is start and node.path_cost == 1.0
+    store.add(0, first, KitchenAction(MOVE, 5, 4), 2.0, 5.0, start)   # estado reaberto
+    assert store.states[0] is start
+
+    # O Node devolvido pela busca é a cadeia do caminho, reproduzível com result()
+    # O Node devolvido pela busca é a cadeia do caminho, reproduzível com result(); refazê-lo
+    # no modo `fingerprints` não conta no perfil nem dispara `on_transition` de novo
+    transitions = {}
+    for fingerprints in (False, True):
+        calls = transitions[fingerprints] = []
+        subgoal = KitchenProblem(start, goal_test_fn=lambda s: isinstance(s.held_item, Ingredient),
+                                 on_transition=lambda *transition: calls.append(transition))
+        stats = SearchStats(profile=True)
+        goal = astar_search_with_limit(subgoal, zero_heuristic, max_expansions=5000, stats=stats,
+                                       fingerprints=fingerprints)
+        assert stats.calls["result"] == len(calls)
+        replayed = start
+        for step_node, action in zip(goal.path()[1:], goal.solution()):
+            replayed = problem.result(replayed, action)
+            assert step_node.state == replayed
+        assert subgoal.goal_test(replayed) and goal.depth == len(goal.solution())
+    assert len(transitions[True]) == len(transitions[False])
@@ -1,6 +1,17 @@
+import contextlib
+import io
+import json
+
+from agents.kitchen_agent import KitchenAgent
+from env.kitchen_env import KitchenEnvironment
+from env.orders import OrderStream, generate_orders
+from env.trace import Trace, TraceWriter
 from models.entities import Order
-from models.states import KitchenState
-from utils.kitchen_data import load_kitchen_data
+from models.states import KitchenState, LayoutIndex
+from models.states.layout_index import MAX_CACHED_LAYOUTS
+from utils.kitchen_data import load_kitchen_data, parse_kitchen_data
+from utils.layout_generator import LayoutSpec, check_solvable, generate_layout
+from problems.kitchen_problem import KitchenProblem
 from utils.state_factory import create_initial_state
 
 def test_load_kitchen_data_basic(tmp_path):
@@ -53,3 +64,160 @@ def test_create_initial_state():
     assert len(state.grid_objects) == 1
     assert state.grid_objects[0][0] == (2, 1)
     assert state.grid_objects[0][1].state == "CLEAN"
+
+def test_create_initial_state_builds_shared_layout_index():
+    layout = [
+        "WWWWW",
+        "WOPSW",
+        "W.A.W",
+        "WTDKW",
+        "WWWWW"
+    ]
+    orders = [
+        Order(ingredients=("Onion",), instant=0, duration=50, score=20, recipe=None)
+    ]
+
+    state = create_initial_state(layout, orders)
+    index = state.layout_index
+
+    assert isinstance(index, LayoutIndex)
+    assert create_initial_state(layout, orders).layout_index is index
+    assert index.stoves == ((3, 1),)
+    assert index.boards == ((1, 3),)
+    assert index.pots == ((3, 3),)
+    assert index.deliveries == ((2, 3),)
+    assert index.sources["Onion"] == ((1, 1),)
+    assert index.counters == ((2, 1),)  # o prato inicial fica sobre um balcão
+    assert index.is_passable(1, 2) and not index.is_passable(2, 1)
+    assert [(a.x, a.y) for a in index.move_actions((2, 2))] == [(3, 2), (1, 2)]
+    assert [tile for _, _, tile in index.interaction_neighbors((2, 2))] == ['D', 'C']
+
+def test_layout_index_true_distances():
+    layout = [
+        "#######",
+        "#A.C..#",
+        "#..C..#",
+        "#.....#",
+        "#CCCCS#",
+        "#######",
+    ]
+    state = create_initial_state(layout, [])
+    index = state.layout_index
+
+    # Vizinhança-8: a diagonal custa um passo (Manhattan daria 3)
+    assert index.distance((1, 1), (2, 3)) == 2
+    # Estação: passos até um tile de onde se interage com ela (vizinho-4)
+    assert index.distance((1, 1), (5, 4)) == 4
+    # Os balcões C bloqueiam a passagem: é preciso contornar por baixo
+    assert index.distance((2, 1), (4, 1)) == 4
+    # De estação para estação (parte do melhor vizinho caminhável da origem)
+    assert index.distance((3, 2), (5, 4)) == 1
+    # Tile cercado, sem vizinho caminhável
+    assert index.distance((1, 1), (0, 0)) == float("inf")
+
+
+def test_layout_index_cache_is_bounded():
+    LayoutIndex.clear_cache()
+    first = LayoutIndex.for_layout(["#####", "#A..#", "#####"])
+    layouts = [["#" * width, "#" + "." * (width - 2) + "#", "#" * width] for width in range(6, 9 + MAX_CACHED_LAYOUTS)]
+
+    # O layout em uso continua guardado; os mais antigos saem quando o limite estoura
+    for layout in layouts:
+        assert LayoutIndex.for_layout(["#####", "#A..#", "#####"]) is first
+        LayoutIndex.for_layout(layout)
+    assert len(LayoutIndex._cache) == MAX_CACHED_LAYOUTS
+    assert LayoutIndex.for_layout(["#####", "#A..#", "#####"]) is first
+    assert tuple(layouts[0]) not in LayoutIndex._cache
+
+    LayoutIndex.clear_cache()
+    assert not LayoutIndex._cache
+    assert LayoutIndex.for_layout(["#####", "#A..#", "#####"]) is not first
+
+
+def test_trace_streams_actions_and_replays_any_step(tmp_path):
+    layout, orders, max_steps = load_kitchen_data("layouts/overcooked1.json")
+    state = create_initial_state(layout, orders)
+    path = tmp_path / "trace.jsonl"
+    writer = TraceWriter(path, state, meta={"layout": "overcooked1"}, keyframe_interval=10)
+    env = KitchenEnvironment(state, trace=writer)
+    env.add_thing(KitchenAgent(heuristic=KitchenProblem(state).h))
+
+    states, renders = [env.state], [env.render(quiet=True)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(25):
+            env.step()
+            states.append(env.state)
+            renders.append(env.render(quiet=True))
+            # Gravado em streaming: o arquivo já tem o cabeçalho e todos os passos até aqui
+            assert len(path.read_text(encoding="utf-8").splitlines()) == len(states)
+    writer.close()
+
+    trace = Trace.load(path)
+    assert len(trace) == 25 and trace.meta == {"layout": "overcooked1"}
+    assert sorted(trace.keyframes) == [10, 20]
+    for step in (0, 7, 10, 19, 25):
+        replayed = trace.state_at(step)
+        assert replayed == states[step] and replayed.time == states[step].time
+        assert trace.render_at(step) == renders[step]
+    assert list(trace.states()) == states
+
+
+def test_order_stream_releases_expires_and_reports_throughput(tmp_path):
+    layout, orders, max_steps = load_kitchen_data("layouts/overcooked1.json")
+    late = orders[0]._replace(instant=30, duration=200)
+    never = orders[0]._replace(instant=5, duration=10)
+    stream = OrderStream([orders[0], late, never])
+    state = create_initial_state(layout, list(stream.orders))
+    path = tmp_path / "trace.jsonl"
+    writer = TraceWriter(path, state, keyframe_interval=50, orders=stream)
+    env = KitchenEnvironment(state, trace=writer, orders=stream)
+    env.add_thing(KitchenAgent(heuristic=KitchenProblem(state).h))
+
+    # Só o pedido de instant=0 chega no início; a pontuação máxima conta todos
+    assert env.state.active_orders == (orders[0],)
+    assert env.max_score == 3 * orders[0].score
+    queue = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        while not env.is_done() and env.state.time < max_steps:
+            env.step()
+            queue.append(len(env.state.active_orders))
+    writer.close()
+
+    # `never` chega em t=5 e expira em t=15, antes de qualquer sopa ficar pronta
+    assert queue[4] == 2 and never not in env.state.active_orders
+    assert env.metrics.expirations == [(15, never)]
+    result = env.throughput()
+    assert result.delivered + result.expired == 3 and result.pending == 0
+    assert result.max_queue == max(queue) and result.orders_per_min > 0
+    assert result.mean_lateness <= 0  # entregues antes do prazo
+
+    # O replay reproduz as chegadas e expirações
+    trace = Trace.load(path)
+    assert trace.orders.orders == stream.orders
+    assert trace.state_at(len(trace)) == env.state
+
+
+def test_generate_orders_is_seeded_poisson_stream():
+    _, templates, _ = load_kitchen_data("layouts/overcooked2.json")
+    stream = generate_orders(templates, 20, mean_interval=30, duration=120, seed=7)
+    assert stream == generate_orders(templates, 20, mean_interval=30, duration=120, seed=7)
+    assert len(stream) == 20 and stream[0].instant == 0
+    assert all(a.instant <= b.instant for a, b in zip(stream, stream[1:]))
+    assert all(o.duration == 120 and o.recipe in {t.recipe for t in templates} for o in stream)
+
+
+def test_layout_generator_is_seeded_and_solvable():
+    spec = LayoutSpec(width=20, height=12, pots=2, orders=("Onion Soup", "Mixed Soup"), order_count=3, seed=4)
+    data = generate_layout(spec)
+    assert data == generate_layout(spec)
+    assert len(data["layout"]) == 12 and all(len(row) == 20 for row in data["layout"])
+    assert check_solvable(data) == []
+
+    layout, orders, max_steps = parse_kitchen_data(data)
+    assert [o.instant for o in orders] == [0, 30, 60] and max_steps == 700
+    state = create_initial_state(layout, orders)
+    assert len(state.layout_index.pots) == 2 and state.layout_index.is_passable(*state.agent_pos)
+
+    # O layout 1-6 não tem fonte de cebola para os hambúrgueres
+    with open("layouts/overcooked6.json", encoding="utf-8") as f:
+        assert any("Onion" in problem for problem in check_solvable(json.load(f)))
@@ -1,17 +1,24 @@
-from .kitchen_data import load_kitchen_data
+from .kitchen_data import load_kitchen_data, parse_kitchen_data
 from .state_factory import create_initial_state
 from .recipe_utils import (
     order_satisfied_by_plate,
     pot_required_ingredients,
     pot_needed_ingredients,
-    pot_needed_count_for_order,
+    order_priority,
+    assign_pots,
+    pot_assignments,
+    deliverable_order,
 )
 
 __all__ = [
     "load_kitchen_data",
+    "parse_kitchen_data",
     "create_initial_state",
     "order_satisfied_by_plate",
     "pot_required_ingredients",
     "pot_needed_ingredients",
-    "pot_needed_count_for_order",
+    "order_priority",
+    "assign_pots",
+    "pot_assignments",
+    "deliverable_order",
 ]
@@ -7,7 +7,11 @@ from models.entities import Order, Recipe, RecipeStep
 def load_kitchen_data(file_path: str) -> Tuple[List[str], List[Order], int]:
     with open(file_path, "r") as f:
         data = json.load(f)
+    return parse_kitchen_data(data)
 
+
+def parse_kitchen_data(data: dict) -> Tuple[List[str], List[Order], int]:
+    """Layout, pedidos e `max_steps` de um dict no formato dos JSONs de `layouts/`."""
     layout = data.get("layout", [])
     orders_data = data.get("orders", [])
     max_steps = data.get("max_steps", 20)
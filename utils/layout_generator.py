@@ -0,0 +1,267 @@
+"""
+Gerador procedural de layouts, para testar como a busca escala com o tamanho da cozinha.
+
+Gera o mesmo JSON de `layouts/overcooked*.json` (lido por `load_kitchen_data`):
+
+    - borda de paredes (`#`) e um anel de balcões (`C`) junto a ela, como nos levels
+    - estações (panelas, tábuas, fogões, pias, fontes, entrega, lixeira, extintor e
+      pratos) sorteadas no anel, sempre com piso ao lado
+    - ilhas de balcão no interior, na proporção `counter_density`, sem desconectar o
+      piso nem tapar o acesso a uma estação
+    - pedidos sorteados de `orders` (receitas de panela), chegando a cada `order_interval`
+
+O sorteio é determinístico pela `seed`. Cada layout passa por `check_solvable`
+(tudo o que os pedidos exigem existe e é alcançável a partir do agente); se uma
+tentativa falhar, o gerador tenta de novo com a semente seguinte.
+
+Uso:
+    python -m utils.layout_generator --width 30 --height 18 --pots 2 --seed 7 -o out/gen.json
+"""
+
+import argparse
+import json
+import random
+from collections import deque
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from models.states import LayoutIndex
+from models.states.layout_index import INTERACTION_OFFSETS, SOURCE_TILES
+from utils.kitchen_data import parse_kitchen_data
+from utils.recipe_utils import pot_required_ingredients
+
+# Receitas de panela suportadas pelo modelo de transição (ingrediente --> quantidade CHOPPED)
+RECIPES: Dict[str, Tuple[Tuple[str, int], ...]] = {
+    "Onion Soup": (("Onion", 3),),
+    "Tomato Soup": (("Tomato", 3),),
+    "Mixed Soup": (("Onion", 2), ("Tomato", 1)),
+}
+RECIPE_SCORES = {"Onion Soup": 20, "Tomato Soup": 20, "Mixed Soup": 25}
+
+# Ingrediente --> tile da fonte
+SOURCE_FOR = {ingredient: tile for tile, ingredient in SOURCE_TILES.items() if tile not in ('B',)}
+
+MAX_ATTEMPTS = 50
+
+
+class LayoutSpec(NamedTuple):
+    width: int = 15
+    height: int = 10
+    counter_density: float = 0.1      # fração do interior convertida em ilhas de balcão
+    pots: int = 1
+    boards: int = 2
+    stoves: int = 0
+    sinks: int = 1
+    plates: int = 2
+    sources: Tuple[str, ...] = ("Onion", "Tomato")
+    orders: Tuple[str, ...] = ("Onion Soup",)   # receitas sorteadas para os pedidos
+    order_count: int = 1
+    order_interval: int = 30
+    order_duration: int = 200
+    max_steps: Optional[int] = None   # padrão: 100 + 200 por pedido
+    seed: int = 0
+
+
+def _order_json(name, instant, duration):
+    steps = RECIPES[name]
+    ingredients = [ingredient for ingredient, quantity in steps for _ in range(quantity)]
+    return {
+        "ingredients": ingredients,
+        "instant": instant,
+        "duration": duration,
+        "score": RECIPE_SCORES[name],
+        "recipe": {
+            "name": name,
+            "steps": [
+                {"ingredient": ingredient, "required_state": "CHOPPED", "quantity": quantity}
+                for ingredient, quantity in steps
+            ],
+        },
+    }
+
+
+def _floor_connected(grid, floor_count):
+    """O piso (`.`) forma uma única região (vizinhança-4)?"""
+    start = next(((x, y) for y, row in enumerate(grid) for x, c in enumerate(row) if c == '.'), None)
+    if start is None:
+        return False
+    seen = {start}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        for dx, dy in INTERACTION_OFFSETS:
+            nxt = (x + dx, y + dy)
+            if nxt not in seen and grid[nxt[1]][nxt[0]] == '.':
+                seen.add(nxt)
+                queue.append(nxt)
+    return len(seen) == floor_count
+
+
+def _has_floor_neighbor(grid, x, y):
+    return any(grid[y + dy][x + dx] == '.' for dx, dy in INTERACTION_OFFSETS
+               if 0 <= y + dy < len(grid) and 0 <= x + dx < len(grid[0]))
+
+
+def _build(spec: LayoutSpec, rng: random.Random) -> dict:
+    width, height = spec.width, spec.height
+    grid = [['#'] * width for _ in range(height)]
+    for y in range(1, height - 1):
+        for x in range(1, width - 1):
+            ring = x in (1, width - 2) or y in (1, height - 2)
+            grid[y][x] = 'C' if ring else '.'
+
+    # Estações no anel, só onde há piso ao lado (os cantos do anel ficam de fora)
+    slots = [
+        (x, y) for y in range(1, height - 1) for x in range(1, width - 1)
+        if grid[y][x] == 'C' and _has_floor_neighbor(grid, x, y)
+    ]
+    rng.shuffle(slots)
+    tiles = (
+        ['K'] * spec.pots + ['T'] * spec.boards + ['S'] * spec.stoves + ['W'] * spec.sinks
+        + [SOURCE_FOR[ingredient] for ingredient in spec.sources]
+        + ['D', 'G', 'E'] + ['P'] * spec.plates
+    )
+    if len(tiles) > len(slots):
+        raise ValueError(f"Layout {width}x{height} não comporta {len(tiles)} estações")
+    stations = []
+    for tile, (x, y) in zip(tiles, slots):
+        grid[y][x] = tile
+        stations.append((x, y))
+
+    # Ilhas de balcão: cada uma mantém o piso conectado e o acesso às estações
+    interior = [(x, y) for y in range(2, height - 2) for x in range(2, width - 2)]
+    rng.shuffle(interior)
+    floor_count = len(interior)
+    target = int(round(spec.counter_density * len(interior)))
+    placed = 0
+    for x, y in interior:
+        if placed >= target:
+            break
+        grid[y][x] = 'C'
+        if _floor_connected(grid, floor_count - 1) and all(_has_floor_neighbor(grid, sx, sy) for sx, sy in stations):
+            floor_count -= 1
+            placed += 1
+        else:
+            grid[y][x] = '.'
+
+    floor = [(x, y) for y in range(height) for x in range(width) if grid[y][x] == '.']
+    ax, ay = rng.choice(floor)
+    grid[ay][ax] = 'A'
+
+    orders = [
+        _order_json(rng.choice(spec.orders), i * spec.order_interval, spec.order_duration)
+        for i in range(spec.order_count)
+    ]
+    max_steps = spec.max_steps if spec.max_steps is not None else 100 + 200 * spec.order_count
+    return {"layout": ["".join(row) for row in grid], "orders": orders, "max_steps": max_steps}
+
+
+def check_solvable(data: dict) -> List[str]:
+    """Problemas que impedem resolver o layout (lista vazia = resolvível).
+
+    Verificação estrutural: cada pedido tem fonte de todos os ingredientes, tábua (se
+    algo precisa ser cortado), panela ou fogão para cozinhar, prato e entrega, e tudo
+    isso é alcançável a partir da posição inicial do agente.
+    """
+    layout, orders, _ = parse_kitchen_data(data)
+    agent = next(((x, y) for y, row in enumerate(layout) for x, c in enumerate(row) if c == 'A'), None)
+    if agent is None:
+        return ["sem agente (A)"]
+    index = LayoutIndex.for_layout(row.replace('A', '.') for row in layout)
+
+    def reachable(positions):
+        return any(index.distance(agent, pos) != float("inf") for pos in positions)
+
+    problems = []
+    for name, positions in (("entrega (D)", index.deliveries), ("prato (P)", index.positions('P'))):
+        if not reachable(positions):
+            problems.append(f"sem {name} alcançável")
+    for order in orders:
+        label = order.recipe.name if order.recipe else "+".join(order.ingredients)
+        steps = order.recipe.steps if order.recipe else ()
+        for ingredient in sorted(set(pot_required_ingredients(order))):
+            if not reachable(index.sources.get(ingredient, ())):
+                problems.append(f"{label}: sem fonte de {ingredient} alcançável")
+        if any(step.required_state == 'CHOPPED' for step in steps) and not reachable(index.boards):
+            problems.append(f"{label}: sem tábua (T) alcançável")
+        if any(step.required_state == 'COOKED' for step in steps) and not reachable(index.stoves):
+            problems.append(f"{label}: sem fogão (S) alcançável")
+        if order.recipe and all(step.required_state == 'CHOPPED' for step in steps) and not reachable(index.pots):
+            problems.append(f"{label}: sem panela (K) alcançável")
+    return problems
+
+
+def generate_layout(spec: LayoutSpec) -> dict:
+    """Layout resolvível para `spec` (dict no formato dos JSONs de `layouts/`)."""
+    for name in spec.orders:
+        if name not in RECIPES:
+            raise ValueError(f"Receita desconhecida: {name} (disponíveis: {', '.join(RECIPES)})")
+    for ingredient in spec.sources:
+        if ingredient not in SOURCE_FOR:
+            raise ValueError(f"Ingrediente sem fonte: {ingredient} (disponíveis: {', '.join(SOURCE_FOR)})")
+    if spec.width < 7 or spec.height < 6:
+        raise ValueError("O layout precisa ter pelo menos 7x6 tiles")
+    problems = []
+    for attempt in range(MAX_ATTEMPTS):
+        data = _build(spec, random.Random(spec.seed + attempt))
+        problems = check_solvable(data)
+        if not problems:
+            return data
+    raise ValueError(f"Nenhum layout resolvível em {MAX_ATTEMPTS} tentativas: {'; '.join(problems)}")
+
+
+def write_layout(data: dict, path: str):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+        f.write("\n")
+
+
+def main(argv=None):
+    defaults = LayoutSpec()
+    parser = argparse.ArgumentParser(description="Gera um layout procedural resolvível")
+    parser.add_argument("-o", "--output", required=True, help="Arquivo JSON de saída")
+    parser.add_argument("--width", type=int, default=defaults.width)
+    parser.add_argument("--height", type=int, default=defaults.height)
+    parser.add_argument("--counter-density", type=float, default=defaults.counter_density,
+                        help="Fração do interior com ilhas de balcão (padrão: 0.1)")
+    parser.add_argument("--pots", type=int, default=defaults.pots)
+    parser.add_argument("--boards", type=int, default=defaults.boards)
+    parser.add_argument("--stoves", type=int, default=defaults.stoves)
+    parser.add_argument("--sinks", type=int, default=defaults.sinks)
+    parser.add_argument("--plates", type=int, default=defaults.plates)
+    parser.add_argument("--sources", default=",".join(defaults.sources),
+                        help=f"Fontes de ingredientes (padrão: {','.join(defaults.sources)})")
+    parser.add_argument("--orders", default=",".join(defaults.orders),
+                        help=f"Receitas sorteadas para os pedidos: {', '.join(RECIPES)}")
+    parser.add_argument("--order-count", type=int, default=defaults.order_count)
+    parser.add_argument("--order-interval", type=int, default=defaults.order_interval)
+    parser.add_argument("--max-steps", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=defaults.seed)
+    args = parser.parse_args(argv)
+
+    spec = LayoutSpec(
+        width=args.width,
+        height=args.height,
+        counter_density=args.counter_density,
+        pots=args.pots,
+        boards=args.boards,
+        stoves=args.stoves,
+        sinks=args.sinks,
+        plates=args.plates,
+        sources=tuple(s.strip() for s in args.sources.split(",") if s.strip()),
+        orders=tuple(o.strip() for o in args.orders.split(",") if o.strip()),
+        order_count=args.order_count,
+        order_interval=args.order_interval,
+        max_steps=args.max_steps,
+        seed=args.seed,
+    )
+    try:
+        data = generate_layout(spec)
+    except ValueError as exc:
+        parser.error(str(exc))
+    write_layout(data, args.output)
+    print("\n".join(data["layout"]))
+    print(f"[Gerador] {len(data['orders'])} pedido(s), max_steps={data['max_steps']} --> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
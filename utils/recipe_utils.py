@@ -2,11 +2,12 @@
 
 Centraliza a lógica de comparação de ingredientes para que possa ser usada
 tanto pelo `KitchenProblem` (actions/result/heurística) quanto pelo
-`KitchenAgent` (seleção de sub-objetivos).
+`KitchenAgent` (seleção de sub-objetivos), incluindo o escalonador que decide em
+qual pedido cada panela trabalha (`assign_pots`).
 """
 
 from collections import Counter
-from typing import List
+from typing import Dict, List, Optional, Tuple
 
 from models.entities import Order, Plate, Pot
 from models.states import KitchenState
@@ -49,16 +50,21 @@ def pot_required_ingredients(order: Order) -> List[str]:
     return list(order.ingredients)
 
 
-def pot_needed_ingredients(pot: Pot, state: KitchenState) -> List[str]:
-    """Retorna a lista de ingredientes que ainda faltam ser adicionados à panela.
+def order_priority(active_orders) -> tuple:
+    """Pedidos na ordem do escalonador: menor deadline (`instant + duration`) primeiro e,
+    no empate, maior pontuação. A ordem original desempata o resto (ordenação estável).
+    """
+    return tuple(sorted(active_orders, key=lambda o: (o.instant + o.duration, -o.score)))
+
 
-    Subtrai os ingredientes já presentes em `pot.ingredients` da lista
-    exigida pela receita do pedido ativo. Usada em `actions()` para
-    decidir se o agente pode executar `PutInPot`.
+def pot_needed_ingredients(pot: Pot, order: Optional[Order]) -> List[str]:
+    """Retorna a lista de ingredientes que ainda faltam para `order` na panela.
+
+    Subtrai os ingredientes já presentes em `pot.ingredients` da lista exigida pela
+    receita. Sem pedido (panela sem pedido atribuído) não falta nada.
     """
-    if not state.active_orders:
+    if order is None:
         return []
-    order = state.active_orders[0]
     needed = list(pot_required_ingredients(order))
     for ing in pot.ingredients:
         if ing in needed:
@@ -66,17 +72,50 @@ def pot_needed_ingredients(pot: Pot, state: KitchenState) -> List[str]:
     return needed
 
 
-def pot_needed_count_for_order(active_orders, current_ingredients) -> int:
-    """Retorna o número de ingredientes ainda faltando na panela (inteiro).
+def _fits(order: Order, ingredients) -> bool:
+    """Os ingredientes já na panela cabem na receita do pedido?"""
+    remaining = Counter(pot_required_ingredients(order))
+    remaining.subtract(ingredients)
+    return all(count >= 0 for count in remaining.values())
+
 
-    Usado em `result()` após um `PutInPot` para decidir se a panela
-    passa para `COOKING` (retorna 0) ou permanece em `FILLING`.
+def assign_pots(pots, active_orders) -> Dict[Tuple[int, int], Order]:
+    """Escalonador de pedidos: atribui um pedido ativo a cada panela.
+
+    `pots` são pares (posição, `Pot`) em ordem canônica. Panelas com ingredientes ficam
+    com o pedido de maior prioridade (`order_priority`) ainda livre em que seus
+    ingredientes cabem; as vazias recebem, em ordem, os pedidos livres seguintes. Assim
+    cada panela trabalha num pedido diferente e várias receitas andam em paralelo
+    (uma cozinhando enquanto a próxima é preenchida). Panelas sem pedido livre ficam
+    fora do mapa retornado.
     """
-    if not active_orders:
-        return 0
-    order = active_orders[0]
-    needed = list(pot_required_ingredients(order))
-    for ing in current_ingredients:
-        if ing in needed:
-            needed.remove(ing)
-    return len(needed)
+    orders = list(order_priority(active_orders))
+    assignment = {}
+    for pos, pot in pots:
+        if pot.ingredients:
+            for i, order in enumerate(orders):
+                if _fits(order, pot.ingredients):
+                    assignment[pos] = orders.pop(i)
+                    break
+    for pos, pot in pots:
+        if not pot.ingredients and orders:
+            assignment[pos] = orders.pop(0)
+    return assignment
+
+
+def pot_assignments(state: KitchenState) -> Dict[Tuple[int, int], Order]:
+    """`assign_pots` aplicado às panelas (`K`) do estado."""
+    pots = []
+    for pos in state.layout_index.pots:
+        station = state.stations_state.get(pos)
+        if station is not None and isinstance(station.content, Pot):
+            pots.append((pos, station.content))
+    return assign_pots(pots, state.active_orders)
+
+
+def deliverable_order(plate: Plate, active_orders) -> Optional[Order]:
+    """Pedido (na ordem do escalonador) que o prato satisfaz, ou None."""
+    for order in order_priority(active_orders):
+        if order_satisfied_by_plate(plate, order):
+            return order
+    return None
@@ -1,7 +1,7 @@
 from typing import List, Tuple
 
 from models.entities import Ingredient, Order, Plate, Extinguisher, Pot
-from models.states import KitchenState, StationState
+from models.states import KitchenState, LayoutIndex, PositionMap, StationState
 
 
 def create_initial_state(layout: List[str], orders: List[Order]) -> KitchenState:
@@ -30,16 +30,20 @@ def create_initial_state(layout: List[str], orders: List[Order]) -> KitchenState
                 row_list[x] = "C"  # Extinguishers start on a counter
         clean_layout.append("".join(row_list))
 
+    # Índice estático construído uma única vez por level e compartilhado pelos estados
+    layout_index = LayoutIndex.for_layout(clean_layout)
+
     # Simula Fila de Prioridade (Priority Queue) baseada no deadline (instant + duration)
     sorted_orders = sorted(orders, key=lambda o: o.instant + o.duration)
 
     return KitchenState(
         agent_pos=agent_pos,
         held_item=None,
-        layout=tuple(clean_layout),
-        grid_objects=tuple(grid_objects_list),
+        layout=layout_index.layout,
+        grid_objects=PositionMap(grid_objects_list),
         active_orders=tuple(sorted_orders),
         delivered_orders=(),
-        stations_state=tuple(stations_state_list),
+        stations_state=PositionMap(stations_state_list),
         time=0,
+        layout_index=layout_index,
     )